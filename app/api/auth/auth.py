@@ -1,24 +1,198 @@
 from fastapi import HTTPException, Header
-from google.cloud import secretmanager
+from app.api.features.utils.lazy_import import LazyImport
+from app.api.logger import setup_logger
+
+import hmac
 import os
+import threading
+import time
+
+logger = setup_logger(__name__)
 
-def access_secret_file(secret_id, version_id="latest"):
+SecretManagerServiceClient = LazyImport("google.cloud.secretmanager:SecretManagerServiceClient")
+
+def access_secret_file(secret_id, version_id="latest", client=None):
     """
     Access a secret file in Google Cloud Secret Manager and parse it.
     """
     project_id = os.environ.get('PROJECT_ID')
-    client = secretmanager.SecretManagerServiceClient()
+    client = client or SecretManagerServiceClient.resolve()()
     name = f"projects/{project_id}/secrets/{secret_id}/versions/{version_id}"
     response = client.access_secret_version(name=name)
     return response.payload.data.decode("UTF-8")
 
+class ApiKeyStore:
+    """
+    Keeps the valid API keys in memory instead of reading Secret Manager on every request.
+
+    Each secret may hold several keys, one per line, and several secrets (or versions of
+    one secret, as "secret_id:version") can be listed; every key found is accepted, so a
+    key can be rotated by adding the new one before removing the old one. The keys are
+    fetched on first use and cached for `ttl_seconds`; `start_refresh` refreshes them in a
+    background thread before they expire. If a refresh fails the previous keys stay valid
+    for up to `max_stale_seconds`, and the next attempt waits `retry_seconds`, so an
+    outage of Secret Manager is not retried on every request. Only one caller refreshes at
+    a time; while it does, the others keep using the previous keys.
+
+    Parameters:
+    secrets (list): Secret ids, optionally with a version ("backend-access:latest").
+    client: Object with an `access_secret_version(name=...)` method, such as a local stub.
+    Defaults to a SecretManagerServiceClient created on first use.
+    static_keys (list): Fixed keys used instead of Secret Manager, e.g. in development.
+    """
+    def __init__(self, secrets=(), client=None, static_keys=None, ttl_seconds=300, max_stale_seconds=3600, retry_seconds=10):
+        self.secrets = list(secrets)
+        self.client = client
+        self.static_keys = static_keys
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.retry_seconds = retry_seconds
+        self._keys = None
+        self._fetched_at = 0.0
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _fetch(self):
+        if self.client is None:
+            self.client = SecretManagerServiceClient.resolve()()
+
+        keys = []
+        for secret in self.secrets:
+            secret_id, _, version_id = secret.partition(":")
+            payload = access_secret_file(secret_id, version_id or "latest", client=self.client)
+            keys.extend(line.strip() for line in payload.splitlines() if line.strip())
+
+        if not keys:
+            raise ValueError("No API keys found in the configured secrets")
+        return [key.encode("utf-8") for key in keys]
+
+    def _usable_keys(self, now):
+        # Called with the lock held
+        if self._keys is not None and now - self._fetched_at <= self.max_stale_seconds:
+            return self._keys
+        return None
+
+    def _refresh(self):
+        # Called with the refresh lock held
+        try:
+            keys = self._fetch()
+        except Exception as e:
+            logger.error(f"Could not refresh the API keys: {e}")
+            with self._lock:
+                self._retry_at = time.monotonic() + self.retry_seconds
+                if self._usable_keys(time.monotonic()) is None:
+                    self._keys = None
+                    raise
+            return
+
+        with self._lock:
+            self._keys = keys
+            self._fetched_at = time.monotonic()
+            self._retry_at = 0.0
+        logger.info(f"Loaded {len(keys)} API keys")
+
+    def refresh(self):
+        """Fetches the keys again, keeping the previous ones if Secret Manager cannot be read."""
+        with self._refresh_lock:
+            self._refresh()
+
+    def keys(self) -> list:
+        if self.static_keys is not None:
+            return [key.encode("utf-8") for key in self.static_keys]
+
+        now = time.monotonic()
+        with self._lock:
+            keys = self._usable_keys(now)
+            due = now >= self._retry_at and (keys is None or now - self._fetched_at > self.ttl_seconds)
+
+        if due and keys is not None:
+            # The previous keys are still usable: one caller refreshes, the others do not wait
+            if self._refresh_lock.acquire(blocking=False):
+                try:
+                    self._refresh()
+                finally:
+                    self._refresh_lock.release()
+        elif due:
+            with self._refresh_lock:
+                # Another caller may have loaded the keys, or failed to, while this one waited
+                with self._lock:
+                    now = time.monotonic()
+                    retry = self._usable_keys(now) is None and now >= self._retry_at
+                if retry:
+                    self._refresh()
+        elif keys is None:
+            raise RuntimeError("The API keys could not be loaded, retrying shortly")
+
+        with self._lock:
+            keys = self._usable_keys(time.monotonic())
+        if keys is None:
+            raise RuntimeError("The API keys could not be loaded, retrying shortly")
+        return list(keys)
+
+    def is_valid(self, api_key) -> bool:
+        if not api_key:
+            return False
+        candidate = api_key.encode("utf-8")
+        # Every key is compared, in constant time, so the response time does not tell
+        # how much of a key matched or which key it was
+        matches = [hmac.compare_digest(candidate, key) for key in self.keys()]
+        return any(matches)
+
+    def start_refresh(self):
+        """Refreshes the keys in a background thread, before they expire."""
+        if self.static_keys is not None or self._thread is not None:
+            return
+
+        def refresh_loop():
+            while not self._stop.wait(self.ttl_seconds * 0.8):
+                try:
+                    self.refresh()
+                except Exception:
+                    pass
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=refresh_loop, name="api-key-refresh", daemon=True)
+        self._thread.start()
+
+    def stop_refresh(self):
+        self._stop.set()
+        self._thread = None
+
+def create_api_key_store(client=None) -> ApiKeyStore:
+    # Only production reads Secret Manager. A missing ENV_TYPE raises, so no key is accepted
+    if os.environ['ENV_TYPE'] != "production":
+        return ApiKeyStore(static_keys=["dev"])
+
+    secrets = [secret.strip() for secret in os.environ.get("API_KEY_SECRETS", "backend-access").split(",") if secret.strip()]
+    return ApiKeyStore(
+        secrets,
+        client=client,
+        ttl_seconds=int(os.environ.get("API_KEY_TTL_SECONDS", "300")),
+        max_stale_seconds=int(os.environ.get("API_KEY_MAX_STALE_SECONDS", "3600")),
+        retry_seconds=int(os.environ.get("API_KEY_RETRY_SECONDS", "10"))
+    )
+
+_api_key_store = None
+_api_key_store_lock = threading.Lock()
+
+def get_api_key_store() -> ApiKeyStore:
+    # Created on first use, after the .env file has been loaded
+    global _api_key_store
+    with _api_key_store_lock:
+        if _api_key_store is None:
+            _api_key_store = create_api_key_store()
+        return _api_key_store
+
 # Function to ensure incoming request is from controller with key
 def key_check(api_key: str = Header(None)):
-  
-  if os.environ['ENV_TYPE'] == "production":
-    set_key = access_secret_file("backend-access")
-  else:
-    set_key = "dev"
-  
-  if api_key is None or api_key != set_key:
-    raise HTTPException(status_code=401, detail="Invalid API Request Key")
\ No newline at end of file
+    try:
+        valid = get_api_key_store().is_valid(api_key)
+    except Exception as e:
+        logger.error(f"API keys are unavailable: {e}")
+        raise HTTPException(status_code=503, detail="Authentication is temporarily unavailable")
+
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid API Request Key")
@@ -0,0 +1,305 @@
+from app.api.features.full_workflow_for_gradio import run_full_workflow
+from app.api.features.schemas.schemas import BatchRowResultSchema, BatchRowStatus, BatchStatusSchema, RequestSchema, RequestSchemaWithFiles
+from app.api.features.utils.artifact_store import deck_url
+from app.api.features.utils.executor import run_in_executor, shutdown_executor
+from app.api.features.utils.pdf_extraction import shutdown_pdf_process_pool
+from app.api.features.utils.http_client import close_http_client
+from app.api.features.utils.stage_limits import create_stage_limits, use_stage_limits
+from app.api.logger import setup_logger
+from collections import OrderedDict
+from pydantic import ValidationError
+from typing import NamedTuple
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import os
+import tempfile
+import time
+import uuid
+
+logger = setup_logger(__name__)
+
+# Rows of one batch processed at the same time
+batch_parallel = int(os.environ.get("BATCH_PARALLEL", "4"))
+
+# Concurrency of each pipeline stage across the rows of a batch, 0 for unlimited
+default_stage_limits = {
+    "download": int(os.environ.get("BATCH_DOWNLOAD_CONCURRENCY", "8")),
+    "summarize": int(os.environ.get("BATCH_SUMMARIZE_CONCURRENCY", "4")),
+    "generate": int(os.environ.get("BATCH_GENERATE_CONCURRENCY", "4")),
+    "render": int(os.environ.get("BATCH_RENDER_CONCURRENCY", "2"))
+}
+
+manifest_dir = os.environ.get("BATCH_MANIFEST_DIR", os.path.join(tempfile.gettempdir(), "aipptbuilder", "batches"))
+
+# Finished batches kept in memory so their status can be polled, older ones are forgotten
+batch_history_size = int(os.environ.get("BATCH_HISTORY_SIZE", "100"))
+
+class BatchRow(NamedTuple):
+    row_id: str
+    line: int
+    # None when the row could not be validated
+    request: RequestSchemaWithFiles
+    error: str = None
+
+def _csv_record(record: dict) -> dict:
+    # CSV rows are flat: the presentation arguments sit next to the file fields
+    record = {key: value for key, value in record.items() if key and value not in (None, "")}
+    if "slide_images" in record:
+        try:
+            record["slide_images"] = json.loads(record["slide_images"])
+        except ValueError as e:
+            raise ValueError(f"Invalid slide_images JSON: {e}") from e
+    request_args = {key: record.pop(key) for key in list(record) if key in RequestSchema.model_fields}
+    return {"request_args": request_args, **record}
+
+def parse_batch_rows(text: str, file_format="jsonl") -> list:
+    """
+    Parses the rows of a batch from JSONL (one RequestSchemaWithFiles per line) or CSV.
+
+    A row can carry a `row_id`; otherwise its id is derived from its content, so the
+    same row keeps its id when the batch is submitted again. Rows that fail validation
+    are returned with their error instead of failing the whole batch.
+
+    Returns:
+    list: The BatchRow of every row.
+    """
+    records = []
+    if file_format == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        try:
+            for line, record in enumerate(reader, start=2):
+                try:
+                    records.append((line, _csv_record(record)))
+                except ValueError as e:
+                    records.append((line, e))
+        except csv.Error as e:
+            # The rest of the file cannot be read past a malformed line
+            records.append((reader.line_num, ValueError(f"Invalid CSV: {e}")))
+    else:
+        for line, raw_record in enumerate(text.splitlines(), start=1):
+            if not raw_record.strip():
+                continue
+            try:
+                records.append((line, json.loads(raw_record)))
+            except ValueError as e:
+                records.append((line, ValueError(f"Invalid JSON: {e}")))
+
+    rows = []
+    for line, record in records:
+        if isinstance(record, Exception):
+            rows.append(BatchRow(f"line-{line}", line, None, str(record)))
+            continue
+        if not isinstance(record, dict):
+            rows.append(BatchRow(f"line-{line}", line, None, f"A row must be a JSON object, not {type(record).__name__}"))
+            continue
+
+        row_id = str(record.pop("row_id", "") or "")
+        try:
+            request = RequestSchemaWithFiles(**record)
+        except ValidationError as e:
+            rows.append(BatchRow(row_id or f"line-{line}", line, None, str(e)))
+            continue
+
+        if not row_id:
+            row_id = hashlib.sha256(request.model_dump_json().encode("utf-8")).hexdigest()[:16]
+        rows.append(BatchRow(row_id, line, request))
+
+    return rows
+
+def read_batch_file(path) -> list:
+    with open(path, 'r', encoding='utf-8') as file:
+        text = file.read()
+    return parse_batch_rows(text, "csv" if path.lower().endswith(".csv") else "jsonl")
+
+def read_manifest(manifest_path) -> dict:
+    """Returns the latest manifest entry of every row, by row id."""
+    entries = {}
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    entry = json.loads(line)
+                    entries[entry["row_id"]] = entry
+    except FileNotFoundError:
+        pass
+    return entries
+
+class Batch:
+    """
+    Generates the decks of a batch of rows, writing each outcome to a JSONL manifest.
+
+    At most `parallel` rows are in flight, and the pipeline stages of all of them share
+    the `stage_limits` semaphores, so for example downloads can run wide while rendering
+    stays narrow. Rows already completed in the manifest are skipped, which makes an
+    interrupted batch resumable by running it again with the same manifest.
+    """
+    def __init__(self, rows, manifest_path, parallel=batch_parallel, stage_limits=None, batch_id=None):
+        self.batch_id = batch_id or uuid.uuid4().hex
+        self.rows = rows
+        self.manifest_path = manifest_path
+        self.parallel = parallel
+        self.stage_limits = dict(default_stage_limits, **(stage_limits or {}))
+        self.results = {}
+        self.created_at = time.time()
+        self.finished_at = None
+        self.task = None
+
+    @property
+    def running(self):
+        return self.finished_at is None
+
+    def _append_to_manifest(self, result: BatchRowResultSchema):
+        with open(self.manifest_path, 'a', encoding='utf-8') as file:
+            file.write(result.model_dump_json() + "\n")
+
+    async def _finish_row(self, result: BatchRowResultSchema):
+        self.results[result.line] = result
+        await run_in_executor(self._append_to_manifest, result)
+
+    async def _run_row(self, row: BatchRow, semaphore):
+        async with semaphore:
+            started_at = time.time()
+            try:
+                workflow_result = await run_full_workflow(row.request)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Batch {self.batch_id} row {row.row_id} failed: {e}")
+                result = BatchRowResultSchema(
+                    row_id=row.row_id, line=row.line, status=BatchRowStatus.FAILED, error=str(e),
+                    started_at=started_at, finished_at=time.time()
+                )
+            else:
+                result = BatchRowResultSchema(
+                    row_id=row.row_id, line=row.line, status=BatchRowStatus.COMPLETED,
+                    deck_id=workflow_result.deck.artifact_id, deck_url=deck_url(workflow_result.deck.artifact_id),
+                    title=workflow_result.ppt_content.get("title"), started_at=started_at, finished_at=time.time()
+                )
+            await self._finish_row(result)
+
+    async def run(self) -> BatchStatusSchema:
+        os.makedirs(os.path.dirname(os.path.abspath(self.manifest_path)), exist_ok=True)
+        finished = read_manifest(self.manifest_path)
+
+        # The row tasks inherit the limits from this context
+        use_stage_limits(create_stage_limits(**self.stage_limits))
+        semaphore = asyncio.Semaphore(self.parallel)
+
+        tasks = []
+        seen = set()
+        for row in self.rows:
+            previous = finished.get(row.row_id)
+            if row.row_id in seen or (previous is not None and previous["status"] == BatchRowStatus.COMPLETED):
+                # Already completed by an earlier run, or a duplicate of an earlier row of this input
+                self.results[row.line] = BatchRowResultSchema(**dict(previous or {}, row_id=row.row_id, line=row.line, status=BatchRowStatus.SKIPPED))
+                continue
+            seen.add(row.row_id)
+            if row.request is None:
+                await self._finish_row(BatchRowResultSchema(row_id=row.row_id, line=row.line, status=BatchRowStatus.INVALID, error=row.error))
+                continue
+            tasks.append(asyncio.create_task(self._run_row(row, semaphore)))
+
+        logger.info(f"Batch {self.batch_id}: {len(tasks)} rows to generate, {len(self.rows) - len(tasks)} skipped or invalid")
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.finished_at = time.time()
+
+        return self.to_schema()
+
+    def to_schema(self) -> BatchStatusSchema:
+        results = list(self.results.values())
+        counts = {status: 0 for status in BatchRowStatus}
+        for result in results:
+            counts[result.status] += 1
+        return BatchStatusSchema(
+            batch_id=self.batch_id,
+            running=self.running,
+            total=len(self.rows),
+            counts=counts,
+            created_at=self.created_at,
+            finished_at=self.finished_at,
+            rows=sorted(results, key=lambda result: result.line)
+        )
+
+class BatchManager:
+    """
+    Runs the batches submitted through the API in the background and keeps their status,
+    up to `max_finished_batches` finished ones. Their manifests stay on disk, so a
+    forgotten batch can still be resumed by id.
+    """
+    def __init__(self, manifest_dir=manifest_dir, max_finished_batches=batch_history_size):
+        self.manifest_dir = manifest_dir
+        self.max_finished_batches = max_finished_batches
+        self.batches = OrderedDict()
+
+    def manifest_path(self, batch_id):
+        return os.path.join(self.manifest_dir, f"{batch_id}.jsonl")
+
+    def submit(self, rows, parallel=batch_parallel, stage_limits=None, batch_id=None) -> Batch:
+        """
+        Starts a batch. Passing the id of an earlier batch resumes it from its manifest.
+
+        Raises:
+        ValueError: If a batch with the same id is still running.
+        """
+        if batch_id is not None and batch_id in self.batches and self.batches[batch_id].running:
+            raise ValueError(f"Batch {batch_id} is still running")
+
+        batch_id = batch_id or uuid.uuid4().hex
+        batch = Batch(rows, self.manifest_path(batch_id), parallel, stage_limits, batch_id)
+        batch.task = asyncio.create_task(batch.run())
+        self.batches.pop(batch_id, None)
+        self.batches[batch_id] = batch
+        self._evict_finished_batches()
+        return batch
+
+    def _evict_finished_batches(self):
+        finished = [batch_id for batch_id, batch in self.batches.items() if not batch.running]
+        for batch_id in finished[:max(0, len(finished) - self.max_finished_batches)]:
+            del self.batches[batch_id]
+
+    def get(self, batch_id) -> Batch:
+        return self.batches.get(batch_id)
+
+    async def stop(self):
+        tasks = [batch.task for batch in self.batches.values() if batch.task is not None and not batch.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+batch_manager = BatchManager()
+
+async def run_batch_file(input_path, manifest_path, parallel, stage_limits):
+    try:
+        return await Batch(read_batch_file(input_path), manifest_path, parallel, stage_limits).run()
+    finally:
+        await close_http_client()
+        shutdown_executor()
+        shutdown_pdf_process_pool()
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the decks of a JSONL or CSV file of RequestSchemaWithFiles rows.")
+    parser.add_argument("input", help="JSONL or CSV file with one request per row")
+    parser.add_argument("--manifest", help="JSONL results manifest, rows already completed in it are skipped (default: <input>.manifest.jsonl)")
+    parser.add_argument("--parallel", type=int, default=batch_parallel, help="Rows processed at the same time")
+    for stage, limit in default_stage_limits.items():
+        parser.add_argument(f"--{stage}-concurrency", type=int, default=limit, help=f"Concurrent {stage} steps, 0 for unlimited")
+    args = parser.parse_args()
+
+    stage_limits = {stage: getattr(args, f"{stage}_concurrency") for stage in default_stage_limits}
+    manifest_path = args.manifest or f"{os.path.splitext(args.input)[0]}.manifest.jsonl"
+
+    status = asyncio.run(run_batch_file(args.input, manifest_path, args.parallel, stage_limits))
+    counts = ", ".join(f"{count} {status_name.value}" for status_name, count in status.counts.items())
+    print(f"{status.total} rows: {counts}. Manifest: {manifest_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+from langchain_core.prompts import PromptTemplate
+from app.api.features.model_providers import model_provider
+from app.api.features.utils.model_governor import governor_registry
+from app.api.logger import setup_logger
+
+import glob
+import os
+import threading
+
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv())
+
+logger = setup_logger(__name__)
+
+FEATURES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class ChainRegistry:
+    """
+    Keeps parsed prompt templates, model clients and compiled chains for the life of the process.
+
+    Prompts are read from disk once and model clients are created once per model name,
+    so a request only looks chains up instead of rebuilding them. With `hot_reload`
+    enabled, a prompt file whose modification time changed is parsed again on its next
+    use and the chains built from it are recompiled.
+
+    Model clients are created by `provider` (Gemini, or cassette recording and replay,
+    see model_providers.py) and wrapped by the model governor, which owns rate limiting
+    and retries for every call.
+    """
+    def __init__(self, base_dir=FEATURES_DIR, hot_reload=False, provider=model_provider):
+        self.base_dir = base_dir
+        self.hot_reload = hot_reload
+        self.provider = provider
+        self.prompts = {}
+        self.models = {}
+        self.chains = {}
+        self.lock = threading.RLock()
+
+    def _absolute_path(self, prompt_file):
+        return os.path.join(self.base_dir, prompt_file)
+
+    def _read_prompt(self, prompt_file):
+        absolute_file_path = self._absolute_path(prompt_file)
+        mtime = os.path.getmtime(absolute_file_path)
+        with open(absolute_file_path, 'r') as file:
+            return mtime, file.read()
+
+    def get_prompt_text(self, prompt_file) -> str:
+        with self.lock:
+            entry = self.prompts.get(prompt_file)
+            if entry is not None and self.hot_reload:
+                if os.path.getmtime(self._absolute_path(prompt_file)) != entry[0]:
+                    logger.info(f"Reloading prompt {prompt_file}")
+                    entry = None
+            if entry is None:
+                entry = self._read_prompt(prompt_file)
+                self.prompts[prompt_file] = entry
+            return entry[1]
+
+    def get_prompt(self, prompt_file, partial_variables=None) -> PromptTemplate:
+        return PromptTemplate.from_template(self.get_prompt_text(prompt_file), partial_variables=partial_variables or {})
+
+    def _get_model(self, kind, model_name):
+        with self.lock:
+            if (kind, model_name) not in self.models:
+                logger.info(f"Creating {kind} model client for {model_name}")
+                self.models[(kind, model_name)] = governor_registry.govern(self.provider.create(kind, model_name), model_name)
+            return self.models[(kind, model_name)]
+
+    def get_model(self, model_name):
+        return self._get_model("llm", model_name)
+
+    def get_chat_model(self, model_name):
+        return self._get_model("chat", model_name)
+
+    def get_chain(self, prompt_file, model_name, parser=None, partial_variables=None):
+        """
+        Returns the compiled `prompt | model [| parser]` chain, building it on first use.
+
+        Parameters:
+        prompt_file (str): Path of the prompt file, relative to the features directory.
+        model_name (str): The name of the Gemini model.
+        parser (BaseOutputParser): Optional output parser appended to the chain.
+        partial_variables (dict): Optional partial variables of the prompt.
+
+        Returns:
+        Runnable: The compiled chain.
+        """
+        # The entry keeps its parser alive, so the parser's id cannot be reused while it is cached
+        key = (prompt_file, model_name, id(parser), tuple(sorted((partial_variables or {}).items())))
+        with self.lock:
+            prompt_text = self.get_prompt_text(prompt_file)
+            entry = self.chains.get(key)
+            if entry is not None and entry[0] is prompt_text and entry[1] is parser:
+                return entry[2]
+
+            logger.info(f"Compiling chain for {prompt_file} with {model_name}")
+            chain = self.get_prompt(prompt_file, partial_variables) | self.get_model(model_name)
+            if parser is not None:
+                chain = chain | parser
+
+            self.chains[key] = (prompt_text, parser, chain)
+            return chain
+
+    def load(self, model_names=(), chat_model_names=()):
+        """Parses every prompt file and creates the given model clients ahead of the first request."""
+        for absolute_file_path in glob.glob(os.path.join(self.base_dir, "prompts", "*.txt")):
+            self.get_prompt_text(os.path.relpath(absolute_file_path, self.base_dir))
+        for model_name in model_names:
+            self.get_model(model_name)
+        for model_name in chat_model_names:
+            self.get_chat_model(model_name)
+        logger.info(f"Chain registry loaded {len(self.prompts)} prompts and {len(self.models)} models")
+
+chain_registry = ChainRegistry(hot_reload=os.environ.get("PROMPT_HOT_RELOAD", "false").lower() == "true")
@@ -1,27 +1,29 @@
 from app.api.logger import setup_logger
 from app.api.features.utils.allowed_file_types import FileType
+from app.api.features.utils.executor import run_in_executor
+from app.api.features.utils.stage_limits import stage_slot
+from app.api.features.utils.http_client import get_http_client
+from app.api.features.utils.summary_cache import summary_cache
+from app.api.features.utils.download_cache import DownloadedFile, download_cache, remove_downloaded_file
+from app.api.features.summarization import summarize_text
+from app.api.features.chain_registry import chain_registry
 from app.api.features.errors.document_loader_errors import FileHandlerError, ImageHandlerError, VideoTranscriptError
-from langchain_community.document_loaders import YoutubeLoader
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_core.documents import Document
-from langchain_community.document_loaders.csv_loader import CSVLoader
-from langchain_community.document_loaders import TextLoader
-from langchain_community.document_loaders import UnstructuredURLLoader
-from langchain_community.document_loaders import UnstructuredPowerPointLoader
-from langchain_community.document_loaders import Docx2txtLoader
-from langchain_community.document_loaders import UnstructuredExcelLoader
-from langchain_community.document_loaders import UnstructuredXMLLoader
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.prompts import PromptTemplate
-from langchain_google_genai import GoogleGenerativeAI
+from app.api.features.utils.lazy_import import LazyImport
+from app.api.features.utils.metrics import observe_image_upload, observe_input_bytes, track_stage
+from app.api.features.utils.image_preprocessing import Image, image_hash_index, image_max_pixels, prepare_image
+from app.api.features.utils.pdf_extraction import PageSelection
+from app.api.features.utils.html_extraction import load_html_text
+from app.api.features.utils.youtube_transcripts import VideoInfo, Transcript, extract_video_id, transcript_cache, transcript_cache_key, transcript_source
 from langchain_core.messages import HumanMessage
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from contextlib import asynccontextmanager
 
 import os
+import base64
+import hashlib
 import tempfile
 import uuid
-import requests
-import gdown
+import threading
+import httpx
 
 from dotenv import load_dotenv, find_dotenv
 load_dotenv(find_dotenv())
@@ -30,378 +32,401 @@ logger = setup_logger(__name__)
 
 STRUCTURED_TABULAR_FILE_EXTENSIONS = {"csv", "xls", "xlsx", "gsheet", "xml"}
 
-splitter = RecursiveCharacterTextSplitter(
-    chunk_size = 1000,
-    chunk_overlap = 0
-)
+# File types summarized from a statistical profile of their rows instead of the rows themselves
+TABULAR_PROFILE_FILE_TYPES = {"csv", "xls", "xlsx", "gsheet"}
 
-def read_text_file(file_path):
-    # Get the directory containing the script file
-    script_dir = os.path.dirname(os.path.abspath(__file__))
+TABULAR_PROFILE_LOADER = "app.api.features.utils.tabular_profile:TabularProfileLoader"
 
-    # Combine the script directory with the relative file path
-    absolute_file_path = os.path.join(script_dir, file_path)
+# File types whose extraction can be limited to a page selection
+PAGED_FILE_TYPES = {"pdf", "gpdf"}
 
-    with open(absolute_file_path, 'r') as file:
-        return file.read()
-    
-def build_chain(prompt: str):
-    prompt_template = read_text_file(prompt)
-    summarize_prompt = PromptTemplate.from_template(prompt_template)
+PDF_LOADER = "app.api.features.utils.pdf_extraction:PdfPageLoader"
 
-    summarize_model = GoogleGenerativeAI(model="gemini-1.5-flash")
+SUMMARY_MODEL = "gemini-1.5-flash"
 
-    chain = summarize_prompt | summarize_model
-    return chain
+IMAGE_SUMMARY_PROMPT = "Give me a summary of what you see in the image. It must be a detailed paragraph."
 
-def get_summary(file_url: str, file_type: str):
-    file_type = file_type.lower()
-    try:
-        file_loader = file_loader_map[FileType(file_type)]
-        full_content = file_loader(file_url)
-        if file_type in STRUCTURED_TABULAR_FILE_EXTENSIONS:
-            prompt = "prompts/summarize-structured-tabular-data-prompt.txt"
-        else:
-            prompt = "prompts/summarize-text-prompt.txt"
+COMBINE_SUMMARIES_PROMPT = "prompts/combine-summaries-prompt.txt"
 
-        chain = build_chain(prompt)
-        return chain.invoke(full_content)
+# Web pages are read with the lightweight HTML extractor, unstructured only handles what it cannot
+url_fast_extraction = os.environ.get("URL_FAST_EXTRACTION", "true").lower() == "true"
 
-    except Exception as e:
-        raise FileHandlerError(f"Unsupported file type", file_url) from e
-    
-class FileHandler:
-    def __init__(self, file_loader, file_extension):
-        self.file_loader = file_loader
-        self.file_extension = file_extension
-
-    def load(self, url):
-        # Generate a unique filename with a UUID prefix
-        unique_filename = f"{uuid.uuid4()}.{self.file_extension}"
-
-        # Download the file from the URL and save it to a temporary file
-        response = requests.get(url)
-        response.raise_for_status()  # Ensure the request was successful
+# Longest YouTube video accepted, in seconds. Long transcripts are summarized with map-reduce
+youtube_max_video_seconds = int(os.environ.get("YOUTUBE_MAX_VIDEO_SECONDS", "600"))
 
-        with tempfile.NamedTemporaryFile(delete=False, prefix=unique_filename) as temp_file:
-            temp_file.write(response.content)
-            temp_file_path = temp_file.name
-
-        # Use the file_loader to load the documents
-        try:
-            loader = self.file_loader(file_path=temp_file_path)
-        except Exception as e:
-            raise FileHandlerError(f"No file found", temp_file_path) from e
+# Transcript time window kept together in a map-reduce chunk
+youtube_chunk_seconds = int(os.environ.get("YOUTUBE_CHUNK_SECONDS", "300"))
 
-        try:
-            documents = loader.load()
-        except Exception as e:
-            raise FileHandlerError(f"No file content available", temp_file_path) from e
-
-        # Remove the temporary file
-        os.remove(temp_file_path)
-
-        return documents
-    
-def load_pdf_documents(pdf_url: str):
-    pdf_loader = FileHandler(PyPDFLoader, "pdf")
-    docs = pdf_loader.load(pdf_url)
-
-    if docs:
-        split_docs = splitter.split_documents(docs)
-
-        full_content = [doc.page_content for doc in split_docs]
-        full_content = " ".join(full_content)
-
-        logger.info("Documents loaded successfully from the PDF file")
-
-        return full_content
-    
-def load_csv_documents(csv_url: str):
-    csv_loader = FileHandler(CSVLoader, "csv")
-    docs = csv_loader.load(csv_url)
-
-    if docs:
-
-        full_content = [doc.page_content for doc in docs]
-        full_content = " ".join(full_content)
-
-        logger.info("Documents loaded successfully from the CSV file")
-
-        return full_content
-    
-def load_txt_documents(notes_url: str):
-    notes_loader = FileHandler(TextLoader, "txt")
-    docs = notes_loader.load(notes_url)
-
-    if docs:
-
-        split_docs = splitter.split_documents(docs)
-
-        full_content = [doc.page_content for doc in split_docs]
-        full_content = " ".join(full_content)
-
-        logger.info("Documents loaded successfully from the TXT file")
-
-        return full_content
-
-def load_md_documents(notes_url: str):
-    notes_loader = FileHandler(TextLoader, "md")
-    docs = notes_loader.load(notes_url)
-
-    if docs:
-
-        split_docs = splitter.split_documents(docs)
-
-        full_content = [doc.page_content for doc in split_docs]
-        full_content = " ".join(full_content)
-
-        logger.info("Documents loaded successfully from the MD file")
-
-        return full_content
-    
-def load_url_documents(url: str):
-    url_loader = UnstructuredURLLoader(urls=[url])
-    docs = url_loader.load()
-
-    if docs:
-        split_docs = splitter.split_documents(docs)
-
-        full_content = [doc.page_content for doc in split_docs]
-        full_content = " ".join(full_content)
-
-        logger.info("Documents loaded successfully from the URL")
-
-        return full_content
-    
-def load_pptx_documents(pptx_url: str):
-    pptx_handler = FileHandler(UnstructuredPowerPointLoader, 'pptx')
-
-    docs = pptx_handler.load(pptx_url)
-    if docs:
+# Largest image downloaded for a summary, in bytes
+image_max_bytes = int(os.environ.get("IMAGE_MAX_BYTES", str(20 * 1024 * 1024)))
 
-        split_docs = splitter.split_documents(docs)
+# Document loader backends are imported on first use to keep cold starts short
+UnstructuredURLLoader = LazyImport("langchain_community.document_loaders.url:UnstructuredURLLoader")
+gdown = LazyImport("gdown")
 
-        full_content = [doc.page_content for doc in split_docs]
-        full_content = " ".join(full_content)
-
-        logger.info("Documents loaded successfully from the PPTX file")
-
-        return full_content
-    
-def load_docx_documents(docx_url: str):
-    docx_handler = FileHandler(Docx2txtLoader, 'docx')
-    docs = docx_handler.load(docx_url)
-    if docs:
-
-        split_docs = splitter.split_documents(docs)
+def read_text_file(file_path):
+    # Prompts are parsed once and kept by the chain registry
+    return chain_registry.get_prompt_text(file_path)
 
-        full_content = [doc.page_content for doc in split_docs]
-        full_content = " ".join(full_content)
+def build_chain(prompt: str):
+    return chain_registry.get_chain(prompt, SUMMARY_MODEL)
 
-        logger.info("Documents loaded successfully from the DOCX file")
+async def summarize_content(prompt: str, full_content: str, sections=None):
+    async with stage_slot("summarize"):
+        with track_stage("summarize", SUMMARY_MODEL):
+            return await summarize_text(build_chain(prompt), full_content, build_chain(COMBINE_SUMMARIES_PROMPT), sections)
 
-        return full_content
-    
-def load_xls_documents(xls_url: str):
-    xls_handler = FileHandler(UnstructuredExcelLoader, 'xls')
-    docs = xls_handler.load(xls_url)
-    if docs:
+async def get_summary(file_url: str, file_type: str, on_stage=None, use_cache=True, page_selection: PageSelection = None):
+    file_type = file_type.lower()
+    try:
+        loader_kwargs = {}
+        if file_type in PAGED_FILE_TYPES and page_selection is not None:
+            loader_kwargs["page_selection"] = page_selection
 
-        split_docs = splitter.split_documents(docs)
+        if file_type in TABULAR_PROFILE_FILE_TYPES:
+            prompt = "prompts/summarize-tabular-profile-prompt.txt"
+        elif file_type in STRUCTURED_TABULAR_FILE_EXTENSIONS:
+            prompt = "prompts/summarize-structured-tabular-data-prompt.txt"
+        else:
+            prompt = "prompts/summarize-text-prompt.txt"
 
-        full_content = [doc.page_content for doc in split_docs]
-        full_content = " ".join(full_content)
+        cache_key = None
 
-        logger.info("Documents loaded successfully from the XLS file")
+        if FileType(file_type) == FileType.URL:
+            async with stage_slot("download"):
+                with track_stage("download"):
+                    full_content = await load_url_documents(file_url)
+            observe_input_bytes(len((full_content or "").encode("utf-8")))
+        else:
+            file_handler = file_loader_registry.get(FileType(file_type))
+            async with file_handler.downloaded(file_url) as downloaded_file:
+                observe_input_bytes(os.path.getsize(downloaded_file.path))
 
-        return full_content
-    
-def load_xlsx_documents(xlsx_url: str):
-    xlsx_handler = FileHandler(UnstructuredExcelLoader, 'xlsx')
-    docs = xlsx_handler.load(xlsx_url)
-    if docs:
+                content_hash = downloaded_file.sha256
+                if loader_kwargs:
+                    # A summary of some pages must not be served for the whole document
+                    content_hash = f"{content_hash}:{page_selection.cache_tag()}"
+                cache_key = summary_cache.make_key(content_hash, read_text_file(prompt), SUMMARY_MODEL)
+                if use_cache:
+                    summary = await summary_cache.aget(cache_key)
+                    if summary is not None:
+                        logger.info(f"Summary cache hit for {file_url}")
+                        return summary
 
-        split_docs = splitter.split_documents(docs)
+                with track_stage("parse"):
+                    full_content = await file_handler.load(downloaded_file, **loader_kwargs)
 
-        full_content = [doc.page_content for doc in split_docs]
-        full_content = " ".join(full_content)
+        if on_stage is not None:
+            on_stage("summarizing")
 
-        logger.info("Documents loaded successfully from the XLSX file")
+        summary = await summarize_content(prompt, full_content)
 
-        return full_content
-    
-def load_xml_documents(xml_url: str):
-    xml_handler = FileHandler(UnstructuredXMLLoader, 'xml')
-    docs = xml_handler.load(xml_url)
-    if docs:
+        if cache_key is not None:
+            await summary_cache.aset(cache_key, summary)
 
-        split_docs = splitter.split_documents(docs)
+        return summary
 
-        full_content = [doc.page_content for doc in split_docs]
-        full_content = " ".join(full_content)
+    except Exception as e:
+        raise FileHandlerError(f"Unsupported file type", file_url) from e
 
-        logger.info("Documents loaded successfully from the SML file")
+def hash_file(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-        return full_content
-    
-class FileHandlerForGoogleDrive:
-    def __init__(self, file_loader, file_extension='docx'):
-        self.file_loader = file_loader
+class FileHandler:
+    """
+    Downloads a file and turns it into a single string with a LangChain document loader.
+
+    Downloading is awaited on the event loop, while parsing runs on the
+    bounded pipeline executor because the loaders are blocking. The loader class is
+    given as an import path and only imported the first time a file is parsed.
+    Files are used within `downloaded`, which releases them once the block exits.
+    """
+    def __init__(self, file_loader, file_extension, source_name=None):
+        self.file_loader = LazyImport(file_loader)
         self.file_extension = file_extension
-
-    def load(self, url):
-
-        unique_filename = f"{uuid.uuid4()}.{self.file_extension}"
-
+        self.source_name = source_name or f"{file_extension.upper()} file"
+
+    async def download(self, url):
+        # Stream the file to disk, reusing the cached copy if the server says it is unchanged
+        return await download_cache.fetch(url, self.file_extension)
+
+    @asynccontextmanager
+    async def downloaded(self, url):
+        """Downloads a file for the duration of the block, then releases it."""
+        async with stage_slot("download"):
+            with track_stage("download"):
+                downloaded_file = await self.download(url)
         try:
-            gdown.download(url=url, output=unique_filename, fuzzy=True)
-        except Exception as e:
-            raise FileHandlerError(f"No file content available") from e
+            yield downloaded_file
+        finally:
+            # Removes the temporary file, or unpins the cached one
+            remove_downloaded_file(downloaded_file)
 
+    def parse(self, file_path, **loader_kwargs):
+        # Use the file_loader to load the documents
         try:
-            loader = self.file_loader(file_path=unique_filename)
+            loader = self.file_loader.resolve()(file_path=file_path, **loader_kwargs)
         except Exception as e:
-            raise FileHandlerError(f"No file found", unique_filename) from e
+            raise FileHandlerError(f"No file found", file_path) from e
 
         try:
             documents = loader.load()
         except Exception as e:
-            raise FileHandlerError(f"No file content available") from e
-
-        os.remove(unique_filename)
-
-        return documents
-    
-def load_gdocs_documents(drive_folder_url: str):
-
-    gdocs_loader = FileHandlerForGoogleDrive(Docx2txtLoader)
+            raise FileHandlerError(f"No file content available", file_path) from e
 
-    docs = gdocs_loader.load(drive_folder_url)
+        if not documents:
+            return None
 
-    if docs:
-
-        split_docs = splitter.split_documents(docs)
-
-        full_content = [doc.page_content for doc in split_docs]
+        full_content = [doc.page_content for doc in documents]
         full_content = " ".join(full_content)
 
-        logger.info("Documents loaded successfully from the Google Docs file")
+        logger.info(f"Documents loaded successfully from the {self.source_name}")
 
         return full_content
-    
-def load_gsheets_documents(drive_folder_url: str):
-    gsheets_loader = FileHandlerForGoogleDrive(UnstructuredExcelLoader, 'xlsx')
-    docs = gsheets_loader.load(drive_folder_url)
-    if docs:
 
-        split_docs = splitter.split_documents(docs)
+    async def load(self, downloaded_file: DownloadedFile, **loader_kwargs):
+        # The file is released by `downloaded`, which acquired it
+        return await run_in_executor(self.parse, downloaded_file.path, **loader_kwargs)
 
-        full_content = [doc.page_content for doc in split_docs]
-        full_content = " ".join(full_content)
+def download_from_google_drive(url, output):
+    return gdown.resolve().download(url=url, output=output, fuzzy=True)
 
-        logger.info("Documents loaded successfully from the Google Sheets file")
+class FileHandlerForGoogleDrive(FileHandler):
+    def __init__(self, file_loader, file_extension='docx', source_name=None):
+        super().__init__(file_loader, file_extension, source_name)
 
-        return full_content
-    
-def load_gslides_documents(drive_folder_url: str):
-    gslides_loader = FileHandlerForGoogleDrive(UnstructuredPowerPointLoader, 'pptx')
-    docs = gslides_loader.load(drive_folder_url)
-    if docs:
+    async def download(self, url):
 
-        split_docs = splitter.split_documents(docs)
+        unique_filename = os.path.join(tempfile.gettempdir(), f"{uuid.uuid4()}.{self.file_extension}")
 
-        full_content = [doc.page_content for doc in split_docs]
-        full_content = " ".join(full_content)
+        try:
+            await run_in_executor(download_from_google_drive, url, unique_filename)
+        except Exception as e:
+            raise FileHandlerError(f"No file content available", url) from e
 
-        logger.info("Documents loaded successfully from the Google Slides file")
+        if not os.path.exists(unique_filename):
+            raise FileHandlerError(f"No file found", url)
 
-        return full_content
-    
-def load_gpdf_documents(drive_folder_url: str):
+        return DownloadedFile(unique_filename, await run_in_executor(hash_file, unique_filename))
 
-    gpdf_loader = FileHandlerForGoogleDrive(PyPDFLoader,'pdf')
+def load_url_content(url: str):
+    url_loader = UnstructuredURLLoader.resolve()(urls=[url])
+    docs = url_loader.load()
 
-    docs = gpdf_loader.load(drive_folder_url)
     if docs:
-
         full_content = [doc.page_content for doc in docs]
         full_content = " ".join(full_content)
 
-        logger.info("Documents loaded successfully from the Google PDF file")
+        logger.info("Documents loaded successfully from the URL")
 
         return full_content
-    
-def summarize_transcript_youtube_url(youtube_url: str, max_video_length=600) -> str:
+
+async def load_url_documents(url: str):
+    if url_fast_extraction:
+        full_content = await load_html_text(url)
+        if full_content is not None:
+            logger.info("Documents loaded successfully from the URL")
+            return full_content
+        logger.info(f"Falling back to unstructured for {url}")
+    return await run_in_executor(load_url_content, url)
+
+def check_video_length(video_info: VideoInfo, youtube_url, max_video_length):
+    if video_info.length > max_video_length:
+        raise VideoTranscriptError(f"Video is {video_info.length} seconds long, please provide a video less than {max_video_length} seconds long", youtube_url)
+
+async def load_youtube_transcript(youtube_url: str, language: str, max_video_length: int):
+    """
+    Returns the metadata and the transcript of a video, from the transcript cache when possible.
+
+    The metadata is fetched first, so a video over `max_video_length` seconds is rejected
+    before its transcript is downloaded.
+    """
+    try:
+        video_id = extract_video_id(youtube_url)
+    except ValueError as e:
+        raise VideoTranscriptError(f"Invalid YouTube URL", youtube_url) from e
+
+    cache_key = transcript_cache_key(video_id, language)
+    entry = await transcript_cache.aget(cache_key)
+    if entry is not None:
+        video_info = VideoInfo(**entry["video_info"])
+        check_video_length(video_info, youtube_url, max_video_length)
+        logger.info(f"Transcript cache hit for {youtube_url}")
+        return video_info, Transcript(**entry["transcript"])
+
     try:
-        loader = YoutubeLoader.from_youtube_url(youtube_url, add_video_info=True)
+        video_info = await run_in_executor(transcript_source.video_info, video_id)
     except Exception as e:
-        raise e
+        raise VideoTranscriptError(f"Unable to load the video information", youtube_url) from e
+    check_video_length(video_info, youtube_url, max_video_length)
 
     try:
-        docs = loader.load()
-        length = docs[0].metadata["length"]
-        title = docs[0].metadata["title"]
+        transcript = await run_in_executor(transcript_source.transcript, video_id, language)
     except Exception as e:
-        raise e
+        raise VideoTranscriptError(f"No transcript available for this video", youtube_url) from e
 
-    split_docs = splitter.split_documents(docs)
+    await transcript_cache.aset(cache_key, {"video_info": video_info._asdict(), "transcript": transcript._asdict()})
+    return video_info, transcript
 
-    full_transcript = [doc.page_content for doc in split_docs]
-    full_transcript = " ".join(full_transcript)
+async def summarize_transcript_youtube_url(youtube_url: str, max_video_length=None, on_stage=None, use_cache=True, language="en") -> str:
+    max_video_length = youtube_max_video_seconds if max_video_length is None else max_video_length
 
-    if length > max_video_length:
-        raise VideoTranscriptError(f"Video is {length} seconds long, please provide a video less than {max_video_length} seconds long", youtube_url)
+    async with stage_slot("download"):
+        with track_stage("download"):
+            video_info, transcript = await load_youtube_transcript(youtube_url, language.lower(), max_video_length)
+    full_transcript = transcript.text()
+    observe_input_bytes(len(full_transcript.encode("utf-8")))
 
-    logger.info(f"Found video with title: {title} and length: {length}")
+    logger.info(f"Found video with title: {video_info.title} and length: {video_info.length}")
     logger.info(f"Combined documents into a single string.")
-    logger.info(f"Beginning to process transcript...")
 
     prompt_template = read_text_file("prompts/summarize-youtube-video-prompt.txt")
-    summarize_prompt = PromptTemplate.from_template(prompt_template)
 
-    summarize_model = GoogleGenerativeAI(model="gemini-1.5-flash")
+    transcript_hash = hashlib.sha256(full_transcript.encode("utf-8")).hexdigest()
+    cache_key = summary_cache.make_key(transcript_hash, prompt_template, SUMMARY_MODEL)
+    if use_cache:
+        summary = await summary_cache.aget(cache_key)
+        if summary is not None:
+            logger.info(f"Summary cache hit for {youtube_url}")
+            return summary
+
+    logger.info(f"Beginning to process transcript...")
 
-    chain = summarize_prompt | summarize_model
+    if on_stage is not None:
+        on_stage("summarizing")
 
     logger.info("Documents loaded successfully from the Youtube Video")
 
-    return chain.invoke(full_transcript)
-
-file_loader_map = {
-    FileType.PDF: load_pdf_documents,
-    FileType.CSV: load_csv_documents,
-    FileType.TXT: load_txt_documents,
-    FileType.MD: load_md_documents,
-    FileType.URL: load_url_documents,
-    FileType.PPTX: load_pptx_documents,
-    FileType.DOCX: load_docx_documents,
-    FileType.XLS: load_xls_documents,
-    FileType.XLSX: load_xlsx_documents,
-    FileType.XML: load_xml_documents,
-    FileType.GDOC: load_gdocs_documents,
-    FileType.GSHEET: load_gsheets_documents,
-    FileType.GSLIDE: load_gslides_documents,
-    FileType.GPDF: load_gpdf_documents
-}
-
-llm_for_img = ChatGoogleGenerativeAI(model="gemini-1.5-flash")
-
-def generate_summary_from_img(img_url):
+    # Long transcripts are mapped in whole time windows, so no chunk starts mid-sentence without its timestamp
+    summary = await summarize_content("prompts/summarize-youtube-video-prompt.txt", full_transcript, transcript.chunks(youtube_chunk_seconds))
+    await summary_cache.aset(cache_key, summary)
+
+    return summary
+
+class LoaderRegistry:
+    """
+    Maps each file type to its FileHandler without importing any loader backend.
+
+    Backends are imported when a file of that type is first parsed, or ahead of
+    time for the types passed to `prewarm`.
+    """
+    def __init__(self, handlers):
+        self.handlers = handlers
+
+    def get(self, file_type: FileType):
+        return self.handlers[file_type]
+
+    def prewarm(self, file_types):
+        for file_type in file_types:
+            try:
+                file_handler = self.get(FileType(file_type))
+                file_handler.file_loader.resolve()
+                logger.info(f"Prewarmed the {file_handler.source_name} loader")
+            except Exception as e:
+                logger.error(f"Unable to prewarm the loader for {file_type}: {e}")
+
+    def prewarm_in_background(self, file_types):
+        thread = threading.Thread(target=self.prewarm, args=(list(file_types),), name="loader-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+file_loader_registry = LoaderRegistry({
+    FileType.PDF: FileHandler(PDF_LOADER, "pdf"),
+    FileType.CSV: FileHandler(TABULAR_PROFILE_LOADER, "csv"),
+    FileType.TXT: FileHandler("langchain_community.document_loaders.text:TextLoader", "txt"),
+    FileType.MD: FileHandler("langchain_community.document_loaders.text:TextLoader", "md"),
+    FileType.PPTX: FileHandler("langchain_community.document_loaders.powerpoint:UnstructuredPowerPointLoader", "pptx"),
+    FileType.DOCX: FileHandler("langchain_community.document_loaders.word_document:Docx2txtLoader", "docx"),
+    FileType.XLS: FileHandler(TABULAR_PROFILE_LOADER, "xls"),
+    FileType.XLSX: FileHandler(TABULAR_PROFILE_LOADER, "xlsx"),
+    FileType.XML: FileHandler("langchain_community.document_loaders.xml:UnstructuredXMLLoader", "xml"),
+    FileType.GDOC: FileHandlerForGoogleDrive("langchain_community.document_loaders.word_document:Docx2txtLoader", "docx", source_name="Google Docs file"),
+    FileType.GSHEET: FileHandlerForGoogleDrive(TABULAR_PROFILE_LOADER, "xlsx", source_name="Google Sheets file"),
+    FileType.GSLIDE: FileHandlerForGoogleDrive("langchain_community.document_loaders.powerpoint:UnstructuredPowerPointLoader", "pptx", source_name="Google Slides file"),
+    FileType.GPDF: FileHandlerForGoogleDrive(PDF_LOADER, "pdf", source_name="Google PDF file")
+})
+
+def llm_for_img():
+    return chain_registry.get_chat_model(SUMMARY_MODEL)
+
+async def download_image(img_url):
+    # Images are kept in memory, so the download is aborted as soon as it goes over the limit
+    image_bytes = bytearray()
+    try:
+        async with get_http_client().stream("GET", img_url) as response:
+            response.raise_for_status()
+
+            content_length = response.headers.get("content-length")
+            if content_length is not None and int(content_length) > image_max_bytes:
+                raise ImageHandlerError(f"Image is larger than the {image_max_bytes} bytes limit", img_url)
+
+            async for chunk in response.aiter_bytes():
+                image_bytes += chunk
+                if len(image_bytes) > image_max_bytes:
+                    raise ImageHandlerError(f"Image is larger than the {image_max_bytes} bytes limit", img_url)
+    except httpx.HTTPError as e:
+        raise ImageHandlerError(f"Unable to download the image", img_url) from e
+
+    mime_type = response.headers.get("content-type", "image/jpeg").split(";")[0]
+    return bytes(image_bytes), mime_type
+
+async def generate_summary_from_img(img_url, use_cache=True):
+    # The image is downloaded once here and sent inline, so its bytes can key the cache
+    async with stage_slot("download"):
+        with track_stage("download"):
+            image_bytes, mime_type = await download_image(img_url)
+    observe_input_bytes(len(image_bytes))
+
+    cache_key = summary_cache.make_key(hashlib.sha256(image_bytes).hexdigest(), IMAGE_SUMMARY_PROMPT, SUMMARY_MODEL)
+    if use_cache:
+        summary = await summary_cache.aget(cache_key)
+        if summary is not None:
+            logger.info(f"Summary cache hit for {img_url}")
+            return summary
+
+    try:
+        with track_stage("parse"):
+            image = await run_in_executor(prepare_image, image_bytes, mime_type)
+    except Image.resolve().DecompressionBombError as e:
+        raise ImageHandlerError(f"Image is larger than the {image_max_pixels} pixels limit", img_url) from e
+    except Exception as e:
+        raise ImageHandlerError(f"Unable to read the image", img_url) from e
+
+    if use_cache:
+        # Near-duplicates, e.g. the same photo resized or re-encoded, reuse the summary of the first one
+        duplicate_key = await run_in_executor(image_hash_index.find, image)
+        summary = await summary_cache.aget(duplicate_key) if duplicate_key is not None else None
+        if summary is not None:
+            logger.info(f"Summary of a near-duplicate image reused for {img_url}")
+            return summary
+
+    logger.info(f"Sending a {image.width}x{image.height} image of {len(image.data)} bytes, downloaded as {len(image_bytes)} bytes")
+    observe_image_upload(len(image.data))
+    image_data_url = f"data:{image.mime_type};base64,{base64.b64encode(image.data).decode('ascii')}"
+
     message = HumanMessage(
     content=[
             {
                 "type": "text",
-                "text": "Give me a summary of what you see in the image. It must be a detailed paragraph.",
+                "text": IMAGE_SUMMARY_PROMPT,
             },
-            {"type": "image_url", "image_url": img_url},
+            {"type": "image_url", "image_url": image_data_url},
         ]
     )
 
     try:
-        response = llm_for_img.invoke([message]).content
-        print(f"Generated summary: {response}")
+        async with stage_slot("summarize"):
+            with track_stage("summarize", SUMMARY_MODEL):
+                response = (await llm_for_img().ainvoke([message])).content
+        logger.info(f"Generated summary: {response}")
     except Exception as e:
         raise ImageHandlerError(f"Error processing the request", img_url) from e
 
-    return response
\ No newline at end of file
+    await summary_cache.aset(cache_key, response)
+    await run_in_executor(image_hash_index.add, image, cache_key)
+
+    return response
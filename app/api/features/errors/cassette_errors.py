@@ -0,0 +1,10 @@
+class CassetteMissError(Exception):
+    """Raised in replay mode when no cassette was recorded for a model call."""
+    def __init__(self, message, model_name=None, key=None):
+        self.message = message
+        self.model_name = model_name
+        self.key = key
+        super().__init__(self.message)
+
+    def __str__(self):
+        return f"{self.message} (model: {self.model_name}, key: {self.key})"
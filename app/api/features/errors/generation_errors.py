@@ -0,0 +1,9 @@
+class SlideGenerationError(Exception):
+    """Raised when a slide cannot be generated after all its retries. Used for the outline generation mode."""
+    def __init__(self, message, slide_number=None):
+        self.message = message
+        self.slide_number = slide_number
+        super().__init__(self.message)
+
+    def __str__(self):
+        return f"{self.message}"
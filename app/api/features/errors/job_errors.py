@@ -0,0 +1,8 @@
+class JobQueueFullError(Exception):
+    """Raised when a job cannot be queued because the job queue is full or not running."""
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
+
+    def __str__(self):
+        return f"{self.message}"
@@ -1,23 +1,111 @@
 import json
 from app.api.features.document_loaders import generate_summary_from_img, get_summary, summarize_transcript_youtube_url
-from app.api.features.schemas.schemas import RequestSchema, SlidePresentationRequestArgs
+from app.api.features.schemas.schemas import GenerationMode, RequestSchema, RequestSchemaWithFiles, SlidePresentationRequestArgs
 from app.api.logger import setup_logger
-from app.api.features.compile_chain_for_ppt import compile_chain
+from app.api.features.chain_registry import chain_registry
+from app.api.features.compile_chain_for_ppt import PPT_MODEL, PPT_PROMPT, compile_chain, format_instructions
+from app.api.features.parallel_ppt_generation import OUTLINE_PROMPT, SLIDE_PROMPT, generate_ppt_content_from_outline
 from app.api.features.generate_ppt import create_pptx_file, return_images
+from app.api.features.utils.artifact_store import Artifact
+from app.api.features.utils.executor import run_in_executor
+from app.api.features.utils.metrics import observe_summary, set_file_type, track_stage
+from app.api.features.utils.response_cache import ppt_response_cache
+from app.api.features.utils.stage_limits import stage_slot
+from typing import NamedTuple
 
 logger = setup_logger(__name__)
 
-def full_workflow(topic, objective, target_audience, n_slides, slide_breakdown, lang, file_url, file_type):
-  
+class WorkflowResult(NamedTuple):
+    summary: str
+    ppt_content: dict
+    deck: Artifact
+
+def report_stage(on_stage, stage):
+    if on_stage is not None:
+        on_stage(stage)
+
+async def summarize_file(file_url, file_type, on_stage=None, use_cache=True, page_selection=None, language="en"):
+
     logger.info(f"File type uploaded successfully: {file_type}")
     logger.info("Generating the summary from the documents")
 
+    report_stage(on_stage, "downloading")
+
     if file_type == 'img':
-        summary = generate_summary_from_img(file_url)
+        report_stage(on_stage, "summarizing")
+        summary = await generate_summary_from_img(file_url, use_cache=use_cache)
     elif file_type == 'youtube_url':
-        summary = summarize_transcript_youtube_url(file_url)
+        summary = await summarize_transcript_youtube_url(file_url, on_stage=on_stage, use_cache=use_cache, language=language)
+    else:
+        summary = await get_summary(file_url, file_type, on_stage=on_stage, use_cache=use_cache, page_selection=page_selection)
+
+    observe_summary(summary)
+    return summary
+
+def ppt_cache_key(chain_input: dict, generation_mode=GenerationMode.SINGLE) -> str:
+    """Keys the generated PPT content on the request, the prompts of the generation mode and the model."""
+    if generation_mode == GenerationMode.OUTLINE:
+        prompt = chain_registry.get_prompt_text(OUTLINE_PROMPT) + chain_registry.get_prompt_text(SLIDE_PROMPT)
     else:
-        summary = get_summary(file_url, file_type)
+        prompt = chain_registry.get_prompt_text(PPT_PROMPT) + format_instructions
+    return ppt_response_cache.make_key(dict(chain_input, generation_mode=GenerationMode(generation_mode).value), prompt, PPT_MODEL)
+
+async def generate_ppt_content(request_args: RequestSchema, summary, on_stage=None, generation_mode=GenerationMode.SINGLE, use_cache=True):
+    report_stage(on_stage, "generating")
+
+    presentation = SlidePresentationRequestArgs(slide_schema=request_args)
+    presentation.summary = summary
+
+    logger.info(f"Summary generated successfully: {presentation.summary}")
+
+    chain_input = presentation.validate_and_return()
+    cache_key = ppt_cache_key(chain_input, generation_mode)
+    if use_cache:
+        ppt_content = await ppt_response_cache.aget(cache_key)
+        if ppt_content is not None:
+            logger.info("PPT content served from the response cache")
+            return ppt_content
+
+    logger.info("Generating the content for the PPT file")
+
+    async with stage_slot("generate"):
+        with track_stage("generate", PPT_MODEL):
+            if generation_mode == GenerationMode.OUTLINE:
+                ppt_content = await generate_ppt_content_from_outline(chain_input)
+            else:
+                chain = compile_chain()
+                ppt_content = await chain.ainvoke(chain_input)
+    logger.info("PPT content generated successfully")
+
+    await ppt_response_cache.aset(cache_key, ppt_content)
+
+    return ppt_content
+
+async def render_ppt(ppt_content, on_stage=None, slide_images=None):
+    report_stage(on_stage, "rendering")
+    async with stage_slot("render"):
+        with track_stage("render"):
+            return await run_in_executor(create_pptx_file, ppt_content, return_images(slide_images))
+
+async def run_full_workflow(data: RequestSchemaWithFiles, on_stage=None):
+    """
+    Runs every stage of the deck generation for a request.
+
+    Parameters:
+    data (RequestSchemaWithFiles): The presentation arguments and the source file.
+    on_stage (callable): Optional callback receiving the name of each stage as it starts.
+
+    Returns:
+    WorkflowResult: The summary, the generated PPT content and the stored PPTX file.
+    """
+    set_file_type(data.file_type)
+    with track_stage("workflow"):
+        summary = await summarize_file(data.file_url, data.file_type, on_stage, data.use_summary_cache, data.page_selection(), data.request_args.lang)
+        ppt_content = await generate_ppt_content(data.request_args, summary, on_stage, data.generation_mode, data.use_response_cache)
+        deck = await render_ppt(ppt_content, on_stage, data.slide_images)
+    return WorkflowResult(summary, ppt_content, deck)
+
+async def full_workflow(topic, objective, target_audience, n_slides, slide_breakdown, lang, file_url, file_type):
 
     schema = RequestSchema(
         topic=topic,
@@ -25,19 +113,10 @@ def full_workflow(topic, objective, target_audience, n_slides, slide_breakdown,
         target_audience=target_audience,
         n_slides=n_slides,
         slide_breakdown=slide_breakdown,
-        lang=lang,
-        summary=summary
+        lang=lang
     )
 
-    presentation = SlidePresentationRequestArgs(slide_schema=schema)
-
-    logger.info(f"Summary generated successfully: {presentation.summary}")
-    
-    chain = compile_chain()
-    
-    logger.info("Generating the content for the PPT file")
-    ppt_content = chain.invoke(presentation.validate_and_return())
-    logger.info("PPT content generated successfully")
+    data = RequestSchemaWithFiles(request_args=schema, file_url=file_url, file_type=file_type)
 
-    create_pptx_file(ppt_content, return_images())
-    return summary, json.dumps(ppt_content, indent=4)
\ No newline at end of file
+    result = await run_full_workflow(data)
+    return result.summary, json.dumps(result.ppt_content, indent=4)
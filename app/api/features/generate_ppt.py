@@ -1,47 +1,99 @@
 from pptx import Presentation
-from pptx.util import Inches
+from app.api.features.utils.artifact_store import Artifact, artifact_store
+from app.api.features.utils.image_assets import add_picture, image_asset_store
 from app.api.logger import setup_logger
+from io import BytesIO
+import hashlib
 import os
+import threading
 
 logger = setup_logger(__name__)
 
-def return_images():
-    images = [
-        [
-            {
-                'path': f'{os.getcwd()}/app/api/features/images/Python-Symbol.png',
-                'left': 5,
-                'top': 4,
-                'width': 2.5,
-                'height': 2
-            }
-        ],
-        [
-            {
-                'path': f'{os.getcwd()}/app/api/features/images/code.jpg',
-                'left': 5,
-                'top': 4,
-                'width': 2.5,
-                'height': 2
-            },
-        ]
-    ]
+# Placement of the pictures on a content slide, in inches
+IMAGE_BOX = {'left': 5, 'top': 4, 'width': 2.5, 'height': 2}
+
+# Pictures of the first content slides when the request does not choose them
+DEFAULT_SLIDE_IMAGES = [['Python-Symbol.png'], ['code.jpg']]
+
+def return_images(slide_images=None):
+    """
+    Returns the pictures of each content slide, as asset names with their placement.
+
+    Parameters:
+    slide_images (dict): Optional asset names by slide number (starting at 1). A listed
+    slide gets exactly these pictures, side by side in the picture box, and an empty
+    list leaves it without pictures. The other slides keep the default pictures.
+
+    Returns:
+    list: For each content slide, the list of pictures to add to it.
+    """
+    selection = dict(enumerate(DEFAULT_SLIDE_IMAGES, start=1))
+    selection.update(slide_images or {})
+
+    images = [[] for _ in range(max(selection, default=0))]
+    for slide_number, names in selection.items():
+        width = IMAGE_BOX['width'] / max(len(names), 1)
+        for position, name in enumerate(names):
+            images[slide_number - 1].append({
+                'asset': name,
+                'left': IMAGE_BOX['left'] + position * width,
+                'top': IMAGE_BOX['top'],
+                'width': width,
+                'height': IMAGE_BOX['height']
+            })
 
     return images
 
+def image_boxes(slide_images=None):
+    """Returns the distinct (width, height) boxes the pictures are resized to."""
+    return sorted({(image['width'], image['height']) for slide in return_images(slide_images) for image in slide})
+
+FEATURES_DIR = os.path.dirname(os.path.abspath(__file__))
+
 # Load the template presentation
-template_path = f'{os.getcwd()}/app/api/features/templates/template1.pptx'
+template_path = os.environ.get("PPTX_TEMPLATE_PATH", os.path.join(FEATURES_DIR, "templates", "template1.pptx"))
+
+PPTX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+_template_bytes = None
+_template_digest = None
+_template_lock = threading.Lock()
+
+def get_template_bytes():
+    """
+    Returns the template with all of its slides removed, serialized once and kept in memory.
 
-def create_pptx_file(result, images):
-    prs = Presentation(template_path)
+    Every deck starts from these bytes instead of reopening the template from disk and
+    deleting its slides again.
+    """
+    global _template_bytes, _template_digest
+    if _template_bytes is None:
+        with _template_lock:
+            if _template_bytes is None:
+                # Hashed before stripping, as the saved bytes differ between runs
+                with open(template_path, 'rb') as file:
+                    _template_digest = hashlib.sha256(file.read()).hexdigest()
+                prs = Presentation(template_path)
 
-    # Remove all existing slides
-    for i in range(len(prs.slides) - 1, -1, -1):
-        rId = prs.slides._sldIdLst[i].rId
-        prs.part.drop_rel(rId)
-        del prs.slides._sldIdLst[i]
+                # Remove all existing slides
+                for i in range(len(prs.slides) - 1, -1, -1):
+                    rId = prs.slides._sldIdLst[i].rId
+                    prs.part.drop_rel(rId)
+                    del prs.slides._sldIdLst[i]
 
-    file_title = result['title'].replace(" ", "_")
+                template_file = BytesIO()
+                prs.save(template_file)
+                _template_bytes = template_file.getvalue()
+                logger.info(f"Cached the stripped template ({len(_template_bytes)} bytes)")
+    return _template_bytes
+
+def get_template_digest():
+    get_template_bytes()
+    return _template_digest
+
+def render_pptx(result, images) -> bytes:
+    prs = Presentation(BytesIO(get_template_bytes()))
+    image_parts = {}
 
     # Add a title slide
     slide_layout = prs.slide_layouts[0]  # Assuming the first layout is the title slide layout
@@ -64,14 +116,34 @@ def create_pptx_file(result, images):
         # Add images to the slide if any
         if slide_index < len(images):
             for image in images[slide_index]:
-                left = Inches(image['left'])
-                top = Inches(image['top'])
-                width = Inches(image['width'])
-                height = Inches(image['height'])
-                slide.shapes.add_picture(image['path'], left, top, width=width, height=height)
+                asset = image_asset_store.get(image['asset'], (image['width'], image['height']))
+                add_picture(slide, asset, image['left'], image['top'], image['width'], image['height'], image_parts)
 
-    # Save the presentation
-    logger.info("Creating new PPT file")
-    pptx_file = f"{os.getcwd()}/app/api/features/results/{file_title}.pptx"
+    pptx_file = BytesIO()
     prs.save(pptx_file)
-    logger.info("The PPTX file is saved successfully")
\ No newline at end of file
+    return pptx_file.getvalue()
+
+def pptx_file_name(result) -> str:
+    return f"{result['title'].replace(' ', '_').replace('/', '_')}.pptx"
+
+def deck_id(result, images) -> str:
+    """Identifies a deck by everything it is rendered from: the content, the pictures and the template."""
+    assets = [[image_asset_store.get(image['asset']).image.sha1 for image in slide] for slide in images]
+    return artifact_store.make_id(result, images, assets, get_template_digest())
+
+def create_pptx_file(result, images) -> Artifact:
+    """
+    Renders the deck into the artifact store, or returns the stored deck if the same
+    content was already rendered with the same pictures and template.
+
+    Returns:
+    Artifact: The stored PPTX file.
+    """
+    artifact_id = deck_id(result, images)
+    artifact = artifact_store.get(artifact_id)
+    if artifact is not None:
+        logger.info(f"Reusing the rendered deck {artifact_id}")
+        return artifact
+
+    logger.info("Creating new PPT file")
+    return artifact_store.put(artifact_id, render_pptx(result, images), pptx_file_name(result))
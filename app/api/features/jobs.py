@@ -0,0 +1,137 @@
+from app.api.features.full_workflow_for_gradio import run_full_workflow
+from app.api.features.schemas.schemas import JobRequestSchema, JobStage, JobStatusSchema
+from app.api.features.errors.job_errors import JobQueueFullError
+from app.api.features.utils.artifact_store import deck_url
+from app.api.logger import setup_logger
+from collections import OrderedDict
+
+import asyncio
+import itertools
+import os
+import time
+import uuid
+
+logger = setup_logger(__name__)
+
+class Job:
+    def __init__(self, request: JobRequestSchema):
+        self.job_id = uuid.uuid4().hex
+        self.request = request
+        self.priority = request.priority
+        self.stage = JobStage.QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.summary = None
+        self.result = None
+        self.deck_id = None
+        self.error = None
+
+    def set_stage(self, stage):
+        self.stage = JobStage(stage)
+        logger.info(f"Job {self.job_id} is {self.stage.value}")
+
+    @property
+    def is_finished(self):
+        return self.stage in (JobStage.COMPLETED, JobStage.FAILED)
+
+    def to_schema(self) -> JobStatusSchema:
+        return JobStatusSchema(
+            job_id=self.job_id,
+            stage=self.stage,
+            priority=self.priority,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            summary=self.summary,
+            result=self.result,
+            deck_id=self.deck_id,
+            deck_url=deck_url(self.deck_id) if self.deck_id else None,
+            error=self.error
+        )
+
+class JobManager:
+    """
+    Runs deck generation jobs on a fixed pool of asyncio workers.
+
+    Jobs wait in a bounded priority queue; higher priorities are picked up first and
+    jobs with the same priority run in submission order. Finished jobs are kept in
+    memory so their status can be polled, up to `max_finished_jobs`.
+    """
+    def __init__(self, num_workers=2, max_queue_size=100, max_finished_jobs=1000):
+        self.num_workers = num_workers
+        self.max_queue_size = max_queue_size
+        self.max_finished_jobs = max_finished_jobs
+        self.jobs = OrderedDict()
+        self.queue = None
+        self.workers = []
+        self._sequence = itertools.count()
+
+    async def start(self):
+        self.queue = asyncio.PriorityQueue(maxsize=self.max_queue_size)
+        self.workers = [asyncio.create_task(self._worker(index)) for index in range(self.num_workers)]
+        logger.info(f"Started {self.num_workers} job workers")
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        logger.info("Stopped the job workers")
+
+    def submit(self, request: JobRequestSchema) -> Job:
+        if self.queue is None:
+            raise JobQueueFullError("The job workers are not running")
+
+        job = Job(request)
+        try:
+            self.queue.put_nowait((-job.priority, next(self._sequence), job.job_id))
+        except asyncio.QueueFull:
+            raise JobQueueFullError(f"The job queue is full ({self.max_queue_size} jobs), please retry later")
+
+        self.jobs[job.job_id] = job
+        self._evict_finished_jobs()
+        logger.info(f"Job {job.job_id} queued with priority {job.priority}")
+        return job
+
+    def get(self, job_id: str):
+        return self.jobs.get(job_id)
+
+    def _evict_finished_jobs(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.is_finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self.jobs[job_id]
+
+    async def _worker(self, index):
+        while True:
+            _, _, job_id = await self.queue.get()
+            job = self.jobs.get(job_id)
+            try:
+                if job is not None:
+                    await self._run(job)
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job: Job):
+        job.started_at = time.time()
+        try:
+            result = await run_full_workflow(job.request, on_stage=job.set_stage)
+            job.summary, job.result = result.summary, result.ppt_content
+            job.deck_id = result.deck.artifact_id
+            job.set_stage(JobStage.COMPLETED)
+        except asyncio.CancelledError:
+            job.error = "The job was cancelled"
+            job.set_stage(JobStage.FAILED)
+            raise
+        except Exception as e:
+            logger.error(f"Job {job.job_id} failed: {e}")
+            job.error = str(e)
+            job.set_stage(JobStage.FAILED)
+        finally:
+            job.finished_at = time.time()
+
+job_manager = JobManager(
+    num_workers=int(os.environ.get("JOB_WORKERS", "2")),
+    max_queue_size=int(os.environ.get("JOB_QUEUE_SIZE", "100")),
+    max_finished_jobs=int(os.environ.get("JOB_HISTORY_SIZE", "1000"))
+)
@@ -0,0 +1,60 @@
+from app.api.features.utils.cassettes import CassetteStore, RecordingModel, ReplayModel, default_cassette_dir
+from app.api.features.utils.lazy_import import LazyImport
+from app.api.logger import setup_logger
+
+import os
+
+logger = setup_logger(__name__)
+
+# The Gemini client library is heavy to import, so it is loaded with the first model
+GoogleGenerativeAI = LazyImport("langchain_google_genai:GoogleGenerativeAI")
+ChatGoogleGenerativeAI = LazyImport("langchain_google_genai:ChatGoogleGenerativeAI")
+
+MODEL_PROVIDERS = ("gemini", "record", "replay")
+
+class GeminiProvider:
+    """
+    Creates the Gemini clients. `kind` is "llm" for text completion models and "chat"
+    for chat models. Their own retries are turned off, the model governor owns them.
+    """
+    def create(self, kind, model_name):
+        model_class = ChatGoogleGenerativeAI if kind == "chat" else GoogleGenerativeAI
+        return model_class.resolve()(model=model_name, max_retries=0)
+
+class CassetteRecordingProvider:
+    """Creates the models of another provider, recording every call they make to the cassette store."""
+    def __init__(self, provider, store: CassetteStore):
+        self.provider = provider
+        self.store = store
+
+    def create(self, kind, model_name):
+        return RecordingModel(self.provider.create(kind, model_name), model_name, kind, self.store)
+
+class CassetteReplayProvider:
+    """Creates models answering from the cassette store, for offline and deterministic runs."""
+    def __init__(self, store: CassetteStore, latency_scale=1.0):
+        self.store = store
+        self.latency_scale = latency_scale
+
+    def create(self, kind, model_name):
+        return ReplayModel(model_name, kind, self.store, self.latency_scale)
+
+def create_model_provider(mode, cassette_dir=default_cassette_dir, latency_scale=1.0):
+    """
+    Creates the provider named by MODEL_PROVIDER: "gemini" calls the models, "record"
+    calls them and saves each call to `cassette_dir`, "replay" answers from the saved calls.
+    """
+    if mode == "gemini":
+        return GeminiProvider()
+    if mode == "record":
+        logger.info(f"Recording the model calls to {cassette_dir}")
+        return CassetteRecordingProvider(GeminiProvider(), CassetteStore(cassette_dir))
+    if mode == "replay":
+        logger.info(f"Replaying the model calls from {cassette_dir}")
+        return CassetteReplayProvider(CassetteStore(cassette_dir), latency_scale)
+    raise ValueError(f"Unknown model provider: {mode}")
+
+model_provider = create_model_provider(
+    os.environ.get("MODEL_PROVIDER", "gemini").lower(),
+    latency_scale=float(os.environ.get("CASSETTE_LATENCY_SCALE", "1"))
+)
@@ -0,0 +1,175 @@
+from langchain_core.output_parsers import JsonOutputParser
+from app.api.features.chain_registry import chain_registry
+from app.api.features.compile_chain_for_ppt import PPT_MODEL
+from app.api.features.errors.generation_errors import SlideGenerationError
+from app.api.features.schemas.schemas import PPTOutlineSchema, SlideSchema
+from app.api.logger import setup_logger
+
+import asyncio
+import os
+import re
+
+logger = setup_logger(__name__)
+
+OUTLINE_PROMPT = "prompts/generate-ppt-outline-prompt.txt"
+
+SLIDE_PROMPT = "prompts/generate-slide-prompt.txt"
+
+# Maximum number of slide bodies generated at the same time for one deck
+slide_concurrency = int(os.environ.get("PPT_SLIDE_CONCURRENCY", "8"))
+
+# Number of extra attempts for a slide whose generation or parsing failed
+slide_retries = int(os.environ.get("PPT_SLIDE_RETRIES", "2"))
+
+# Number of extra attempts for an outline with fewer slides than requested
+outline_retries = int(os.environ.get("PPT_OUTLINE_RETRIES", "1"))
+
+# Characters of the summary sent with each slide, chosen for their relevance to it
+slide_summary_chars = int(os.environ.get("PPT_SLIDE_SUMMARY_CHARS", "1500"))
+
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Words of four letters or more, shorter ones are mostly stop words
+WORD_PATTERN = re.compile(r"\w{4,}")
+
+outline_parser = JsonOutputParser(pydantic_object=PPTOutlineSchema)
+
+slide_parser = JsonOutputParser(pydantic_object=SlideSchema)
+
+def compile_outline_chain():
+    return chain_registry.get_chain(
+        OUTLINE_PROMPT,
+        PPT_MODEL,
+        parser=outline_parser,
+        partial_variables={"format_instructions": outline_parser.get_format_instructions()}
+    )
+
+def compile_slide_chain():
+    return chain_registry.get_chain(
+        SLIDE_PROMPT,
+        PPT_MODEL,
+        parser=slide_parser,
+        partial_variables={"format_instructions": slide_parser.get_format_instructions()}
+    )
+
+def _words(text) -> set:
+    return set(WORD_PATTERN.findall(text.lower()))
+
+def summary_excerpt(summary, slide_outline, max_chars=None) -> str:
+    """
+    Returns the sentences of the summary most relevant to a slide, in their original
+    order and within `max_chars`, so each slide call does not carry the whole summary.
+    A sentence is as relevant as the number of words it shares with the slide title and
+    key points; a summary shorter than `max_chars` is returned whole.
+    """
+    max_chars = slide_summary_chars if max_chars is None else max_chars
+    if len(summary) <= max_chars:
+        return summary
+
+    sentences = [sentence.strip() for sentence in SENTENCE_PATTERN.split(summary) if sentence.strip()]
+    slide_words = _words(" ".join([slide_outline["title"], *slide_outline.get("key_points", [])]))
+    ranked = sorted(range(len(sentences)), key=lambda index: (-len(_words(sentences[index]) & slide_words), index))
+
+    chosen = []
+    length = 0
+    for index in ranked:
+        if length + len(sentences[index]) + 1 > max_chars:
+            continue
+        chosen.append(index)
+        length += len(sentences[index]) + 1
+    return " ".join(sentences[index] for index in sorted(chosen))
+
+async def generate_outline(request_values: dict) -> dict:
+    """
+    Generates the outline of the deck, with exactly the requested number of slides.
+
+    Extra slides are dropped; an outline with too few slides is generated again, up to
+    `outline_retries` times.
+    """
+    n_slides = int(request_values["n_slides"])
+    for attempt in range(outline_retries + 1):
+        outline = await compile_outline_chain().ainvoke(request_values)
+        outline = PPTOutlineSchema(**outline).model_dump()
+        if len(outline["slides"]) > n_slides:
+            logger.warning(f"Outline has {len(outline['slides'])} slides instead of {n_slides}, keeping the first {n_slides}")
+            outline["slides"] = outline["slides"][:n_slides]
+        if len(outline["slides"]) == n_slides:
+            return outline
+        logger.error(f"Outline has {len(outline['slides'])} slides instead of {n_slides} on attempt {attempt + 1}")
+
+    raise SlideGenerationError(f"The outline has {len(outline['slides'])} slides instead of {n_slides} after {outline_retries + 1} attempts")
+
+async def generate_slide(request_values: dict, outline: dict, slide_index: int, semaphore):
+    slide_outline = outline["slides"][slide_index]
+    slide_input = {
+        "topic": request_values["topic"],
+        "objective": request_values["objective"],
+        "target_audience": request_values["target_audience"],
+        "lang": request_values["lang"],
+        "summary": summary_excerpt(request_values["summary"], slide_outline),
+        "deck_title": outline["title"],
+        "deck_description": outline["description"],
+        "outline": "\n".join(f"{number}. {slide['title']}" for number, slide in enumerate(outline["slides"], start=1)),
+        "slide_number": slide_index + 1,
+        "n_slides": len(outline["slides"]),
+        "slide_title": slide_outline["title"],
+        "key_points": "\n".join(f"- {point}" for point in slide_outline.get("key_points", []))
+    }
+
+    for attempt in range(slide_retries + 1):
+        try:
+            async with semaphore:
+                slide = await compile_slide_chain().ainvoke(slide_input)
+            return SlideSchema(**slide).model_dump()
+        except Exception as e:
+            logger.error(f"Slide {slide_index + 1} failed on attempt {attempt + 1}: {e}")
+            if attempt == slide_retries:
+                raise SlideGenerationError(f"Slide {slide_index + 1} could not be generated after {slide_retries + 1} attempts", slide_index + 1) from e
+            await asyncio.sleep(2 ** attempt)
+
+async def iter_deck_from_outline(request_values: dict):
+    """
+    Generates a deck in two phases and yields its parts as they become available.
+
+    The first call writes the title, the description and the per-slide outline, with
+    the requested number of slides. The slide bodies are then generated concurrently,
+    at most `slide_concurrency` at a time, each with the part of the summary relevant to
+    it, and a failed slide is retried on its own without touching the others.
+
+    Yields:
+    tuple: ("deck", {"title", "description"}) once, then ("slide", index, slide) for
+    each slide in completion order.
+    """
+    outline = await generate_outline(request_values)
+    logger.info(f"Outline generated with {len(outline['slides'])} slides")
+
+    yield "deck", {"title": outline["title"], "description": outline["description"]}
+
+    semaphore = asyncio.Semaphore(slide_concurrency)
+
+    async def indexed_slide(slide_index):
+        return slide_index, await generate_slide(request_values, outline, slide_index, semaphore)
+
+    tasks = [asyncio.create_task(indexed_slide(slide_index)) for slide_index in range(len(outline["slides"]))]
+
+    try:
+        for completed in asyncio.as_completed(tasks):
+            slide_index, slide = await completed
+            yield "slide", slide_index, slide
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def generate_ppt_content_from_outline(request_values: dict) -> dict:
+    """Generates the same PPTFileSchema dictionary as the single-call chain, using the outline mode."""
+    ppt_content = {"slides": []}
+    slides = {}
+
+    async for part in iter_deck_from_outline(request_values):
+        if part[0] == "deck":
+            ppt_content.update(part[1])
+        else:
+            slides[part[1]] = part[2]
+
+    ppt_content["slides"] = [slides[slide_index] for slide_index in sorted(slides)]
+    return ppt_content
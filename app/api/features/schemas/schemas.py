@@ -1,5 +1,8 @@
 from pydantic import BaseModel, Field, validator
-from typing import List, Optional
+from typing import Dict, List, Optional
+from enum import Enum
+from app.api.features.utils.image_assets import image_asset_store
+from app.api.features.utils.pdf_extraction import PageSelection, validate_page_ranges
 
 class SlideSchema(BaseModel):
     title: str = Field(..., title="Title", description="The title of the Slide.")
@@ -43,6 +46,22 @@ class PPTFileSchema(BaseModel):
       }
     
     
+class SlideOutlineSchema(BaseModel):
+    title: str = Field(..., title="Title", description="The title of the Slide.")
+    key_points: List[str] = Field(..., title="Key Points", description="The key points the slide must cover.")
+
+
+class PPTOutlineSchema(BaseModel):
+    title: str = Field(..., title="Title", description="The title of the PowerPoint presentation.")
+    description: str = Field(..., title="Description", description="A brief description of the PowerPoint presentation.")
+    slides: List[SlideOutlineSchema] = Field(..., title="Slides", description="The outline of each slide in the PowerPoint presentation.")
+
+
+class GenerationMode(str, Enum):
+    SINGLE = "single"
+    OUTLINE = "outline"
+
+
 class RequestSchema(BaseModel):
     topic: str = Field(..., min_length=1, max_length=100, description="The topic of the slide presentation")
     objective: str = Field(..., min_length=1, max_length=200, description="The objective of the slide presentation")
@@ -131,4 +150,82 @@ class SlidePresentationRequestArgs:
 class RequestSchemaWithFiles(BaseModel):
     request_args: RequestSchema
     file_url: str
-    file_type: str
\ No newline at end of file
+    file_type: str
+    use_summary_cache: bool = Field(True, description="Reuse a cached summary of the same file, prompt and model when available")
+    use_response_cache: bool = Field(True, description="Reuse the PPT content generated for an identical request and summary when available")
+    generation_mode: GenerationMode = Field(GenerationMode.SINGLE, description="'single' generates the deck in one call, 'outline' generates an outline first and then the slides in parallel")
+    slide_images: Optional[Dict[int, List[str]]] = Field(None, description="Image assets to place on content slides, by slide number. Unlisted slides keep the default images")
+    pages: Optional[str] = Field(None, description="Pages of a PDF source to summarize, as page numbers and ranges, e.g. '1-10,15'. Every page by default")
+    max_pages: Optional[int] = Field(None, ge=1, description="Maximum number of pages of a PDF source to summarize, counted from the first selected page")
+
+    @validator('pages')
+    def validate_pages(cls, v):
+        return validate_page_ranges(v) if v is not None else v
+
+    @validator('slide_images')
+    def validate_slide_images(cls, v):
+        if not v:
+            return v
+        if min(v) < 1:
+            raise ValueError('Slide numbers start at 1')
+        available = image_asset_store.names()
+        unknown = sorted({name for names in v.values() for name in names if name not in available})
+        if unknown:
+            raise ValueError(f'Unknown image assets: {", ".join(unknown)}')
+        return v
+
+    def page_selection(self) -> Optional[PageSelection]:
+        if self.pages is None and self.max_pages is None:
+            return None
+        return PageSelection(self.pages, self.max_pages)
+
+class JobRequestSchema(RequestSchemaWithFiles):
+    priority: int = Field(0, ge=0, le=10, description="Jobs with a higher priority are picked up first")
+
+class JobStage(str, Enum):
+    QUEUED = "queued"
+    DOWNLOADING = "downloading"
+    SUMMARIZING = "summarizing"
+    GENERATING = "generating"
+    RENDERING = "rendering"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class JobStatusSchema(BaseModel):
+    job_id: str = Field(..., description="The identifier of the deck generation job")
+    stage: JobStage = Field(..., description="The stage the job is currently in")
+    priority: int = Field(..., description="The priority the job was submitted with")
+    created_at: float = Field(..., description="Unix timestamp of the job submission")
+    started_at: Optional[float] = Field(None, description="Unix timestamp of when a worker picked the job up")
+    finished_at: Optional[float] = Field(None, description="Unix timestamp of when the job completed or failed")
+    summary: Optional[str] = Field(None, description="The summary of the source file")
+    result: Optional[dict] = Field(None, description="The generated PPT content")
+    deck_id: Optional[str] = Field(None, description="The identifier of the rendered deck")
+    deck_url: Optional[str] = Field(None, description="The path to download the rendered deck from, /decks/{deck_id}")
+    error: Optional[str] = Field(None, description="The error message if the job failed")
+
+class BatchRowStatus(str, Enum):
+    COMPLETED = "completed"
+    FAILED = "failed"
+    INVALID = "invalid"
+    SKIPPED = "skipped"
+
+class BatchRowResultSchema(BaseModel):
+    row_id: str = Field(..., description="The identifier of the row, given in the input or derived from its content")
+    line: int = Field(..., description="The line of the row in the input, starting at 1")
+    status: BatchRowStatus = Field(..., description="The outcome of the row")
+    deck_id: Optional[str] = Field(None, description="The identifier of the rendered deck")
+    deck_url: Optional[str] = Field(None, description="The path to download the rendered deck from, /decks/{deck_id}")
+    title: Optional[str] = Field(None, description="The title of the generated presentation")
+    error: Optional[str] = Field(None, description="The error message if the row failed or is invalid")
+    started_at: Optional[float] = Field(None, description="Unix timestamp of when the row started")
+    finished_at: Optional[float] = Field(None, description="Unix timestamp of when the row finished")
+
+class BatchStatusSchema(BaseModel):
+    batch_id: str = Field(..., description="The identifier of the batch, reused to resume it")
+    running: bool = Field(..., description="Whether rows of the batch are still being processed")
+    total: int = Field(..., description="The number of rows in the input")
+    counts: Dict[BatchRowStatus, int] = Field(..., description="The number of finished rows by status")
+    created_at: float = Field(..., description="Unix timestamp of the batch submission")
+    finished_at: Optional[float] = Field(None, description="Unix timestamp of when the last row finished")
+    rows: List[BatchRowResultSchema] = Field(..., description="The results of the rows processed in this run")
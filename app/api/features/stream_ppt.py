@@ -0,0 +1,171 @@
+from app.api.features.compile_chain_for_ppt import PPT_MODEL, compile_streaming_chain, parser
+from app.api.features.full_workflow_for_gradio import ppt_cache_key, render_ppt, summarize_file
+from app.api.features.parallel_ppt_generation import iter_deck_from_outline
+from app.api.features.schemas.schemas import GenerationMode, RequestSchemaWithFiles, SlidePresentationRequestArgs, SlideSchema
+from app.api.features.utils.artifact_store import deck_url
+from app.api.features.utils.metrics import set_file_type, track_stage
+from app.api.features.utils.response_cache import ppt_response_cache
+from app.api.features.utils.stage_limits import stage_slot
+from app.api.logger import setup_logger
+from langchain_core.utils.json import parse_json_markdown
+
+import json
+
+logger = setup_logger(__name__)
+
+def format_event(event, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+class IncrementalDeckParser:
+    """
+    Parses the PPT JSON while the model is still writing it.
+
+    The structure of the text is tracked character by character as chunks arrive, and
+    the text received so far is only parsed as partial JSON when a chunk opens the slides
+    array or closes a slide object, instead of after every chunk. The deck title and
+    description are known once the slides array has started, and each slide once its
+    object is closed; everything left is flushed when the stream ends.
+    """
+    # Nesting depth of the slide objects: deck object, slides array, slide object
+    SLIDE_DEPTH = 3
+
+    def __init__(self):
+        self.chunks = []
+        self.header_emitted = False
+        self.slides_emitted = 0
+        self.slides_closed = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    @property
+    def text(self):
+        return "".join(self.chunks)
+
+    def _parse(self):
+        try:
+            return parse_json_markdown(self.text) or {}
+        except Exception:
+            return {}
+
+    def _scan(self, chunk) -> bool:
+        """Follows the JSON structure through `chunk`, returning whether it opened the slides or closed one."""
+        completed = False
+        for character in chunk:
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif character == "\\":
+                    self.escaped = True
+                elif character == '"':
+                    self.in_string = False
+            elif character == '"':
+                self.in_string = True
+            elif character in "{[":
+                self.depth += 1
+                if character == "[" and self.depth == self.SLIDE_DEPTH - 1:
+                    completed = True
+            elif character in "}]":
+                if character == "}" and self.depth == self.SLIDE_DEPTH:
+                    self.slides_closed += 1
+                    completed = True
+                self.depth -= 1
+        return completed
+
+    def _new_events(self, deck, final):
+        events = []
+        if not isinstance(deck, dict):
+            return events
+
+        slides = deck.get("slides") if isinstance(deck.get("slides"), list) else []
+
+        if not self.header_emitted and (final or "slides" in deck) and "title" in deck and "description" in deck:
+            self.header_emitted = True
+            events.append(("deck", {"title": deck["title"], "description": deck["description"]}))
+
+        complete_slides = slides if final else slides[:self.slides_closed]
+        while self.header_emitted and self.slides_emitted < len(complete_slides):
+            slide = complete_slides[self.slides_emitted]
+            try:
+                slide = SlideSchema(**slide).model_dump()
+            except Exception:
+                # Validation happens again on the final document, keep what the model wrote
+                pass
+            events.append(("slide", {"index": self.slides_emitted, **slide}))
+            self.slides_emitted += 1
+
+        return events
+
+    def feed(self, chunk):
+        self.chunks.append(chunk)
+        if not self._scan(chunk):
+            return []
+        return self._new_events(self._parse(), final=False)
+
+    def finish(self):
+        deck = parser.parse(self.text)
+        return deck, self._new_events(deck, final=True)
+
+async def stream_ppt_events(data: RequestSchemaWithFiles):
+    """
+    Runs the deck generation and yields server-sent events as results become available.
+
+    Events: `stage` when a stage starts, `deck` with the title and description, one
+    `slide` per slide as soon as it is complete, then `done` with the rendered file,
+    or `error` if any stage fails. In the outline mode slides arrive in completion
+    order, so clients should place them by `index`.
+    """
+    set_file_type(data.file_type)
+    try:
+        yield format_event("stage", {"stage": "summarizing"})
+        summary = await summarize_file(data.file_url, data.file_type, use_cache=data.use_summary_cache, page_selection=data.page_selection(), language=data.request_args.lang)
+
+        yield format_event("stage", {"stage": "generating"})
+        presentation = SlidePresentationRequestArgs(slide_schema=data.request_args)
+        presentation.summary = summary
+
+        chain_input = presentation.validate_and_return()
+        cache_key = ppt_cache_key(chain_input, data.generation_mode)
+        ppt_content = await ppt_response_cache.aget(cache_key) if data.use_response_cache else None
+
+        if ppt_content is not None:
+            # A cached deck is replayed at once, in the same events a generated one produces
+            logger.info("PPT content served from the response cache")
+            yield format_event("deck", {"title": ppt_content["title"], "description": ppt_content["description"]})
+            for slide_index, slide in enumerate(ppt_content["slides"]):
+                yield format_event("slide", {"index": slide_index, **slide})
+        elif data.generation_mode == GenerationMode.OUTLINE:
+            ppt_content = {"slides": []}
+            slides = {}
+            async with stage_slot("generate"):
+                with track_stage("generate", PPT_MODEL):
+                    async for part in iter_deck_from_outline(chain_input):
+                        if part[0] == "deck":
+                            ppt_content.update(part[1])
+                            yield format_event("deck", part[1])
+                        else:
+                            slides[part[1]] = part[2]
+                            yield format_event("slide", {"index": part[1], **part[2]})
+            ppt_content["slides"] = [slides[slide_index] for slide_index in sorted(slides)]
+            await ppt_response_cache.aset(cache_key, ppt_content)
+        else:
+            deck_parser = IncrementalDeckParser()
+            async with stage_slot("generate"):
+                with track_stage("generate", PPT_MODEL):
+                    async for chunk in compile_streaming_chain().astream(chain_input):
+                        for event, payload in deck_parser.feed(chunk):
+                            yield format_event(event, payload)
+
+            ppt_content, remaining_events = deck_parser.finish()
+            for event, payload in remaining_events:
+                yield format_event(event, payload)
+            await ppt_response_cache.aset(cache_key, ppt_content)
+        logger.info("PPT content streamed successfully")
+
+        yield format_event("stage", {"stage": "rendering"})
+        deck = await render_ppt(ppt_content, slide_images=data.slide_images)
+
+        yield format_event("done", {"deck_id": deck.artifact_id, "deck_url": deck_url(deck.artifact_id), "n_slides": len(ppt_content.get("slides", []))})
+    except Exception as e:
+        logger.error(f"Streaming generation failed: {e}")
+        yield format_event("error", {"message": str(e)})
@@ -0,0 +1,95 @@
+from app.api.features.utils.executor import run_in_executor
+from app.api.features.utils.lazy_import import LazyImport
+from app.api.logger import setup_logger
+
+import asyncio
+import os
+
+logger = setup_logger(__name__)
+
+# Inputs longer than this are summarized with map-reduce instead of a single prompt
+map_reduce_threshold = int(os.environ.get("SUMMARY_MAP_REDUCE_THRESHOLD_CHARS", "100000"))
+
+# Size of each group of text summarized in the map step
+map_chunk_size = int(os.environ.get("SUMMARY_MAP_CHUNK_CHARS", "30000"))
+
+# Maximum number of summarization calls in flight for a single document
+max_concurrency = int(os.environ.get("SUMMARY_MAX_CONCURRENCY", "4"))
+
+# Number of partial summaries merged by each reduce call
+reduce_fan_in = max(2, int(os.environ.get("SUMMARY_REDUCE_FAN_IN", "6")))
+
+RecursiveCharacterTextSplitter = LazyImport("langchain_text_splitters:RecursiveCharacterTextSplitter")
+
+_map_splitter = None
+
+def split_for_map(full_content):
+    global _map_splitter
+    if _map_splitter is None:
+        _map_splitter = RecursiveCharacterTextSplitter.resolve()(
+            chunk_size = map_chunk_size,
+            chunk_overlap = 200
+        )
+    return _map_splitter.split_text(full_content)
+
+def group_sections(sections):
+    """Packs consecutive sections into map chunks of up to `map_chunk_size` characters, splitting only the sections longer than that."""
+    chunks = []
+    current = []
+    current_size = 0
+    for section in sections:
+        if len(section) > map_chunk_size:
+            if current:
+                chunks.append("\n".join(current))
+                current, current_size = [], 0
+            chunks.extend(split_for_map(section))
+            continue
+        if current and current_size + len(section) + 1 > map_chunk_size:
+            chunks.append("\n".join(current))
+            current, current_size = [], 0
+        current.append(section)
+        current_size += len(section) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+async def summarize_text(chain, full_content, reduce_chain, sections=None):
+    """
+    Summarizes a text, switching to map-reduce for inputs above the size threshold.
+
+    Small inputs go through `chain` in a single call. Larger ones are split into
+    groups that are summarized concurrently with `chain`, then the partial summaries
+    are merged with `reduce_chain`, `reduce_fan_in` at a time, until one is left.
+
+    Parameters:
+    chain (Runnable): Chain that summarizes a piece of the source text.
+    full_content (str): The text to summarize.
+    reduce_chain (Runnable): Chain that merges a list of partial summaries.
+    sections (list): Optional natural divisions of the text, e.g. the time windows of a
+    transcript. Map chunks are then packed from whole sections instead of split by characters.
+
+    Returns:
+    str: The summary.
+    """
+    if not full_content or len(full_content) <= map_reduce_threshold:
+        return await chain.ainvoke(full_content)
+
+    chunks = await run_in_executor(group_sections, sections) if sections else await run_in_executor(split_for_map, full_content)
+    logger.info(f"Summarizing {len(full_content)} characters with map-reduce over {len(chunks)} chunks")
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_limited(runnable, text):
+        async with semaphore:
+            return await runnable.ainvoke(text)
+
+    partial_summaries = await asyncio.gather(*(run_limited(chain, chunk) for chunk in chunks))
+
+    level = 1
+    while len(partial_summaries) > 1:
+        groups = [partial_summaries[i:i + reduce_fan_in] for i in range(0, len(partial_summaries), reduce_fan_in)]
+        logger.info(f"Reduce level {level}: merging {len(partial_summaries)} partial summaries into {len(groups)}")
+        partial_summaries = await asyncio.gather(*(run_limited(reduce_chain, "\n\n".join(group)) for group in groups))
+        level += 1
+
+    return partial_summaries[0]
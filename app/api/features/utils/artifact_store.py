@@ -0,0 +1,148 @@
+from app.api.features.utils.executor import run_in_executor
+from app.api.logger import setup_logger
+from typing import NamedTuple
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+logger = setup_logger(__name__)
+
+class Artifact(NamedTuple):
+    artifact_id: str
+    path: str
+    size: int
+    # Quoted SHA-256 of the file, used as its HTTP ETag
+    etag: str
+    file_name: str
+    created_at: float
+
+def deck_url(artifact_id) -> str:
+    """Returns the API path a stored deck is downloaded from, see /decks/{deck_id} in the router."""
+    return f"/decks/{artifact_id}"
+
+class ArtifactStore:
+    """
+    Keeps rendered PPTX files on disk, addressed by the hash of what they were rendered from.
+
+    Files are written to a temporary file and renamed into place, so a reader never sees a
+    partial deck. Entries older than `ttl_seconds` are removed, and when the store grows
+    over `max_bytes` the least recently used decks are evicted first.
+    """
+    def __init__(self, store_dir, max_bytes=1024 * 1024 * 1024, ttl_seconds=24 * 3600):
+        self.store_dir = store_dir
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def make_id(*parts) -> str:
+        key_source = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
+    def _paths(self, artifact_id):
+        entry_dir = os.path.join(self.store_dir, artifact_id[:2])
+        return os.path.join(entry_dir, f"{artifact_id}.pptx"), os.path.join(entry_dir, f"{artifact_id}.json")
+
+    def _is_valid_id(self, artifact_id):
+        return len(artifact_id) == 64 and all(character in "0123456789abcdef" for character in artifact_id)
+
+    def _read_meta(self, artifact_id):
+        try:
+            with open(self._paths(artifact_id)[1], 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _is_expired(self, meta):
+        # Decks expire a fixed time after they were rendered, however often they are read
+        return time.time() - meta["created_at"] > self.ttl_seconds
+
+    def get(self, artifact_id) -> Artifact:
+        """Returns the stored deck, or None if it does not exist or has expired."""
+        if not self._is_valid_id(artifact_id):
+            return None
+
+        file_path, _ = self._paths(artifact_id)
+        meta = self._read_meta(artifact_id)
+        if meta is None:
+            return None
+
+        if not os.path.exists(file_path) or self._is_expired(meta):
+            self._remove(artifact_id)
+            return None
+
+        # Touch the file so eviction follows recency of use
+        os.utime(file_path)
+        return Artifact(artifact_id, file_path, meta["size"], meta["etag"], meta["file_name"], meta["created_at"])
+
+    def put(self, artifact_id, content: bytes, file_name) -> Artifact:
+        file_path, meta_path = self._paths(artifact_id)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        artifact = Artifact(
+            artifact_id, file_path, len(content), f'"{hashlib.sha256(content).hexdigest()}"', file_name, time.time()
+        )
+
+        # The deck is in place before its metadata, so a visible entry is always complete
+        self._write_atomic(file_path, 'wb', lambda file: file.write(content))
+        self._write_atomic(meta_path, 'w', lambda file: json.dump(artifact._asdict(), file))
+        logger.info(f"Stored deck {artifact_id} ({len(content)} bytes)")
+
+        self._evict()
+        return artifact
+
+    def _write_atomic(self, path, mode, write):
+        with tempfile.NamedTemporaryFile(mode, dir=os.path.dirname(path), delete=False, suffix=".tmp") as temp_file:
+            write(temp_file)
+        os.replace(temp_file.name, path)
+
+    def _remove(self, artifact_id):
+        for path in self._paths(artifact_id):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _evict(self):
+        with self.lock:
+            entries = []
+            total_bytes = 0
+            for root, _, files in os.walk(self.store_dir):
+                for name in files:
+                    if not name.endswith(".pptx"):
+                        continue
+                    try:
+                        stat = os.stat(os.path.join(root, name))
+                    except OSError:
+                        continue
+                    artifact_id = name[:-len(".pptx")]
+                    # A deck without metadata yet is still being stored, it is only evicted by size
+                    meta = self._read_meta(artifact_id)
+                    if meta is not None and self._is_expired(meta):
+                        self._remove(artifact_id)
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, artifact_id))
+                    total_bytes += stat.st_size
+
+            for _, size, artifact_id in sorted(entries):
+                if total_bytes <= self.max_bytes:
+                    break
+                logger.info(f"Evicting deck {artifact_id}")
+                self._remove(artifact_id)
+                total_bytes -= size
+
+    async def aget(self, artifact_id) -> Artifact:
+        return await run_in_executor(self.get, artifact_id)
+
+    async def aput(self, artifact_id, content: bytes, file_name) -> Artifact:
+        return await run_in_executor(self.put, artifact_id, content, file_name)
+
+artifact_store = ArtifactStore(
+    store_dir=os.environ.get("ARTIFACT_STORE_DIR", os.path.join(tempfile.gettempdir(), "aipptbuilder", "decks")),
+    max_bytes=int(os.environ.get("ARTIFACT_STORE_MAX_BYTES", str(1024 * 1024 * 1024))),
+    ttl_seconds=int(os.environ.get("ARTIFACT_STORE_TTL_SECONDS", str(24 * 3600)))
+)
@@ -0,0 +1,166 @@
+from app.api.features.errors.cassette_errors import CassetteMissError
+from app.api.logger import setup_logger
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.runnables import Runnable
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+
+logger = setup_logger(__name__)
+
+DATA_URL_PATTERN = re.compile(r"data:([\w/+.-]+);base64,([A-Za-z0-9+/=]+)")
+
+def _redact_data_urls(text):
+    # Inline images are stored by hash, they would make cassettes huge and unreadable
+    return DATA_URL_PATTERN.sub(lambda match: f"data:{match.group(1)};sha256,{hashlib.sha256(match.group(2).encode('ascii')).hexdigest()}", text)
+
+def serialize_input(model_input, kind):
+    """Returns the prompt of a model call in a JSON-friendly form: a string for LLMs, a list of messages for chat models."""
+    if kind == "chat":
+        messages = model_input.to_messages() if hasattr(model_input, "to_messages") else model_input
+        if isinstance(messages, str):
+            messages = [{"type": "human", "content": messages}]
+        prompt = [{"type": message.type, "content": message.content} if hasattr(message, "type") else message for message in messages]
+        return json.loads(_redact_data_urls(json.dumps(prompt, ensure_ascii=False)))
+    return _redact_data_urls(model_input.to_string() if hasattr(model_input, "to_string") else str(model_input))
+
+def serialize_output(output):
+    if hasattr(output, "content"):
+        return {"type": "message", "content": output.content, "usage_metadata": dict(getattr(output, "usage_metadata", None) or {}) or None}
+    return {"type": "text", "content": output}
+
+def deserialize_output(output, chunk=False):
+    if output["type"] == "message":
+        message_class = AIMessageChunk if chunk else AIMessage
+        return message_class(content=output["content"], usage_metadata=output.get("usage_metadata"))
+    return output["content"]
+
+class CassetteStore:
+    """
+    Recorded model calls on disk, one JSON file per call, keyed by the model and the prompt.
+
+    Each cassette holds the prompt, the raw response (before any output parser, so a
+    malformed JSON answer can be inspected or edited), the streamed chunks if the call
+    was streamed, and the timings of the original call. Recording the same call again
+    replaces its cassette.
+    """
+    def __init__(self, cassette_dir):
+        self.cassette_dir = cassette_dir
+
+    @staticmethod
+    def make_key(model_name, kind, prompt) -> str:
+        key_source = json.dumps([model_name, kind, prompt], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cassette_dir, key[:2], f"{key}.json")
+
+    def get(self, key) -> dict:
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, cassette: dict):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            json.dump(cassette, file, ensure_ascii=False, indent=2)
+        os.replace(temporary_path, path)
+
+class RecordingModel(Runnable):
+    """Runnable calling the wrapped model and saving every successful call to the cassette store."""
+    def __init__(self, model, model_name, kind, store: CassetteStore):
+        self.model = model
+        self.model_name = model_name
+        self.kind = kind
+        self.store = store
+
+    def _save(self, prompt, response, latency_seconds, chunks=None, first_chunk_seconds=None):
+        key = self.store.make_key(self.model_name, self.kind, prompt)
+        self.store.put(key, {
+            "key": key,
+            "model_name": self.model_name,
+            "kind": self.kind,
+            "prompt": prompt,
+            "response": response,
+            "chunks": chunks,
+            "latency_seconds": latency_seconds,
+            "first_chunk_seconds": first_chunk_seconds,
+            "recorded_at": time.time()
+        })
+        logger.info(f"Recorded {self.model_name} call {key}")
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        prompt = serialize_input(input, self.kind)
+        started = time.perf_counter()
+        output = await self.model.ainvoke(input, config, **kwargs)
+        self._save(prompt, serialize_output(output), time.perf_counter() - started)
+        return output
+
+    async def astream(self, input, config=None, **kwargs):
+        prompt = serialize_input(input, self.kind)
+        started = time.perf_counter()
+        first_chunk_seconds = None
+        chunks = []
+        async for chunk in self.model.astream(input, config, **kwargs):
+            if first_chunk_seconds is None:
+                first_chunk_seconds = time.perf_counter() - started
+            chunks.append(serialize_output(chunk))
+            yield chunk
+
+        text = "".join(str(chunk["content"]) for chunk in chunks)
+        response = {"type": chunks[0]["type"] if chunks else "text", "content": text, "usage_metadata": None}
+        self._save(prompt, response, time.perf_counter() - started, chunks, first_chunk_seconds)
+
+    def invoke(self, input, config=None, **kwargs):
+        return asyncio.run(self.ainvoke(input, config, **kwargs))
+
+class ReplayModel(Runnable):
+    """
+    Runnable answering from the cassette store without calling any model.
+
+    The original latency of each call is reproduced, multiplied by `latency_scale`
+    (0 answers at once). A call that was never recorded raises CassetteMissError.
+    """
+    def __init__(self, model_name, kind, store: CassetteStore, latency_scale=1.0):
+        self.model_name = model_name
+        self.kind = kind
+        self.store = store
+        self.latency_scale = latency_scale
+
+    def _cassette(self, input):
+        key = self.store.make_key(self.model_name, self.kind, serialize_input(input, self.kind))
+        cassette = self.store.get(key)
+        if cassette is None:
+            raise CassetteMissError("No cassette recorded for this model call", self.model_name, key)
+        return cassette
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        cassette = self._cassette(input)
+        await asyncio.sleep(cassette["latency_seconds"] * self.latency_scale)
+        return deserialize_output(cassette["response"])
+
+    async def astream(self, input, config=None, **kwargs):
+        cassette = self._cassette(input)
+        chunks = cassette["chunks"] or [cassette["response"]]
+        first_chunk_seconds = cassette["first_chunk_seconds"] or cassette["latency_seconds"]
+        # The first chunk arrives after the recorded delay, the others are spread over the rest of the call
+        await asyncio.sleep(first_chunk_seconds * self.latency_scale)
+        interval = max(0.0, cassette["latency_seconds"] - first_chunk_seconds) / max(1, len(chunks) - 1)
+        for index, chunk in enumerate(chunks):
+            if index:
+                await asyncio.sleep(interval * self.latency_scale)
+            yield deserialize_output(chunk, chunk=True)
+
+    def invoke(self, input, config=None, **kwargs):
+        return asyncio.run(self.ainvoke(input, config, **kwargs))
+
+default_cassette_dir = os.environ.get("CASSETTE_DIR", os.path.join(tempfile.gettempdir(), "aipptbuilder", "cassettes"))
@@ -0,0 +1,256 @@
+from app.api.features.errors.document_loader_errors import FileHandlerError
+from app.api.features.utils.executor import run_in_executor
+from app.api.features.utils.http_client import get_http_client
+from app.api.logger import setup_logger
+from typing import NamedTuple
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+import httpx
+
+logger = setup_logger(__name__)
+
+# Response chunks are gathered up to this size before being written, so a download
+# takes one trip to the executor per buffer instead of one per chunk
+WRITE_BUFFER_BYTES = 1024 * 1024
+
+class DownloadedFile(NamedTuple):
+    path: str
+    sha256: str
+    # Temporary files belong to the caller and must be removed after use;
+    # cached blobs are owned by the download cache.
+    temporary: bool = True
+    # Id of the pin keeping the file from eviction until `remove_downloaded_file`
+    pin_id: str = None
+
+# Files handed out by the download caches and not released yet, by pin id
+_pins = {}
+_pins_lock = threading.Lock()
+
+def pin_file(path) -> str:
+    pin_id = uuid.uuid4().hex
+    with _pins_lock:
+        _pins[pin_id] = path
+    return pin_id
+
+def pinned_paths() -> set:
+    with _pins_lock:
+        return set(_pins.values())
+
+def remove_downloaded_file(downloaded_file: DownloadedFile):
+    """Releases a downloaded file once it has been parsed. Calling it again does nothing."""
+    if downloaded_file.pin_id is not None:
+        with _pins_lock:
+            _pins.pop(downloaded_file.pin_id, None)
+    if downloaded_file.temporary and os.path.exists(downloaded_file.path):
+        os.remove(downloaded_file.path)
+
+class DownloadCache:
+    """
+    Streams HTTP downloads to disk and keeps them as content-addressed blobs.
+
+    Responses are written chunk by chunk while being hashed, so memory use does not
+    grow with the file size, and the download is aborted as soon as it goes over
+    `max_file_bytes`. When the server sends an ETag or Last-Modified header the blob
+    is kept, and the next download of the same URL is revalidated with a conditional
+    GET; a 304 reuses the blob without transferring the body again.
+
+    The least recently used blobs are evicted, with their metadata, once the cache
+    is over `max_cache_bytes`. Files handed out by `fetch` are pinned until released
+    with `remove_downloaded_file`, so a blob is never evicted while it is being parsed.
+    """
+    def __init__(self, cache_dir, max_cache_bytes=1024 * 1024 * 1024, max_file_bytes=200 * 1024 * 1024, enabled=True):
+        self.cache_dir = cache_dir
+        self.blobs_dir = os.path.join(cache_dir, "blobs")
+        self.meta_dir = os.path.join(cache_dir, "meta")
+        self.max_cache_bytes = max_cache_bytes
+        self.max_file_bytes = max_file_bytes
+        self.enabled = enabled
+
+    def _meta_path(self, url):
+        return os.path.join(self.meta_dir, f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json")
+
+    def _read_meta(self, url):
+        try:
+            with open(self._meta_path(url), 'r') as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if not os.path.exists(meta.get("path", "")):
+            return None
+        return meta
+
+    def _write_meta(self, url, meta):
+        meta_path = self._meta_path(url)
+        with tempfile.NamedTemporaryFile('w', dir=self.meta_dir, delete=False, suffix=".tmp") as temp_file:
+            json.dump(meta, temp_file)
+        os.replace(temp_file.name, meta_path)
+
+    def _conditional_headers(self, meta):
+        headers = {}
+        if meta is None:
+            return headers
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def _blob_path(self, sha256, file_extension):
+        return os.path.join(self.blobs_dir, f"{sha256}.{file_extension}")
+
+    def _evict(self):
+        blobs = []
+        total_bytes = 0
+        for name in os.listdir(self.blobs_dir):
+            path = os.path.join(self.blobs_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            total_bytes += stat.st_size
+            # Downloads in progress are not blobs yet
+            if not name.endswith(".part"):
+                blobs.append((stat.st_mtime, stat.st_size, path))
+
+        pinned = pinned_paths()
+        evicted = set()
+        for _, size, path in sorted(blobs):
+            if total_bytes <= self.max_cache_bytes:
+                break
+            if path in pinned:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            evicted.add(path)
+            total_bytes -= size
+
+        if evicted:
+            self._evict_meta(evicted)
+
+    def _evict_meta(self, evicted):
+        for name in os.listdir(self.meta_dir):
+            meta_path = os.path.join(self.meta_dir, name)
+            try:
+                with open(meta_path, 'r') as file:
+                    blob_path = json.load(file).get("path")
+            except (OSError, ValueError):
+                continue
+            if blob_path in evicted:
+                self._discard(meta_path)
+
+    def _pinned(self, path, sha256, temporary) -> DownloadedFile:
+        return DownloadedFile(path, sha256, temporary, pin_id=pin_file(path))
+
+    async def fetch(self, url, file_extension, max_file_bytes=None) -> DownloadedFile:
+        """
+        Downloads a URL, reusing the cached copy when the server confirms it is unchanged.
+
+        Parameters:
+        url (str): The URL of the file.
+        file_extension (str): Extension given to the stored file so loaders can detect its type.
+        max_file_bytes (int): Optional per-call override of the size cutoff.
+
+        Returns:
+        DownloadedFile: The local path and the SHA-256 of the file contents.
+        """
+        max_file_bytes = max_file_bytes or self.max_file_bytes
+
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        os.makedirs(self.meta_dir, exist_ok=True)
+
+        meta = self._read_meta(url) if self.enabled else None
+        headers = self._conditional_headers(meta)
+
+        temp_path = os.path.join(self.blobs_dir, f"{uuid.uuid4()}.{file_extension}.part")
+        digest = hashlib.sha256()
+        size = 0
+
+        try:
+            async with get_http_client().stream("GET", url, headers=headers) as response:
+                if response.status_code == 304 and meta is not None:
+                    logger.info(f"Download cache hit for {url}")
+                    downloaded_file = self._pinned(meta["path"], meta["sha256"], temporary=False)
+                    # Touch the blob so eviction follows recency of use
+                    try:
+                        os.utime(meta["path"])
+                    except OSError:
+                        # Evicted by another process since its metadata was read
+                        remove_downloaded_file(downloaded_file)
+                        return await self.fetch(url, file_extension, max_file_bytes)
+                    return downloaded_file
+
+                response.raise_for_status()
+
+                content_length = response.headers.get("content-length")
+                if content_length is not None and int(content_length) > max_file_bytes:
+                    raise FileHandlerError(f"File is larger than the {max_file_bytes} bytes limit", url)
+
+                buffer = bytearray()
+                with open(temp_path, 'wb') as temp_file:
+                    async for chunk in response.aiter_bytes():
+                        size += len(chunk)
+                        if size > max_file_bytes:
+                            raise FileHandlerError(f"File is larger than the {max_file_bytes} bytes limit", url)
+                        digest.update(chunk)
+                        buffer += chunk
+                        if len(buffer) >= WRITE_BUFFER_BYTES:
+                            await run_in_executor(temp_file.write, bytes(buffer))
+                            buffer.clear()
+                    if buffer:
+                        await run_in_executor(temp_file.write, bytes(buffer))
+
+                etag = response.headers.get("etag")
+                last_modified = response.headers.get("last-modified")
+        except httpx.HTTPError as e:
+            self._discard(temp_path)
+            raise FileHandlerError(f"No file content available", url) from e
+        except BaseException:
+            self._discard(temp_path)
+            raise
+
+        sha256 = digest.hexdigest()
+
+        if not self.enabled or not (etag or last_modified):
+            # Without validators the file cannot be revalidated, so it is not kept
+            final_path = f"{temp_path[:-len('.part')]}"
+            os.replace(temp_path, final_path)
+            return self._pinned(final_path, sha256, temporary=True)
+
+        # Pinned before it is stored, so a concurrent eviction cannot remove it in between
+        blob_path = self._blob_path(sha256, file_extension)
+        downloaded_file = self._pinned(blob_path, sha256, temporary=False)
+        await run_in_executor(os.replace, temp_path, blob_path)
+        await run_in_executor(self._write_meta, url, {
+            "path": blob_path,
+            "sha256": sha256,
+            "size": size,
+            "etag": etag,
+            "last_modified": last_modified,
+            "stored_at": time.time()
+        })
+        await run_in_executor(self._evict)
+
+        logger.info(f"Downloaded {size} bytes from {url}")
+        return downloaded_file
+
+    def _discard(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+download_cache = DownloadCache(
+    cache_dir=os.environ.get("DOWNLOAD_CACHE_DIR", os.path.join(tempfile.gettempdir(), "aipptbuilder", "downloads")),
+    max_cache_bytes=int(os.environ.get("DOWNLOAD_CACHE_MAX_BYTES", str(1024 * 1024 * 1024))),
+    max_file_bytes=int(os.environ.get("DOWNLOAD_MAX_FILE_BYTES", str(200 * 1024 * 1024))),
+    enabled=os.environ.get("DOWNLOAD_CACHE_ENABLED", "true").lower() == "true"
+)
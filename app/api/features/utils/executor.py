@@ -0,0 +1,32 @@
+from concurrent.futures import ThreadPoolExecutor
+from app.api.logger import setup_logger
+
+import asyncio
+import functools
+import os
+
+logger = setup_logger(__name__)
+
+# Blocking work (file parsing, text splitting, PPTX rendering) runs here so the
+# event loop stays free to serve other requests.
+max_workers = int(os.environ.get("PIPELINE_MAX_WORKERS", "4"))
+
+executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline")
+
+async def run_in_executor(func, *args, **kwargs):
+    """
+    Runs a blocking callable on the bounded pipeline executor.
+
+    Parameters:
+    func (callable): The blocking function to run.
+    *args, **kwargs: Arguments forwarded to the function.
+
+    Returns:
+    Any: The return value of the function.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+def shutdown_executor():
+    logger.info("Shutting down the pipeline executor")
+    executor.shutdown(wait=False, cancel_futures=True)
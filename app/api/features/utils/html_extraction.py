@@ -0,0 +1,190 @@
+from app.api.features.errors.document_loader_errors import FileHandlerError
+from app.api.features.utils.executor import run_in_executor
+from app.api.features.utils.http_client import get_http_client
+from app.api.features.utils.lazy_import import LazyImport
+from app.api.logger import setup_logger
+
+import asyncio
+import codecs
+import httpx
+import ipaddress
+import os
+import re
+import socket
+
+logger = setup_logger(__name__)
+
+lxml_html = LazyImport("lxml.html")
+
+# Timeout of the page download, shorter than the default of the shared client
+url_fetch_timeout = float(os.environ.get("URL_FETCH_TIMEOUT_SECONDS", "20"))
+
+# Pages larger than this are refused instead of being read into memory
+url_max_bytes = int(os.environ.get("URL_MAX_BYTES", str(5 * 1024 * 1024)))
+
+# Pages yielding less text than this are handed to unstructured, they are likely rendered by scripts
+url_min_text_chars = int(os.environ.get("URL_MIN_TEXT_CHARS", "200"))
+
+# Pages on private, loopback and link-local addresses are refused unless this is set, as unstructured does
+url_allow_private_addresses = os.environ.get("URL_ALLOW_PRIVATE_ADDRESSES", "false").lower() == "true"
+
+MAX_REDIRECTS = 10
+
+HTML_CONTENT_TYPES = {"text/html", "application/xhtml+xml"}
+
+# Elements that never hold the article text. Headers and footers are kept inside an
+# article, where they hold its title and byline
+BOILERPLATE_XPATH = (
+    "//script|//style|//noscript|//template|//svg|//iframe|//form|//button|//select|//nav|//aside"
+    "|//header[not(ancestor::article or ancestor::main)]|//footer[not(ancestor::article or ancestor::main)]"
+    "|//*[@role='navigation' or @role='banner' or @role='contentinfo' or @role='complementary' or @aria-hidden='true']"
+)
+
+BLOCK_TAGS = (
+    "p", "div", "section", "article", "main", "li", "ul", "ol", "dl", "dt", "dd", "tr", "table",
+    "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "br", "hr", "figcaption", "caption"
+)
+
+SPACES_PATTERN = re.compile(r"[ \t\r\f\v\u00a0]+")
+
+def is_public_address(address) -> bool:
+    ip = ipaddress.ip_address(address.split("%")[0])
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+async def resolve_page_address(url: httpx.URL) -> str:
+    """
+    Returns the address to connect to for `url`, refusing URLs that are not http(s) or
+    whose host resolves to a non-public address. The request is then sent to this very
+    address, so the host cannot resolve elsewhere between the check and the connection.
+    """
+    if url.scheme not in ("http", "https") or not url.host:
+        raise FileHandlerError(f"Only http and https URLs are supported", str(url))
+
+    try:
+        address_infos = await asyncio.get_running_loop().getaddrinfo(url.host, url.port or (443 if url.scheme == "https" else 80), type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError) as e:
+        raise FileHandlerError(f"Unable to resolve the page host", str(url)) from e
+
+    addresses = [address_info[4][0] for address_info in address_infos]
+    if not url_allow_private_addresses and not all(is_public_address(address) for address in addresses):
+        raise FileHandlerError(f"URL targets a private address", str(url))
+    return addresses[0]
+
+async def fetch_html(url):
+    """
+    Downloads a page with the shared HTTP client, following redirects.
+
+    Parameters:
+    url (str): The page URL.
+
+    Returns:
+    tuple: The body bytes and the charset of the response, or None if the response is
+    not HTML and should be handled by unstructured.
+    """
+    page_url = httpx.URL(url)
+    try:
+        for _ in range(MAX_REDIRECTS + 1):
+            address = await resolve_page_address(page_url)
+            request = get_http_client().build_request(
+                "GET", page_url.copy_with(host=address), timeout=url_fetch_timeout,
+                headers={"Host": page_url.netloc.decode("ascii")}, extensions={"sni_hostname": page_url.host}
+            )
+            response = await get_http_client().send(request, stream=True, follow_redirects=False)
+            try:
+                if response.is_redirect:
+                    # Every hop is checked again, a public page may redirect to a private one
+                    page_url = page_url.join(response.headers["location"])
+                    continue
+
+                response.raise_for_status()
+                content_type = response.headers.get("content-type", "text/html").split(";")[0].strip().lower()
+                if content_type not in HTML_CONTENT_TYPES:
+                    logger.info(f"{url} is {content_type}, not HTML")
+                    return None
+
+                content_length = response.headers.get("content-length", "")
+                if content_length.isdigit() and int(content_length) > url_max_bytes:
+                    raise FileHandlerError(f"Page is larger than {url_max_bytes} bytes", url)
+
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body += chunk
+                    if len(body) > url_max_bytes:
+                        raise FileHandlerError(f"Page is larger than {url_max_bytes} bytes", url)
+                return bytes(body), response.charset_encoding
+            finally:
+                await response.aclose()
+    except httpx.HTTPError as e:
+        raise FileHandlerError(f"Unable to download the page", url) from e
+
+    raise FileHandlerError(f"Too many redirects", url)
+
+def html_parser(encoding):
+    """
+    Returns an lxml HTML parser for the charset of a response. Charsets unknown to
+    Python or to libxml2 are left to libxml2 to detect from the page itself.
+    """
+    if encoding:
+        try:
+            encoding = codecs.lookup(encoding).name
+        except LookupError:
+            encoding = None
+    try:
+        return lxml_html.resolve().HTMLParser(encoding=encoding, remove_comments=True)
+    except LookupError:
+        return lxml_html.resolve().HTMLParser(encoding=None, remove_comments=True)
+
+def extract_html_text(body: bytes, encoding=None) -> str:
+    """
+    Returns the readable text of an HTML page, one block per line, without the
+    navigation, headers, footers, scripts and styles. The <article> or <main> element
+    is used when the page has a single one.
+    """
+    parser = html_parser(encoding)
+    root = lxml_html.resolve().document_fromstring(body, parser=parser)
+
+    for element in root.xpath(BOILERPLATE_XPATH):
+        element.drop_tree()
+
+    # Listing pages have several articles, their text is read from the whole body
+    articles = root.findall(".//article")
+    content = articles[0] if len(articles) == 1 else root.find(".//main")
+    if content is None or not content.text_content().strip():
+        content = root.find("body")
+    if content is None:
+        content = root
+
+    # Blocks are closed with a line break so their text is not glued to the next one
+    for element in content.iter(*BLOCK_TAGS):
+        element.tail = "\n" + (element.tail or "")
+
+    lines = (SPACES_PATTERN.sub(" ", line).strip() for line in content.text_content().split("\n"))
+    return "\n".join(line for line in lines if line)
+
+async def load_html_text(url):
+    """
+    Extracts the text of a page without unstructured.
+
+    Parameters:
+    url (str): The page URL.
+
+    Returns:
+    str: The page text, or None if the page is not HTML, cannot be parsed or yields too
+    little text.
+    """
+    page = await fetch_html(url)
+    if page is None:
+        return None
+
+    try:
+        text = await run_in_executor(extract_html_text, *page)
+    except Exception as e:
+        # Empty or unparsable pages are left to unstructured
+        logger.warning(f"Could not parse the HTML of {url}: {e}")
+        return None
+    if len(text) < url_min_text_chars:
+        logger.info(f"Only {len(text)} characters extracted from {url}")
+        return None
+    return text
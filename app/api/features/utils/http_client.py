@@ -0,0 +1,36 @@
+from app.api.logger import setup_logger
+
+import httpx
+import os
+
+logger = setup_logger(__name__)
+
+http_timeout = float(os.environ.get("HTTP_TIMEOUT_SECONDS", "60"))
+
+# Connections are pooled per host and kept alive between downloads
+http_limits = httpx.Limits(
+    max_connections=int(os.environ.get("HTTP_MAX_CONNECTIONS", "100")),
+    max_keepalive_connections=int(os.environ.get("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")),
+    keepalive_expiry=float(os.environ.get("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+)
+
+_client = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the shared async HTTP client, creating it on first use.
+
+    Reusing a single client keeps connections alive between requests instead of
+    opening a new one for every download.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(timeout=http_timeout, limits=http_limits, follow_redirects=True)
+    return _client
+
+async def close_http_client():
+    global _client
+    if _client is not None and not _client.is_closed:
+        logger.info("Closing the shared HTTP client")
+        await _client.aclose()
+    _client = None
@@ -0,0 +1,139 @@
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.parts.image import Image, ImagePart
+from pptx.util import Inches
+from app.api.logger import setup_logger
+
+from io import BytesIO
+from typing import NamedTuple
+import os
+import threading
+
+from PIL import Image as PILImage
+
+logger = setup_logger(__name__)
+
+FEATURES_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tiff")
+
+class ImageAsset(NamedTuple):
+    name: str
+    # python-pptx image with its sha1, size and dpi already computed
+    image: Image
+    width_px: int
+    height_px: int
+
+def _prepared_image(blob, filename):
+    image = Image.from_blob(blob, filename)
+    # The properties are cached on the instance, so every deck reuses them
+    for attribute in ("sha1", "size", "dpi", "content_type"):
+        getattr(image, attribute)
+    return image
+
+class ImageAssetStore:
+    """
+    Keeps the slide pictures decoded and hashed in memory for the life of the process.
+
+    Each asset is read from disk once. Variants resized to a placement box are created
+    on first use and cached, so a picture is never embedded larger than it is displayed.
+    Pictures are added to slides through `add_picture`, which reuses the image part of
+    the deck instead of hashing the file again for every slide.
+    """
+    def __init__(self, directory, dpi=150):
+        self.directory = directory
+        self.dpi = dpi
+        self.assets = {}
+        self.resized = {}
+        self.lock = threading.Lock()
+
+    def names(self):
+        return sorted(
+            file_name for file_name in os.listdir(self.directory)
+            if file_name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+
+    def _load_asset(self, name):
+        with open(os.path.join(self.directory, name), 'rb') as file:
+            image = _prepared_image(file.read(), name)
+        width_px, height_px = image.size
+        return ImageAsset(name, image, width_px, height_px)
+
+    def load(self, boxes=()):
+        """
+        Reads every image of the directory and prepares the resized variants for the given boxes.
+
+        Parameters:
+        boxes (iterable): (width, height) placement boxes in inches.
+        """
+        for name in self.names():
+            self.get(name)
+            for width, height in boxes:
+                self.get(name, (width, height))
+        logger.info(f"Image asset store loaded {len(self.assets)} images and {len(self.resized)} resized variants")
+
+    def get(self, name, box=None) -> ImageAsset:
+        """
+        Returns the asset, resized to fit `box` at the store resolution when a box is given.
+
+        Raises:
+        KeyError: If there is no image with this name in the asset directory.
+        """
+        with self.lock:
+            if name not in self.assets:
+                if name not in self.names():
+                    raise KeyError(name)
+                self.assets[name] = self._load_asset(name)
+            if box is None:
+                return self.assets[name]
+
+            key = (name, tuple(box))
+            if key not in self.resized:
+                self.resized[key] = self._resize(self.assets[name], box)
+            return self.resized[key]
+
+    def _resize(self, asset, box):
+        max_size = (round(box[0] * self.dpi), round(box[1] * self.dpi))
+        if asset.width_px <= max_size[0] and asset.height_px <= max_size[1]:
+            return asset
+
+        pil_image = PILImage.open(BytesIO(asset.image.blob))
+        image_format = pil_image.format
+        pil_image.thumbnail(max_size, PILImage.LANCZOS)
+
+        resized_file = BytesIO()
+        if image_format == "JPEG":
+            pil_image.save(resized_file, format=image_format, quality=85, optimize=True)
+        else:
+            pil_image.save(resized_file, format=image_format, optimize=True)
+        blob = resized_file.getvalue()
+
+        # Re-encoding a small file can make it bigger, in which case the original is kept
+        if len(blob) >= len(asset.image.blob):
+            return asset
+
+        image = _prepared_image(blob, asset.name)
+        logger.info(f"Resized {asset.name} from {asset.width_px}x{asset.height_px} to {image.size[0]}x{image.size[1]}")
+        return ImageAsset(asset.name, image, *image.size)
+
+def add_picture(slide, asset: ImageAsset, left, top, width, height, image_parts: dict):
+    """
+    Adds the asset to the slide as a picture, the same way `slide.shapes.add_picture` does.
+
+    Parameters:
+    image_parts (dict): Image parts already added to this deck, by sha1. The first slide
+    using an asset creates its part and the following slides relate to it.
+    """
+    image_part = image_parts.get(asset.image.sha1)
+    if image_part is None:
+        image_part = ImagePart.new(slide.part.package, asset.image)
+        image_parts[asset.image.sha1] = image_part
+
+    rId = slide.part.relate_to(image_part, RT.IMAGE)
+    pic = slide.shapes._add_pic_from_image_part(image_part, rId, Inches(left), Inches(top), Inches(width), Inches(height))
+    slide.shapes._recalculate_extents()
+    return pic
+
+image_asset_store = ImageAssetStore(
+    os.environ.get("IMAGE_ASSETS_DIR", os.path.join(FEATURES_DIR, "images")),
+    dpi=int(os.environ.get("IMAGE_ASSETS_DPI", "150"))
+)
@@ -0,0 +1,233 @@
+from app.api.features.utils.lazy_import import LazyImport
+from app.api.logger import setup_logger
+from collections import OrderedDict
+from io import BytesIO
+from typing import NamedTuple
+
+import json
+import os
+import tempfile
+import threading
+
+logger = setup_logger(__name__)
+
+Image = LazyImport("PIL.Image")
+ImageOps = LazyImport("PIL.ImageOps")
+numpy = LazyImport("numpy")
+
+# Longest side of the images sent to the model, larger ones are downscaled
+image_max_side = int(os.environ.get("IMAGE_MAX_SIDE", "1536"))
+
+# Largest image decoded, in pixels. Bigger ones, e.g. decompression bombs, are rejected from their header
+image_max_pixels = int(os.environ.get("IMAGE_MAX_PIXELS", str(50 * 1000 * 1000)))
+
+image_jpeg_quality = int(os.environ.get("IMAGE_JPEG_QUALITY", "85"))
+
+# Side of the difference hash grid, the hash has HASH_SIZE * HASH_SIZE bits
+HASH_SIZE = 16
+
+# Side of the grayscale thumbnail comparing the candidates found by hash, and of its blocks
+THUMBNAIL_SIZE = 128
+THUMBNAIL_BLOCK = 4
+
+# Near-duplicates are at most this many bits apart
+image_duplicate_max_distance = int(os.environ.get("IMAGE_DUPLICATE_MAX_DISTANCE", "8"))
+
+# Largest difference allowed in any thumbnail block, in standard deviations of the image.
+# Resizing and re-encoding stay under 0.15, a changed word on a slide is above 0.25
+image_duplicate_max_difference = float(os.environ.get("IMAGE_DUPLICATE_MAX_DIFFERENCE", "0.2"))
+
+class PreparedImage(NamedTuple):
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+    # Difference hash of the picture, close for images that look alike
+    perceptual_hash: int
+    # Grayscale THUMBNAIL_SIZE square of the picture, as PNG
+    thumbnail: bytes
+
+def difference_hash(image) -> int:
+    """
+    Returns the difference hash of an image: each bit tells whether a pixel of the
+    grayscale thumbnail is brighter than its right neighbour. Resizing, re-encoding
+    and small edits flip few bits, so near-duplicates have a small Hamming distance.
+    """
+    thumbnail = image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.resolve().Resampling.LANCZOS)
+    pixels = thumbnail.tobytes()
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for column in range(HASH_SIZE):
+            value = (value << 1) | (pixels[offset + column] > pixels[offset + column + 1])
+    return value
+
+def make_thumbnail(image) -> bytes:
+    output = BytesIO()
+    image.convert("L").resize((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.resolve().Resampling.BOX).save(output, format="PNG")
+    return output.getvalue()
+
+def thumbnails_match(thumbnail, other_thumbnail) -> bool:
+    """
+    Tells whether two thumbnails show the same picture. Both are normalized to zero mean
+    and unit variance, then compared block by block, so a local change such as another
+    word on a slide of the same template is not averaged away by the rest of the image.
+    """
+    np = numpy.resolve()
+    blocks = THUMBNAIL_SIZE // THUMBNAIL_BLOCK
+    normalized = []
+    for data in (thumbnail, other_thumbnail):
+        with Image.resolve().open(BytesIO(data)) as image:
+            pixels = np.asarray(image, dtype=np.float32)
+        normalized.append((pixels - pixels.mean()) / (pixels.std() + 1e-6))
+    difference = np.abs(normalized[0] - normalized[1]).reshape(blocks, THUMBNAIL_BLOCK, blocks, THUMBNAIL_BLOCK).mean(axis=(1, 3))
+    return float(difference.max()) <= image_duplicate_max_difference
+
+def prepare_image(image_bytes, mime_type) -> PreparedImage:
+    """
+    Downscales an image to `image_max_side` and re-encodes it as JPEG. Images that need
+    no downscaling keep their original bytes when those are smaller. Transparent areas are flattened on
+    white and only the first frame of an animation is kept.
+
+    Images over `image_max_pixels` raise a DecompressionBombError before being decoded.
+
+    Parameters:
+    image_bytes (bytes): The downloaded image.
+    mime_type (str): Its content type.
+
+    Returns:
+    PreparedImage: The image to send to the model and its perceptual hash.
+    """
+    pil_image = Image.resolve()
+    with pil_image.open(BytesIO(image_bytes)) as image:
+        if image.width * image.height > image_max_pixels:
+            raise pil_image.DecompressionBombError(f"Image of {image.width}x{image.height} pixels is over the {image_max_pixels} pixels limit")
+        image.seek(0)
+        # Read before `draft`, which changes the reported size
+        downscaled = max(image.size) > image_max_side
+        # JPEGs are decoded directly at a reduced scale, at least as large as the target size
+        if downscaled:
+            scale = image_max_side / max(image.size)
+            image.draft("RGB", (int(image.width * scale) + 1, int(image.height * scale) + 1))
+        # Photos are often stored sideways with an orientation tag
+        image = ImageOps.resolve().exif_transpose(image)
+
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = pil_image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+        if max(image.size) > image_max_side:
+            image.thumbnail((image_max_side, image_max_side), pil_image.Resampling.LANCZOS)
+
+        # Hashed after downscaling, which is much cheaper and gives the same result for every source size
+        perceptual_hash = difference_hash(image)
+        thumbnail = make_thumbnail(image)
+
+        output = BytesIO()
+        image.save(output, format="JPEG", quality=image_jpeg_quality, optimize=True)
+        width, height = image.size
+
+    if not downscaled and output.tell() >= len(image_bytes) and mime_type in ("image/jpeg", "image/png", "image/webp"):
+        return PreparedImage(image_bytes, mime_type, width, height, perceptual_hash, thumbnail)
+    return PreparedImage(output.getvalue(), "image/jpeg", width, height, perceptual_hash, thumbnail)
+
+class ImageHashIndex:
+    """
+    Remembers the images already summarized and the summary cache key of each, so a
+    near-duplicate image can reuse its summary.
+
+    Candidates are the images whose hashes differ by at most `max_distance` bits and
+    whose aspect ratios differ by less than 2%. Hashes alone cannot tell apart slides of
+    the same template, so a candidate only matches if its thumbnail passes
+    `thumbnails_match`. The last `max_entries` images are kept: the hashes in memory and
+    in an index file, the thumbnails as files next to it.
+    """
+    def __init__(self, index_dir, max_entries=10000, max_distance=8, max_candidates=5):
+        self.index_dir = index_dir
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.max_candidates = max_candidates
+        self.entries = None
+        self.lock = threading.Lock()
+
+    def _index_path(self):
+        return os.path.join(self.index_dir, "index.json")
+
+    def _thumbnail_path(self, cache_key):
+        return os.path.join(self.index_dir, f"{cache_key}.png")
+
+    def _load(self):
+        if self.entries is not None:
+            return
+        self.entries = OrderedDict()
+        try:
+            with open(self._index_path(), 'r', encoding='utf-8') as file:
+                for perceptual_hash, aspect_ratio, cache_key in json.load(file):
+                    self.entries[cache_key] = (int(perceptual_hash, 16), aspect_ratio)
+        except (OSError, ValueError):
+            pass
+
+    def _read_thumbnail(self, cache_key):
+        try:
+            with open(self._thumbnail_path(cache_key), 'rb') as file:
+                return file.read()
+        except OSError:
+            return None
+
+    def find(self, image: PreparedImage) -> str:
+        """Returns the summary cache key of a near-duplicate of the image, or None."""
+        if self.max_distance < 0:
+            return None
+        aspect_ratio = image.width / image.height
+        with self.lock:
+            self._load()
+            candidates = []
+            for cache_key, (perceptual_hash, other_ratio) in self.entries.items():
+                distance = (perceptual_hash ^ image.perceptual_hash).bit_count()
+                if distance <= self.max_distance and abs(aspect_ratio - other_ratio) < 0.02 * max(aspect_ratio, other_ratio):
+                    candidates.append((distance, cache_key))
+
+        for distance, cache_key in sorted(candidates)[:self.max_candidates]:
+            thumbnail = self._read_thumbnail(cache_key)
+            if thumbnail is not None and thumbnails_match(image.thumbnail, thumbnail):
+                logger.info(f"Found a near-duplicate image {distance} bits away")
+                with self.lock:
+                    if cache_key in self.entries:
+                        self.entries.move_to_end(cache_key)
+                return cache_key
+        return None
+
+    def add(self, image: PreparedImage, cache_key):
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(self._thumbnail_path(cache_key), 'wb') as file:
+            file.write(image.thumbnail)
+
+        evicted = []
+        with self.lock:
+            self._load()
+            self.entries[cache_key] = (image.perceptual_hash, image.width / image.height)
+            self.entries.move_to_end(cache_key)
+            while len(self.entries) > self.max_entries:
+                evicted.append(self.entries.popitem(last=False)[0])
+            rows = [[f"{perceptual_hash:x}", aspect_ratio, key] for key, (perceptual_hash, aspect_ratio) in self.entries.items()]
+
+        for evicted_key in evicted:
+            try:
+                os.remove(self._thumbnail_path(evicted_key))
+            except OSError:
+                pass
+
+        # Write to a temporary file first so readers never see a partial index
+        with tempfile.NamedTemporaryFile('w', dir=self.index_dir, delete=False, suffix=".tmp", encoding='utf-8') as temp_file:
+            json.dump(rows, temp_file)
+        os.replace(temp_file.name, self._index_path())
+
+image_hash_index = ImageHashIndex(
+    os.environ.get("IMAGE_HASH_INDEX_DIR", os.path.join(tempfile.gettempdir(), "aipptbuilder", "image_hashes")),
+    max_entries=int(os.environ.get("IMAGE_HASH_INDEX_MAX_ENTRIES", "10000")),
+    max_distance=image_duplicate_max_distance
+)
@@ -0,0 +1,32 @@
+import importlib
+import threading
+
+class LazyImport:
+    """
+    Reference to a module or attribute that is only imported on first use.
+
+    The import path is either a module name ("gdown") or a module name and an
+    attribute separated by a colon ("langchain_community.document_loaders.pdf:PyPDFLoader").
+    """
+    def __init__(self, import_path):
+        self.import_path = import_path
+        self._resolved = None
+        self._lock = threading.Lock()
+
+    def resolve(self):
+        if self._resolved is None:
+            with self._lock:
+                if self._resolved is None:
+                    module_name, _, attribute = self.import_path.partition(":")
+                    resolved = importlib.import_module(module_name)
+                    if attribute:
+                        resolved = getattr(resolved, attribute)
+                    self._resolved = resolved
+        return self._resolved
+
+    @property
+    def is_loaded(self):
+        return self._resolved is not None
+
+    def __repr__(self):
+        return f"LazyImport({self.import_path!r})"
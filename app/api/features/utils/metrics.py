@@ -0,0 +1,134 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+
+import time
+
+# Metrics live in their own registry, so only the pipeline metrics are exported
+registry = CollectorRegistry(auto_describe=True)
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8)
+
+LENGTH_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+stage_duration = Histogram(
+    "aipptbuilder_stage_duration_seconds", "Duration of each pipeline stage",
+    ["stage", "file_type", "model"], buckets=STAGE_BUCKETS, registry=registry
+)
+
+stage_total = Counter(
+    "aipptbuilder_stage", "Pipeline stages run, by outcome",
+    ["stage", "file_type", "model", "outcome"], registry=registry
+)
+
+http_request_duration = Histogram(
+    "aipptbuilder_http_request_duration_seconds", "Duration of the HTTP requests",
+    ["method", "route", "status"], buckets=STAGE_BUCKETS, registry=registry
+)
+
+input_bytes = Histogram(
+    "aipptbuilder_input_bytes", "Size of the downloaded source files",
+    ["file_type"], buckets=SIZE_BUCKETS, registry=registry
+)
+
+summary_characters = Histogram(
+    "aipptbuilder_summary_characters", "Length of the generated summaries",
+    ["file_type"], buckets=LENGTH_BUCKETS, registry=registry
+)
+
+image_upload_bytes = Histogram(
+    "aipptbuilder_image_upload_bytes", "Size of the images sent to the model, after preprocessing",
+    buckets=SIZE_BUCKETS, registry=registry
+)
+
+model_tokens = Counter(
+    "aipptbuilder_model_tokens", "Model tokens, reported by the model or estimated",
+    ["model", "direction"], registry=registry
+)
+
+_file_type = ContextVar("metrics_file_type", default="none")
+
+def set_file_type(file_type):
+    """Labels the stages recorded afterwards in the current context with the source file type."""
+    return _file_type.set(str(file_type or "none").lower())
+
+def current_file_type() -> str:
+    return _file_type.get()
+
+@contextmanager
+def track_stage(stage, model="none"):
+    """
+    Times a pipeline stage and counts its outcome, labeled with the file type of the
+    current request. Works around blocking code as well as code that awaits.
+
+    Parameters:
+    stage (str): The stage name, e.g. "download" or "render".
+    model (str): The model called by the stage, if any.
+    """
+    labels = {"stage": stage, "file_type": current_file_type(), "model": model}
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "success"
+    finally:
+        stage_duration.labels(**labels).observe(time.perf_counter() - started)
+        stage_total.labels(outcome=outcome, **labels).inc()
+
+def observe_input_bytes(size):
+    input_bytes.labels(file_type=current_file_type()).observe(size)
+
+def observe_summary(summary):
+    summary_characters.labels(file_type=current_file_type()).observe(len(summary or ""))
+
+def observe_image_upload(size):
+    image_upload_bytes.observe(size)
+
+def record_model_tokens(model_name, input_tokens, output_tokens):
+    model_tokens.labels(model=model_name, direction="input").inc(input_tokens)
+    model_tokens.labels(model=model_name, direction="output").inc(output_tokens)
+
+def observe_http_request(method, route, status, seconds):
+    http_request_duration.labels(method=method, route=route, status=str(status)).observe(seconds)
+
+class StatsCollector:
+    """
+    Exports the numbers of an existing `stats()` method as gauges, read at scrape time.
+
+    Parameters:
+    name (str): Metric name prefix, e.g. "response_cache".
+    stats (callable): Returns a dict of numbers, or with `label` set, a dict of such
+    dicts keyed by the label value (e.g. the metrics of every model governor).
+    label (str): Label name for the keys of the outer dict.
+    """
+    def __init__(self, name, stats, label=None):
+        self.name = name
+        self.stats = stats
+        self.label = label
+
+    def collect(self):
+        stats = self.stats()
+        groups = stats.items() if self.label else [(None, stats)]
+        families = {}
+        for label_value, values in groups:
+            for key, value in values.items():
+                if not isinstance(value, (int, float)):
+                    continue
+                if key not in families:
+                    families[key] = GaugeMetricFamily(
+                        f"aipptbuilder_{self.name}_{key}", f"{key} of the {self.name}".replace("_", " "),
+                        labels=[self.label] if self.label else []
+                    )
+                families[key].add_metric([label_value] if self.label else [], value)
+        return list(families.values())
+
+def register_stats(name, stats, label=None):
+    registry.register(StatsCollector(name, stats, label))
+
+def render_metrics() -> bytes:
+    return generate_latest(registry)
@@ -0,0 +1,431 @@
+from langchain_core.runnables import Runnable
+from app.api.features.utils.metrics import record_model_tokens
+from app.api.logger import setup_logger
+
+import asyncio
+import collections
+import json
+import os
+import random
+import re
+import threading
+import time
+
+logger = setup_logger(__name__)
+
+# Client-side limits per model, overridable with the MODEL_RATE_LIMITS JSON environment variable
+DEFAULT_MODEL_LIMITS = {
+    "gemini-1.5-flash": {"requests_per_minute": 1000, "tokens_per_minute": 4000000, "max_concurrency": 32},
+    "gemini-1.5-pro": {"requests_per_minute": 360, "tokens_per_minute": 4000000, "max_concurrency": 16}
+}
+
+FALLBACK_MODEL_LIMITS = {"requests_per_minute": 60, "tokens_per_minute": 1000000, "max_concurrency": 8}
+
+# Tokens charged for an inline image, the fixed cost Gemini bills per image
+IMAGE_TOKENS = 258
+
+RETRYABLE_STATUS_CODES = {429, 500, 503, 504}
+
+RETRY_AFTER_PATTERNS = [
+    re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)"),
+    re.compile(r"retry in ([\d.]+)\s*s", re.IGNORECASE),
+    re.compile(r"retry-after:?\s*([\d.]+)", re.IGNORECASE)
+]
+
+def _error_chain(error):
+    while error is not None:
+        yield error
+        error = error.__cause__ or error.__context__
+
+def error_status_code(error):
+    """Returns the HTTP status of a model error, looking through wrapped exceptions."""
+    for cause in _error_chain(error):
+        for attribute in ("status_code", "code"):
+            value = getattr(cause, attribute, None)
+            if isinstance(value, int):
+                return value
+        if type(cause).__name__ in ("ResourceExhausted", "TooManyRequests"):
+            return 429
+        if "RESOURCE_EXHAUSTED" in str(cause) or re.search(r"\b429\b", str(cause)):
+            return 429
+    return None
+
+def retry_after_seconds(error):
+    """Returns the delay the server asked for, from a retry_after attribute, a Retry-After header or the message."""
+    for cause in _error_chain(error):
+        retry_after = getattr(cause, "retry_after", None)
+        if retry_after is not None:
+            return float(retry_after)
+        response = getattr(cause, "response", None)
+        headers = getattr(response, "headers", None)
+        if headers is not None and headers.get("retry-after"):
+            try:
+                return float(headers.get("retry-after"))
+            except ValueError:
+                pass
+        for pattern in RETRY_AFTER_PATTERNS:
+            match = pattern.search(str(cause))
+            if match:
+                return float(match.group(1))
+    return None
+
+def estimate_tokens(model_input) -> int:
+    """Roughly estimates the input tokens of a model call, at four characters per token."""
+    if hasattr(model_input, "to_messages"):
+        model_input = model_input.to_messages()
+    if isinstance(model_input, str):
+        return max(1, len(model_input) // 4)
+
+    tokens = 0
+    for message in model_input if isinstance(model_input, list) else [model_input]:
+        content = getattr(message, "content", message)
+        parts = content if isinstance(content, list) else [content]
+        for part in parts:
+            if isinstance(part, dict) and part.get("type") == "image_url":
+                tokens += IMAGE_TOKENS
+            elif isinstance(part, dict):
+                tokens += len(str(part.get("text", ""))) // 4
+            else:
+                tokens += len(str(part)) // 4
+    return max(1, tokens)
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate_per_minute`, holding at most `capacity`
+    tokens (a full minute of tokens by default).
+
+    `reserve` takes the tokens right away, letting the balance go negative, and returns
+    how long the caller has to wait for its reservation to be covered. Waiters are
+    therefore served in the order they arrived, without polling.
+    """
+    def __init__(self, rate_per_minute, clock=time.monotonic, capacity=None):
+        self.capacity = capacity or rate_per_minute
+        self.refill_per_second = rate_per_minute / 60
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated_at = clock()
+        self.lock = threading.Lock()
+
+    def reserve(self, amount) -> float:
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second)
+            self.updated_at = now
+            # A single call larger than the bucket would never fit, it waits for a full bucket instead
+            self.tokens -= min(amount, self.capacity)
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.refill_per_second
+
+class ConcurrencyLimit:
+    """
+    Semaphore shared by every event loop of the process. asyncio semaphores belong to a
+    single loop, while synchronous callers (`asyncio.run`) and Gradio run their own, so
+    the slots are counted under a thread lock and handed over to the waiters of any loop
+    in the order they arrived.
+    """
+    def __init__(self, limit):
+        self.available = limit
+        self.waiters = collections.deque()
+        self.lock = threading.Lock()
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            if self.available > 0 and not self.waiters:
+                self.available -= 1
+                return
+            waiter = (loop, loop.create_future())
+            self.waiters.append(waiter)
+
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self.lock:
+                queued = waiter in self.waiters
+                if queued:
+                    self.waiters.remove(waiter)
+            # A slot handed over just before the cancellation is passed on. A cancelled
+            # future whose hand-over is still scheduled is passed on by `_hand_over`
+            if not queued and waiter[1].done() and not waiter[1].cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        while True:
+            with self.lock:
+                if not self.waiters:
+                    self.available += 1
+                    return
+                loop, future = self.waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(self._hand_over, future)
+                return
+            except RuntimeError:
+                # The loop of this waiter is closed, the slot goes to the next one
+                continue
+
+    def _hand_over(self, future):
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+class ModelGovernor:
+    """
+    Client-side governor for the calls to one model.
+
+    Every call reserves one request and its estimated tokens from the per-minute token
+    buckets and takes one of `max_concurrency` slots. Rate limit and transient server
+    errors are retried with jittered exponential backoff; a delay given by the server
+    (Retry-After) is used instead and also pauses the other calls to the same model,
+    so a burst backs off together instead of retrying into the limit.
+
+    The limits hold across event loops. `throttled_seconds` counts the wall-clock time
+    during which at least one call was held back.
+    """
+    def __init__(self, model_name, requests_per_minute, tokens_per_minute, max_concurrency, max_retries=5,
+                 backoff_base_seconds=1.0, backoff_max_seconds=60.0, burst_seconds=60.0, clock=time.monotonic, sleep=asyncio.sleep):
+        self.model_name = model_name
+        # The buckets hold `burst_seconds` worth of requests and tokens
+        self.request_bucket = TokenBucket(requests_per_minute, clock, requests_per_minute * burst_seconds / 60)
+        self.token_bucket = TokenBucket(tokens_per_minute, clock, tokens_per_minute * burst_seconds / 60)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.clock = clock
+        self.sleep = sleep
+        self.paused_until = 0.0
+        self.concurrency_limit = ConcurrencyLimit(max_concurrency)
+        self._stats_lock = threading.Lock()
+        self._held_back = 0
+        self._held_back_since = 0.0
+
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.rate_limited = 0
+        self.retries = 0
+        self.failures = 0
+        self.throttled_seconds = 0.0
+
+    def _hold_back(self):
+        with self._stats_lock:
+            if self._held_back == 0:
+                self._held_back_since = self.clock()
+            self._held_back += 1
+
+    def _resume(self):
+        with self._stats_lock:
+            self._held_back -= 1
+            if self._held_back == 0:
+                self.throttled_seconds += self.clock() - self._held_back_since
+
+    async def _wait(self, seconds):
+        if seconds > 0:
+            self._hold_back()
+            try:
+                await self.sleep(seconds)
+            finally:
+                self._resume()
+
+    async def _acquire(self, tokens):
+        self.queue_depth += 1
+        try:
+            await self._wait(self.paused_until - self.clock())
+            await self._wait(max(self.request_bucket.reserve(1), self.token_bucket.reserve(tokens)))
+
+            self._hold_back()
+            try:
+                await self.concurrency_limit.acquire()
+            finally:
+                self._resume()
+        finally:
+            self.queue_depth -= 1
+        self.in_flight += 1
+        self.requests += 1
+
+    def _release(self):
+        self.in_flight -= 1
+        self.concurrency_limit.release()
+
+    def _backoff(self, attempt, error):
+        status_code = error_status_code(error)
+        retry_after = retry_after_seconds(error)
+        if status_code == 429:
+            self.rate_limited += 1
+
+        if retry_after is not None:
+            self.paused_until = max(self.paused_until, self.clock() + retry_after)
+            # A little jitter on top of the server delay spreads the calls resuming together
+            delay = retry_after + random.uniform(0, min(1.0, retry_after * 0.1))
+        else:
+            # Full jitter keeps the retries of a burst from landing at the same time
+            delay = random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt))
+
+        self.retries += 1
+        logger.warning(f"{self.model_name} call failed with status {status_code}, retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+        return delay
+
+    def _should_retry(self, attempt, error):
+        return attempt < self.max_retries and error_status_code(error) in RETRYABLE_STATUS_CODES
+
+    async def call(self, func, tokens=1):
+        """
+        Runs `await func()` under the limits of the model, retrying rate limit and server errors.
+
+        Parameters:
+        func (callable): Coroutine function making one model call.
+        tokens (int): Estimated tokens of the call.
+        """
+        attempt = 0
+        while True:
+            await self._acquire(tokens)
+            try:
+                return await func()
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    self.failures += 1
+                    raise
+                delay = self._backoff(attempt, e)
+            finally:
+                self._release()
+            await self._wait(delay)
+            attempt += 1
+
+    async def stream(self, func, tokens=1):
+        """
+        Yields from `func()`, an async iterator, under the limits of the model.
+
+        The slot is held until the stream ends. A failure is only retried before the first
+        chunk, since chunks already yielded cannot be taken back.
+        """
+        attempt = 0
+        while True:
+            await self._acquire(tokens)
+            started = False
+            try:
+                async for chunk in func():
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started or not self._should_retry(attempt, e):
+                    self.failures += 1
+                    raise
+                delay = self._backoff(attempt, e)
+            finally:
+                self._release()
+            await self._wait(delay)
+            attempt += 1
+
+    def metrics(self) -> dict:
+        with self._stats_lock:
+            throttled_seconds = self.throttled_seconds
+            if self._held_back:
+                throttled_seconds += self.clock() - self._held_back_since
+        return {
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+            "failures": self.failures,
+            "throttled_seconds": round(throttled_seconds, 3)
+        }
+
+def output_text(output) -> str:
+    content = getattr(output, "content", output)
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return str(content)
+
+class GovernedModel(Runnable):
+    """
+    Runnable wrapping a LangChain model so that every call to it goes through its governor.
+
+    The tokens of every call are recorded in the metrics, as reported by the model's
+    usage metadata when it has any, estimated otherwise.
+    """
+    def __init__(self, model, governor: ModelGovernor):
+        self.model = model
+        self.governor = governor
+
+    def _record_tokens(self, input_tokens, output, usage=None):
+        if usage:
+            record_model_tokens(self.governor.model_name, usage.get("input_tokens", input_tokens), usage.get("output_tokens", 0))
+        else:
+            record_model_tokens(self.governor.model_name, input_tokens, estimate_tokens(output_text(output)) if output else 0)
+
+    @property
+    def InputType(self):
+        return self.model.InputType
+
+    @property
+    def OutputType(self):
+        return self.model.OutputType
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        tokens = estimate_tokens(input)
+        output = await self.governor.call(lambda: self.model.ainvoke(input, config, **kwargs), tokens)
+        self._record_tokens(tokens, output, getattr(output, "usage_metadata", None))
+        return output
+
+    async def astream(self, input, config=None, **kwargs):
+        tokens = estimate_tokens(input)
+        text = []
+        usage = None
+        try:
+            async for chunk in self.governor.stream(lambda: self.model.astream(input, config, **kwargs), tokens):
+                text.append(output_text(chunk))
+                # LangChain chunks carry usage deltas, added up like the chunks themselves
+                chunk_usage = getattr(chunk, "usage_metadata", None)
+                if chunk_usage:
+                    usage = usage or {"input_tokens": 0, "output_tokens": 0}
+                    usage["input_tokens"] += chunk_usage.get("input_tokens", 0)
+                    usage["output_tokens"] += chunk_usage.get("output_tokens", 0)
+                yield chunk
+        finally:
+            self._record_tokens(tokens, "".join(text), usage)
+
+    def invoke(self, input, config=None, **kwargs):
+        # The pipeline only calls models asynchronously; synchronous callers get their own loop
+        return asyncio.run(self.ainvoke(input, config, **kwargs))
+
+class GovernorRegistry:
+    """Creates one governor per model name, so every chain using a model shares its limits."""
+    def __init__(self, model_limits=None, max_retries=5, backoff_base_seconds=1.0, backoff_max_seconds=60.0):
+        self.model_limits = dict(DEFAULT_MODEL_LIMITS, **(model_limits or {}))
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.governors = {}
+        self.lock = threading.Lock()
+
+    def get(self, model_name) -> ModelGovernor:
+        with self.lock:
+            if model_name not in self.governors:
+                limits = dict(FALLBACK_MODEL_LIMITS, **self.model_limits.get(model_name, {}))
+                self.governors[model_name] = ModelGovernor(
+                    model_name,
+                    max_retries=self.max_retries,
+                    backoff_base_seconds=self.backoff_base_seconds,
+                    backoff_max_seconds=self.backoff_max_seconds,
+                    **limits
+                )
+            return self.governors[model_name]
+
+    def govern(self, model, model_name) -> GovernedModel:
+        return GovernedModel(model, self.get(model_name))
+
+    def metrics(self) -> dict:
+        with self.lock:
+            return {model_name: governor.metrics() for model_name, governor in self.governors.items()}
+
+governor_registry = GovernorRegistry(
+    model_limits=json.loads(os.environ.get("MODEL_RATE_LIMITS", "{}")),
+    max_retries=int(os.environ.get("MODEL_MAX_RETRIES", "5")),
+    backoff_base_seconds=float(os.environ.get("MODEL_BACKOFF_BASE_SECONDS", "1")),
+    backoff_max_seconds=float(os.environ.get("MODEL_BACKOFF_MAX_SECONDS", "60"))
+)
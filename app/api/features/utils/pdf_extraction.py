@@ -0,0 +1,177 @@
+from app.api.logger import setup_logger
+from app.api.features.utils.lazy_import import LazyImport
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+
+import multiprocessing
+import os
+import re
+import threading
+
+logger = setup_logger(__name__)
+
+PdfReader = LazyImport("pypdf:PdfReader")
+
+# Worker processes import this module, LangChain is only needed in the parent
+Document = LazyImport("langchain_core.documents:Document")
+
+# Worker processes extracting page text, 0 or 1 extracts every PDF in the calling thread
+pdf_extract_processes = int(os.environ.get("PDF_EXTRACT_PROCESSES", str(min(4, os.cpu_count() or 1))))
+
+# Pages extracted by each task sent to a worker process
+pdf_pages_per_task = max(1, int(os.environ.get("PDF_PAGES_PER_TASK", "16")))
+
+# PDFs with fewer selected pages than this are extracted in the calling thread, the pool would only add overhead
+pdf_parallel_min_pages = int(os.environ.get("PDF_PARALLEL_MIN_PAGES", "32"))
+
+# Extraction stops once this much text is read, 0 reads every selected page
+pdf_max_text_chars = int(os.environ.get("PDF_MAX_TEXT_CHARS", "500000"))
+
+PAGE_RANGES_PATTERN = re.compile(r"^\s*\d+\s*(-\s*\d+\s*)?(,\s*\d+\s*(-\s*\d+\s*)?)*$")
+
+class PageSelection(NamedTuple):
+    """
+    Pages of a PDF to extract.
+
+    `pages` lists 1-based pages and inclusive ranges, e.g. "1-10,15"; pages past the
+    end of the document are ignored. `max_pages` keeps the first pages of the selection.
+    """
+    pages: Optional[str] = None
+    max_pages: Optional[int] = None
+
+    def page_indices(self, page_count) -> list:
+        """Returns the 0-based indices of the selected pages, in document order."""
+        if self.pages:
+            indices = set()
+            for page_range in self.pages.split(","):
+                start, _, end = page_range.partition("-")
+                start = int(start)
+                end = int(end) if end.strip() else start
+                indices.update(range(max(1, start) - 1, min(end, page_count)))
+            indices = sorted(indices)
+        else:
+            indices = list(range(page_count))
+        return indices[:self.max_pages] if self.max_pages else indices
+
+    def cache_tag(self) -> str:
+        return f"pages={self.pages or 'all'};max_pages={self.max_pages or 'all'}"
+
+def validate_page_ranges(pages):
+    if not PAGE_RANGES_PATTERN.match(pages):
+        raise ValueError("Pages must be page numbers or ranges separated by commas, e.g. '1-10,15'")
+    for page_range in pages.split(","):
+        start, _, end = page_range.partition("-")
+        if int(start) < 1 or (end.strip() and int(end) < int(start)):
+            raise ValueError(f"Invalid page range: {page_range.strip()}")
+    # Normalized so equivalent selections share their summary cache entries
+    return re.sub(r"\s+", "", pages)
+
+# Each worker keeps the reader of the last file it opened, so the document structure
+# is parsed once per worker instead of once per task
+_worker_reader = None
+_worker_reader_key = None
+
+def extract_page_batch(file_path, page_indices) -> list:
+    """Runs in a worker process: returns the text of the given pages."""
+    global _worker_reader, _worker_reader_key
+    stat = os.stat(file_path)
+    # Cached downloads are replaced in place, so the path alone does not identify the file
+    reader_key = (file_path, stat.st_mtime_ns, stat.st_size)
+    if _worker_reader_key != reader_key:
+        _worker_reader = PdfReader.resolve()(file_path)
+        _worker_reader_key = reader_key
+    return [_worker_reader.pages[index].extract_text().strip() for index in page_indices]
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # Workers are spawned rather than forked, forking a process running threads is unsafe
+            _process_pool = ProcessPoolExecutor(max_workers=pdf_extract_processes, mp_context=multiprocessing.get_context("spawn"))
+            logger.info(f"Started {pdf_extract_processes} PDF extraction processes")
+        return _process_pool
+
+def shutdown_pdf_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            logger.info("Shutting down the PDF extraction processes")
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
+
+def iter_pdf_pages(file_path, page_indices, reader=None):
+    """
+    Yields the (page index, text) of the given pages, in order.
+
+    Large selections are split into batches of `pdf_pages_per_task` pages extracted by
+    the process pool. At most two batches per worker are in flight, and the batches not
+    started yet are cancelled when the caller stops iterating.
+    """
+    if pdf_extract_processes <= 1 or len(page_indices) < pdf_parallel_min_pages:
+        reader = reader or PdfReader.resolve()(file_path)
+        for index in page_indices:
+            yield index, reader.pages[index].extract_text().strip()
+        return
+
+    pool = get_process_pool()
+    batches = iter([page_indices[start:start + pdf_pages_per_task] for start in range(0, len(page_indices), pdf_pages_per_task)])
+    pending = deque()
+
+    def submit_next():
+        batch = next(batches, None)
+        if batch is not None:
+            pending.append((batch, pool.submit(extract_page_batch, file_path, batch)))
+
+    try:
+        for _ in range(pdf_extract_processes * 2):
+            submit_next()
+        while pending:
+            batch, future = pending.popleft()
+            texts = future.result()
+            submit_next()
+            yield from zip(batch, texts)
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+def extract_pdf_pages(file_path, page_selection: PageSelection = None, max_chars=None) -> list:
+    """
+    Extracts the text of the selected pages of a PDF, stopping once `max_chars` are read.
+
+    Parameters:
+    file_path (str): Path of the PDF file.
+    page_selection (PageSelection): Pages to extract, every page by default.
+    max_chars (int): Text budget, `pdf_max_text_chars` by default. 0 reads every selected page.
+
+    Returns:
+    list: The Documents of the extracted pages, with their 0-based page number in the metadata.
+    """
+    max_chars = pdf_max_text_chars if max_chars is None else max_chars
+    reader = PdfReader.resolve()(file_path)
+    page_count = len(reader.pages)
+    page_indices = (page_selection or PageSelection()).page_indices(page_count)
+
+    documents = []
+    total_chars = 0
+    for index, text in iter_pdf_pages(file_path, page_indices, reader):
+        documents.append(Document.resolve()(page_content=text, metadata={"source": file_path, "page": index}))
+        total_chars += len(text)
+        if max_chars and total_chars >= max_chars:
+            logger.info(f"Stopped the PDF extraction at page {index + 1}, the text budget of {max_chars} characters is reached")
+            break
+
+    logger.info(f"Extracted {len(documents)} of {page_count} PDF pages")
+    return documents
+
+class PdfPageLoader:
+    """Document loader extracting the pages of a PDF with `extract_pdf_pages`, one Document per page."""
+    def __init__(self, file_path, page_selection: PageSelection = None):
+        self.file_path = file_path
+        self.page_selection = page_selection
+
+    def load(self) -> list:
+        return extract_pdf_pages(self.file_path, self.page_selection)
@@ -0,0 +1,214 @@
+from app.api.logger import setup_logger
+from collections import Counter
+from typing import NamedTuple
+
+import json
+import os
+import random
+import re
+import sys
+import sysconfig
+import tempfile
+import threading
+import time
+
+logger = setup_logger(__name__)
+
+# Blocking stages run on these threads, see utils/executor.py
+PIPELINE_THREAD_PREFIX = "pipeline"
+
+PROFILE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+class Profile(NamedTuple):
+    profile_id: str
+    method: str
+    path: str
+    status: int
+    started_at: float
+    duration_seconds: float
+    samples: int
+    file_path: str
+
+STDLIB_DIR = sysconfig.get_paths()["stdlib"]
+
+def _frame_label(code) -> str:
+    # Paths are shortened to the package or repo file they belong to, to keep the stacks readable
+    file_name = code.co_filename
+    if "site-packages" + os.sep in file_name:
+        file_name = file_name.split("site-packages" + os.sep, 1)[1]
+    elif file_name.startswith(ROOT_DIR):
+        file_name = os.path.relpath(file_name, ROOT_DIR)
+    elif file_name.startswith(STDLIB_DIR):
+        file_name = os.path.relpath(file_name, STDLIB_DIR)
+    return f"{code.co_name} ({file_name}:{code.co_firstlineno})".replace(";", ":")
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling the stacks of the event loop thread and of the pipeline
+    executor threads every `interval_seconds`.
+
+    The stacks are counted in the folded format ("root;caller;callee count") read by
+    flamegraph.pl, speedscope and most flamegraph viewers. Other requests served at the
+    same time share these threads, so their frames can appear in the profile too.
+    """
+    def __init__(self, interval_seconds=0.005, max_seconds=120.0):
+        self.interval_seconds = interval_seconds
+        self.max_seconds = max_seconds
+        self.stacks = Counter()
+        self.samples = 0
+        self._labels = {}
+        self._main_thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _target_threads(self):
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            name = thread_names.get(thread_id, "")
+            if thread_id == self._main_thread_id:
+                yield "event-loop", frame
+            elif name.startswith(PIPELINE_THREAD_PREFIX) and frame.f_code.co_name != "_worker":
+                # A worker whose innermost frame is the executor loop is idle, waiting for work
+                yield PIPELINE_THREAD_PREFIX, frame
+
+    def _sample(self):
+        for thread_label, frame in self._target_threads():
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                if code not in self._labels:
+                    self._labels[code] = _frame_label(code)
+                stack.append(self._labels[code])
+                frame = frame.f_back
+            stack.append(thread_label)
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self):
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval_seconds) and time.monotonic() < deadline:
+            self._sample()
+
+    def start(self):
+        # Started from the event loop, whose thread is the one serving the request
+        self._main_thread_id = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+class ProfileStore:
+    """Keeps the last `max_profiles` request profiles on disk, as a folded stack file and its metadata."""
+    def __init__(self, profile_dir, max_profiles=50):
+        self.profile_dir = profile_dir
+        self.max_profiles = max_profiles
+        self.lock = threading.Lock()
+
+    def _paths(self, profile_id):
+        return os.path.join(self.profile_dir, f"{profile_id}.folded"), os.path.join(self.profile_dir, f"{profile_id}.json")
+
+    def save(self, profile_id, profiler: SamplingProfiler, method, path, status, started_at, duration_seconds) -> Profile:
+        os.makedirs(self.profile_dir, exist_ok=True)
+        folded_path, meta_path = self._paths(profile_id)
+        profile = Profile(profile_id, method, path, status, started_at, duration_seconds, profiler.samples, folded_path)
+
+        with self.lock:
+            with open(folded_path, 'w', encoding='utf-8') as file:
+                file.write(profiler.folded())
+            with open(meta_path, 'w', encoding='utf-8') as file:
+                json.dump(profile._asdict(), file)
+            for old_profile in self.list()[self.max_profiles:]:
+                for old_path in self._paths(old_profile.profile_id):
+                    try:
+                        os.remove(old_path)
+                    except OSError:
+                        pass
+        return profile
+
+    def list(self) -> list:
+        """Returns the stored profiles, most recent first."""
+        profiles = []
+        try:
+            file_names = os.listdir(self.profile_dir)
+        except FileNotFoundError:
+            return profiles
+
+        for file_name in file_names:
+            if not file_name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.profile_dir, file_name), 'r', encoding='utf-8') as file:
+                    profiles.append(Profile(**json.load(file)))
+            except (OSError, ValueError, TypeError):
+                continue
+        return sorted(profiles, key=lambda profile: profile.started_at, reverse=True)
+
+    def get(self, profile_id) -> Profile:
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        try:
+            with open(self._paths(profile_id)[1], 'r', encoding='utf-8') as file:
+                profile = Profile(**json.load(file))
+        except (OSError, ValueError, TypeError):
+            return None
+        return profile if os.path.exists(profile.file_path) else None
+
+class RequestProfiling:
+    """
+    Decides which requests are profiled: those sent with the `X-Profile: 1` header, and a
+    random `sample_rate` fraction of the others. Only one request is profiled at a time,
+    the others run normally, which bounds the overhead while a profile is recorded. A
+    profile abandoned by a disconnected client frees its slot after `max_seconds`.
+    """
+    def __init__(self, enabled=False, sample_rate=0.0, interval_seconds=0.005, max_seconds=120.0, store: ProfileStore = None):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.interval_seconds = interval_seconds
+        self.max_seconds = max_seconds
+        self.store = store
+        self._active = None
+        self._lock = threading.Lock()
+
+    def should_profile(self, headers) -> bool:
+        if not self.enabled:
+            return False
+        if headers.get("x-profile", "").lower() in ("1", "true"):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self) -> SamplingProfiler:
+        """Returns a started profiler, or None if another request is being profiled."""
+        with self._lock:
+            if self._active is not None and self._active._thread.is_alive():
+                return None
+            self._active = SamplingProfiler(self.interval_seconds, self.max_seconds)
+            self._active.start()
+            return self._active
+
+    def finish(self, profiler: SamplingProfiler, profile_id, method, path, status, started_at) -> Profile:
+        profiler.stop()
+        with self._lock:
+            if self._active is profiler:
+                self._active = None
+        profile = self.store.save(profile_id, profiler, method, path, status, started_at, time.time() - started_at)
+        logger.info(f"Saved the profile of request {profile_id} ({profiler.samples} samples)")
+        return profile
+
+request_profiling = RequestProfiling(
+    enabled=os.environ.get("PROFILING_ENABLED", "false").lower() == "true",
+    sample_rate=float(os.environ.get("PROFILING_SAMPLE_RATE", "0")),
+    interval_seconds=float(os.environ.get("PROFILING_INTERVAL_SECONDS", "0.005")),
+    max_seconds=float(os.environ.get("PROFILING_MAX_SECONDS", "120")),
+    store=ProfileStore(
+        os.environ.get("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "aipptbuilder", "profiles")),
+        max_profiles=int(os.environ.get("PROFILE_MAX_COUNT", "50"))
+    )
+)
@@ -0,0 +1,170 @@
+from app.api.features.utils.executor import run_in_executor
+from app.api.logger import setup_logger
+from collections import OrderedDict
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+logger = setup_logger(__name__)
+
+class MemoryBackend:
+    """Least recently used entries in a dictionary, lost on restart. Values are kept as JSON so callers get their own copy."""
+    def __init__(self, max_entries=1024, ttl_seconds=24 * 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[0] > self.ttl_seconds:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return json.loads(entry[1])
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.time(), json.dumps(value))
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+class SQLiteBackend:
+    """Entries in a local SQLite file, shared by the workers of one host and kept across restarts."""
+    def __init__(self, path, max_entries=10000, ttl_seconds=7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self._connection = None
+
+    def _connect(self):
+        if self._connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, used_at REAL NOT NULL)"
+            )
+        return self._connection
+
+    def get(self, key):
+        with self.lock:
+            connection = self._connect()
+            row = connection.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if time.time() - row[1] > self.ttl_seconds:
+                connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            connection.execute("UPDATE responses SET used_at = ? WHERE key = ?", (time.time(), key))
+            return json.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        with self.lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, used_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            connection.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            connection.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def clear(self):
+        with self.lock:
+            self._connect().execute("DELETE FROM responses")
+
+class ResponseCache:
+    """
+    Exact-match cache of model responses.
+
+    The key is built from the normalized chain input, the hash of the prompt template and
+    the model name, so editing a prompt or switching models never returns a stale
+    response. Entries are stored by a pluggable backend with `get`, `set` and `clear`.
+    """
+    def __init__(self, backend, enabled=True):
+        self.backend = backend
+        self.enabled = enabled and backend is not None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(value):
+        # Whitespace and key order do not change the meaning of a request
+        if isinstance(value, str):
+            return " ".join(value.split())
+        if isinstance(value, dict):
+            return {key: ResponseCache.normalize(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [ResponseCache.normalize(item) for item in value]
+        return value
+
+    @staticmethod
+    def make_key(chain_input: dict, prompt: str, model_name: str) -> str:
+        key_source = json.dumps(
+            [ResponseCache.normalize(chain_input), hashlib.sha256(prompt.encode("utf-8")).hexdigest(), model_name],
+            sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        if self.enabled and value:
+            self.backend.set(key, value)
+
+    async def aget(self, key):
+        return await run_in_executor(self.get, key)
+
+    async def aset(self, key, value):
+        await run_in_executor(self.set, key, value)
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+def create_response_cache_backend(backend_name):
+    """
+    Creates the backend named by RESPONSE_CACHE_BACKEND: "memory", "sqlite" or "none".
+    """
+    ttl_seconds = int(os.environ.get("RESPONSE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    max_entries = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+
+    if backend_name == "memory":
+        return MemoryBackend(max_entries=max_entries, ttl_seconds=ttl_seconds)
+    if backend_name == "sqlite":
+        path = os.environ.get("RESPONSE_CACHE_PATH", os.path.join(tempfile.gettempdir(), "aipptbuilder", "responses.sqlite3"))
+        return SQLiteBackend(path, max_entries=max_entries, ttl_seconds=ttl_seconds)
+    if backend_name == "none":
+        return None
+    raise ValueError(f"Unknown response cache backend: {backend_name}")
+
+ppt_response_cache = ResponseCache(create_response_cache_backend(os.environ.get("RESPONSE_CACHE_BACKEND", "memory").lower()))
@@ -0,0 +1,44 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+import asyncio
+
+STAGES = ("download", "summarize", "generate", "render")
+
+_stage_limits = ContextVar("stage_limits", default=None)
+
+def create_stage_limits(**limits) -> dict:
+    """
+    Creates one semaphore per pipeline stage.
+
+    Parameters:
+    **limits: Maximum concurrency by stage name, e.g. download=8. A missing or
+    zero limit leaves the stage unlimited.
+
+    Returns:
+    dict: The semaphores by stage name.
+    """
+    unknown = set(limits) - set(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown pipeline stages: {', '.join(sorted(unknown))}")
+    return {stage: asyncio.Semaphore(limit) for stage, limit in limits.items() if limit}
+
+def use_stage_limits(limits: dict):
+    """
+    Applies the stage limits to the current context.
+
+    Tasks created afterwards inherit the context, so every workflow they run shares
+    the same semaphores. Outside of a batch no limits are set and the stages run
+    unrestricted.
+    """
+    return _stage_limits.set(limits)
+
+@asynccontextmanager
+async def stage_slot(stage):
+    limits = _stage_limits.get()
+    if not limits or stage not in limits:
+        yield
+        return
+
+    async with limits[stage]:
+        yield
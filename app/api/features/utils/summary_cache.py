@@ -0,0 +1,172 @@
+from app.api.features.utils.executor import run_in_executor
+from app.api.logger import setup_logger
+from collections import OrderedDict
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+logger = setup_logger(__name__)
+
+class SummaryCache:
+    """
+    Two-tier cache for generated summaries.
+
+    Entries are keyed by the hash of the source bytes, the prompt text and the model
+    name, so a changed file, an edited prompt or a different model never reuse a stale
+    summary. The memory tier is a small LRU; the disk tier survives restarts and is
+    bounded by a TTL and a total size, evicting the least recently used files first.
+    """
+    def __init__(self, cache_dir, max_memory_entries=256, max_disk_bytes=256 * 1024 * 1024, ttl_seconds=7 * 24 * 3600, enabled=True):
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(content_hash: str, prompt: str, model_name: str) -> str:
+        key_source = "\n".join([content_hash, hashlib.sha256(prompt.encode("utf-8")).hexdigest(), model_name])
+        return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _is_expired(self, created_at, now=None):
+        # Summaries expire a fixed time after they were generated, however often they are read
+        return (now or time.time()) - created_at > self.ttl_seconds
+
+    def _read_entry(self, entry_path):
+        try:
+            with open(entry_path, 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None and not self._is_expired(entry[0]):
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[1]
+            self.memory.pop(key, None)
+
+        entry_path = self._entry_path(key)
+        entry = self._read_entry(entry_path)
+
+        if entry is None or self._is_expired(entry["created_at"]):
+            if entry is not None:
+                self._remove_file(entry_path)
+            with self.lock:
+                self.misses += 1
+            return None
+
+        # Touch the file so disk eviction follows recency of use
+        os.utime(entry_path)
+
+        with self.lock:
+            self._remember(key, entry["created_at"], entry["summary"])
+            self.disk_hits += 1
+        return entry["summary"]
+
+    def set(self, key, summary):
+        if not self.enabled or summary is None:
+            return
+
+        created_at = time.time()
+        with self.lock:
+            self._remember(key, created_at, summary)
+
+        entry_path = self._entry_path(key)
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+
+        # Write to a temporary file first so readers never see a partial entry
+        with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(entry_path), delete=False, suffix=".tmp") as temp_file:
+            json.dump({"created_at": created_at, "summary": summary}, temp_file)
+        os.replace(temp_file.name, entry_path)
+
+        self._evict_disk()
+
+    def _remember(self, key, created_at, summary):
+        self.memory[key] = (created_at, summary)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+
+    def _remove_file(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict_disk(self):
+        entries = []
+        total_bytes = 0
+        now = time.time()
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                # Expiry follows the creation time like `get`, the mtime only orders the LRU eviction
+                entry = self._read_entry(path)
+                if entry is None or self._is_expired(entry["created_at"], now):
+                    self._remove_file(path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_bytes += stat.st_size
+
+        if total_bytes <= self.max_disk_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            self._remove_file(path)
+            total_bytes -= size
+            if total_bytes <= self.max_disk_bytes:
+                break
+
+    async def aget(self, key):
+        return await run_in_executor(self.get, key)
+
+    async def aset(self, key, summary):
+        await run_in_executor(self.set, key, summary)
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                self._remove_file(os.path.join(root, name))
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "memory_entries": len(self.memory),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses
+            }
+
+summary_cache = SummaryCache(
+    cache_dir=os.environ.get("SUMMARY_CACHE_DIR", os.path.join(tempfile.gettempdir(), "aipptbuilder", "summaries")),
+    max_memory_entries=int(os.environ.get("SUMMARY_CACHE_MEMORY_ENTRIES", "256")),
+    max_disk_bytes=int(os.environ.get("SUMMARY_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+    ttl_seconds=int(os.environ.get("SUMMARY_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+    enabled=os.environ.get("SUMMARY_CACHE_ENABLED", "true").lower() == "true"
+)
@@ -0,0 +1,331 @@
+from app.api.logger import setup_logger
+from collections import Counter
+from langchain_core.documents import Document
+
+import numpy as np
+import os
+import pandas as pd
+
+logger = setup_logger(__name__)
+
+# Rows read at a time, the memory used by a profile does not depend on the number of rows
+chunk_rows = int(os.environ.get("TABULAR_CHUNK_ROWS", "50000"))
+
+# Rows shown to the model as a sample of the data
+sample_rows = int(os.environ.get("TABULAR_SAMPLE_ROWS", "20"))
+
+# Columns profiled, wider tables are cut
+max_columns = int(os.environ.get("TABULAR_MAX_COLUMNS", "100"))
+
+TOP_CATEGORIES = 5
+
+# Distinct values counted per column, the least frequent are dropped beyond this
+CATEGORY_CAPACITY = 10000
+
+# Values kept per numeric column to estimate its quantiles
+QUANTILE_SAMPLE_SIZE = 10000
+
+MAX_CELL_CHARS = 80
+
+class ColumnProfile:
+    """
+    Statistics of one column, updated one chunk at a time in bounded memory.
+
+    Counts, mean, standard deviation (merged per chunk with Welford's method), min and
+    max are exact. Quantiles come from a uniform sample of the values, and the category
+    counts drop their least frequent values past CATEGORY_CAPACITY, so the top
+    categories of a column with a long tail are approximate.
+    """
+    def __init__(self, name, rng):
+        self.name = name
+        self.rng = rng
+        self.rows = 0
+        self.missing = 0
+        self.non_missing = 0
+
+        self.numeric_count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.sample_values = np.empty(0)
+        self.sample_keys = np.empty(0)
+
+        # None until the first chunk with values decides whether the column holds dates
+        self.is_datetime = None
+        self.datetime_count = 0
+        self.first_date = None
+        self.last_date = None
+
+        # Text columns stop being parsed as numbers once a chunk shows they are not
+        self.maybe_numeric = True
+
+        self.categories = Counter()
+        self.categories_pruned = False
+        self.text_count = 0
+        self.text_length_total = 0
+
+    def _update_numeric(self, values):
+        values = values.to_numpy(dtype=float)
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+
+        count = len(values)
+        chunk_mean = values.mean()
+        chunk_m2 = ((values - chunk_mean) ** 2).sum()
+        total = self.numeric_count + count
+        delta = chunk_mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += chunk_m2 + delta ** 2 * self.numeric_count * count / total
+        self.numeric_count = total
+
+        self.minimum = values.min() if self.minimum is None else min(self.minimum, values.min())
+        self.maximum = values.max() if self.maximum is None else max(self.maximum, values.max())
+
+        # Bottom-k sampling: the values with the smallest random keys form a uniform sample
+        self.sample_values = np.concatenate([self.sample_values, values])
+        self.sample_keys = np.concatenate([self.sample_keys, self.rng.random(count)])
+        if len(self.sample_keys) > QUANTILE_SAMPLE_SIZE:
+            keep = np.argpartition(self.sample_keys, QUANTILE_SAMPLE_SIZE)[:QUANTILE_SAMPLE_SIZE]
+            self.sample_values = self.sample_values[keep]
+            self.sample_keys = self.sample_keys[keep]
+
+    def _update_datetime(self, values):
+        if self.is_datetime is None:
+            head = pd.to_datetime(values.head(200).astype(str), errors="coerce", format="ISO8601")
+            self.is_datetime = head.notna().mean() >= 0.95
+        if not self.is_datetime:
+            return
+
+        dates = pd.to_datetime(values.astype(str), errors="coerce", format="ISO8601").dropna()
+        if len(dates):
+            self.datetime_count += len(dates)
+            self.first_date = dates.min() if self.first_date is None else min(self.first_date, dates.min())
+            self.last_date = dates.max() if self.last_date is None else max(self.last_date, dates.max())
+
+    def _update_categories(self, values):
+        values = values.astype(str)
+        self.text_count += len(values)
+        self.text_length_total += int(values.str.len().sum())
+        # Values beyond the most frequent of a chunk are rare and would be pruned anyway
+        counts = values.value_counts()
+        if len(counts) > CATEGORY_CAPACITY:
+            counts = counts.head(CATEGORY_CAPACITY)
+            self.categories_pruned = True
+        self.categories.update(dict(zip(counts.index.tolist(), counts.tolist())))
+        if len(self.categories) > 2 * CATEGORY_CAPACITY:
+            self.categories = Counter(dict(self.categories.most_common(CATEGORY_CAPACITY)))
+            self.categories_pruned = True
+
+    def update(self, series):
+        self.rows += len(series)
+        values = series.dropna()
+        self.missing += len(series) - len(values)
+        self.non_missing += len(values)
+        if not len(values):
+            return
+
+        if pd.api.types.is_datetime64_any_dtype(values):
+            self.is_datetime = True
+            self.datetime_count += len(values)
+            self.first_date = values.min() if self.first_date is None else min(self.first_date, values.min())
+            self.last_date = values.max() if self.last_date is None else max(self.last_date, values.max())
+            return
+
+        if pd.api.types.is_bool_dtype(values):
+            self._update_categories(values)
+            return
+
+        if pd.api.types.is_numeric_dtype(values):
+            self._update_numeric(values)
+            return
+
+        numeric = pd.to_numeric(values, errors="coerce").dropna() if self.maybe_numeric else values.iloc[:0]
+        self._update_numeric(numeric)
+        if len(numeric) < 0.5 * len(values):
+            self.maybe_numeric = False
+        if len(numeric) < len(values):
+            if self.is_datetime is not False:
+                self._update_datetime(values)
+            if not self.is_datetime:
+                self._update_categories(values)
+
+    @property
+    def kind(self):
+        if not self.non_missing:
+            return "empty"
+        if self.datetime_count >= 0.95 * self.non_missing:
+            return "datetime"
+        if self.numeric_count >= 0.95 * self.non_missing:
+            return "numeric"
+        distinct = len(self.categories)
+        if not self.categories_pruned and distinct <= max(20, 0.05 * self.non_missing):
+            return "categorical"
+        return "text"
+
+    def describe(self) -> str:
+        missing = f"missing {self.missing / self.rows:.1%}" if self.rows else "missing 0%"
+        kind = self.kind
+
+        if kind == "numeric":
+            std = (self.m2 / (self.numeric_count - 1)) ** 0.5 if self.numeric_count > 1 else 0.0
+            p5, median, p95 = np.quantile(self.sample_values, [0.05, 0.5, 0.95])
+            return (
+                f"- {self.name} (numeric): {missing}, min {self.minimum:.6g}, max {self.maximum:.6g}, "
+                f"mean {self.mean:.6g}, std {std:.6g}, p5 {p5:.6g}, median {median:.6g}, p95 {p95:.6g}"
+            )
+        if kind == "datetime":
+            return f"- {self.name} (date): {missing}, from {self.first_date} to {self.last_date}"
+        if kind == "empty":
+            return f"- {self.name} (empty): {missing}"
+
+        counted = self.text_count or 1
+        most_common = self.categories.most_common(TOP_CATEGORIES)
+        top = ", ".join(f"{_truncate(value, 40)} ({count / counted:.1%})" for value, count in most_common)
+        distinct = f"more than {CATEGORY_CAPACITY}" if self.categories_pruned else str(len(self.categories))
+        if kind == "categorical":
+            return f"- {self.name} (categorical, {distinct} distinct): {missing}, top values: {top}"
+
+        mean_length = self.text_length_total / counted
+        if most_common and most_common[0][1] > 1:
+            top = ", ".join(f"{_truncate(value, 40)} ({count} rows)" for value, count in most_common)
+            return f"- {self.name} (text, {distinct} distinct, mean length {mean_length:.0f}): {missing}, most frequent: {top}"
+        # Frequencies of values that never repeat say nothing, a few examples say more
+        examples = ", ".join(_truncate(value, 40) for value, _ in most_common[:3])
+        return f"- {self.name} (text, {distinct} distinct, mean length {mean_length:.0f}): {missing}, examples: {examples}"
+
+def _truncate(value, max_chars=MAX_CELL_CHARS):
+    text = " ".join(str(value).split())
+    return text if len(text) <= max_chars else text[:max_chars - 3] + "..."
+
+class TableProfile:
+    """Profile of one table (a CSV file or a sheet), built from its chunks."""
+    def __init__(self, name, seed=0):
+        self.name = name
+        self.rng = np.random.default_rng(seed)
+        self.rows = 0
+        self.columns = None
+        self.column_profiles = {}
+        self.extra_columns = 0
+        self.sample = None
+
+    def update(self, chunk: pd.DataFrame):
+        if self.columns is None:
+            self.columns = [str(column) for column in chunk.columns[:max_columns]]
+            self.extra_columns = max(0, len(chunk.columns) - max_columns)
+            self.column_profiles = {column: ColumnProfile(column, self.rng) for column in self.columns}
+        chunk = chunk.iloc[:, :len(self.columns)]
+        chunk.columns = self.columns
+
+        for column in self.columns:
+            self.column_profiles[column].update(chunk[column])
+
+        # The sample rows are a bottom-k sample too, shown in their original order
+        keyed = chunk.assign(_row=np.arange(self.rows, self.rows + len(chunk)), _key=self.rng.random(len(chunk)))
+        keyed = keyed.nsmallest(sample_rows, "_key")
+        self.sample = keyed if self.sample is None else pd.concat([self.sample, keyed]).nsmallest(sample_rows, "_key")
+        self.rows += len(chunk)
+
+    def describe(self) -> str:
+        if self.columns is None:
+            return f"Table {self.name}: no rows"
+
+        lines = [f"Table {self.name}: {self.rows} rows, {len(self.columns) + self.extra_columns} columns"]
+        if self.extra_columns:
+            lines.append(f"Only the first {len(self.columns)} columns are profiled.")
+        lines.append("")
+        lines.append("Columns:")
+        lines.extend(self.column_profiles[column].describe() for column in self.columns)
+
+        if self.sample is not None and len(self.sample):
+            sample = self.sample.sort_values("_row").drop(columns=["_row", "_key"])
+            sample = sample.apply(lambda column: column.map(lambda value: "" if pd.isna(value) else _truncate(value)))
+            lines.append("")
+            lines.append(f"Sample rows ({len(sample)} of {self.rows}):")
+            lines.append(sample.to_csv(index=False).strip())
+        return "\n".join(lines)
+
+def _unique_columns(header):
+    columns = []
+    for index, name in enumerate(header):
+        name = str(name).strip() if name is not None and str(name).strip() else f"column_{index + 1}"
+        while name in columns:
+            name = f"{name}_{index + 1}"
+        columns.append(name)
+    return columns
+
+def iter_csv_chunks(file_path):
+    chunks = pd.read_csv(file_path, chunksize=chunk_rows, encoding_errors="replace", on_bad_lines="skip")
+    for chunk in chunks:
+        yield os.path.basename(file_path), chunk
+
+def iter_xlsx_chunks(file_path):
+    # Read-only mode streams the rows of each sheet instead of loading the workbook
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                continue
+            columns = _unique_columns(header)
+            batch = []
+            for row in rows:
+                row = list(row[:len(columns)]) + [None] * (len(columns) - len(row))
+                batch.append(row)
+                if len(batch) >= chunk_rows:
+                    yield sheet.title, pd.DataFrame(batch, columns=columns)
+                    batch = []
+            if batch:
+                yield sheet.title, pd.DataFrame(batch, columns=columns)
+    finally:
+        workbook.close()
+
+def iter_xls_chunks(file_path):
+    # Legacy .xls files cannot be streamed, but they are limited to 65536 rows per sheet
+    for sheet_name, sheet in pd.read_excel(file_path, sheet_name=None).items():
+        for start in range(0, len(sheet), chunk_rows):
+            yield sheet_name, sheet.iloc[start:start + chunk_rows]
+
+def profile_tabular_file(file_path) -> str:
+    """
+    Profiles a CSV, XLSX or XLS file chunk by chunk and returns a compact description:
+    per table (or sheet) the column types, summary statistics, top categories and
+    missing-value rates, and a small sample of rows.
+
+    Parameters:
+    file_path (str): Path of the file, its extension selects the reader.
+
+    Returns:
+    str: The profile, sized by the number of columns rather than the number of rows.
+    """
+    extension = os.path.splitext(file_path)[1].lower().lstrip(".")
+    if extension == "csv":
+        chunks = iter_csv_chunks(file_path)
+    elif extension == "xls":
+        chunks = iter_xls_chunks(file_path)
+    else:
+        chunks = iter_xlsx_chunks(file_path)
+
+    tables = {}
+    for table_name, chunk in chunks:
+        if table_name not in tables:
+            tables[table_name] = TableProfile(table_name, seed=len(tables))
+        tables[table_name].update(chunk)
+
+    logger.info(f"Profiled {sum(table.rows for table in tables.values())} rows in {len(tables)} tables")
+    return "\n\n".join(table.describe() for table in tables.values())
+
+class TabularProfileLoader:
+    """
+    Document loader returning one document with the profile of a tabular file, used in
+    place of the row-per-document CSV and Excel loaders.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+
+    def load(self) -> list:
+        return [Document(page_content=profile_tabular_file(self.file_path), metadata={"source": self.file_path})]
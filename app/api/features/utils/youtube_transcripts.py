@@ -0,0 +1,123 @@
+from app.api.features.utils.lazy_import import LazyImport
+from app.api.features.utils.summary_cache import SummaryCache
+from app.api.logger import setup_logger
+from typing import NamedTuple
+
+import hashlib
+import json
+import os
+import tempfile
+
+logger = setup_logger(__name__)
+
+YoutubeLoader = LazyImport("langchain_community.document_loaders.youtube:YoutubeLoader")
+YouTube = LazyImport("pytube:YouTube")
+youtube_transcript_api = LazyImport("youtube_transcript_api")
+
+TRANSCRIPT_SOURCES = ("youtube", "local")
+
+# Transcripts fall back to this language when the requested one is not available
+FALLBACK_LANGUAGE = "en"
+
+class VideoInfo(NamedTuple):
+    video_id: str
+    title: str
+    length: int
+
+class Transcript(NamedTuple):
+    video_id: str
+    language: str
+    # Timed pieces of the transcript: {"text", "start", "duration"}, in seconds
+    pieces: list
+
+    def text(self) -> str:
+        return " ".join(piece["text"].strip(" ") for piece in self.pieces)
+
+    def chunks(self, chunk_seconds) -> list:
+        """Returns the transcript in windows of `chunk_seconds`, each starting with its timestamp."""
+        chunks = []
+        window_end = None
+        for piece in self.pieces:
+            if window_end is None or piece["start"] >= window_end:
+                window_start = int(piece["start"] // chunk_seconds * chunk_seconds)
+                window_end = window_start + chunk_seconds
+                minutes, seconds = divmod(window_start, 60)
+                hours, minutes = divmod(minutes, 60)
+                chunks.append([f"[{hours:02d}:{minutes:02d}:{seconds:02d}]"])
+            chunks[-1].append(piece["text"].strip(" "))
+        return [" ".join(chunk) for chunk in chunks]
+
+def extract_video_id(youtube_url) -> str:
+    return YoutubeLoader.resolve().extract_video_id(youtube_url)
+
+class YoutubeTranscriptSource:
+    """Reads the video metadata with pytube and the transcripts with youtube-transcript-api."""
+    def video_info(self, video_id) -> VideoInfo:
+        video = YouTube.resolve()(f"https://www.youtube.com/watch?v={video_id}")
+        return VideoInfo(video_id, video.title or "Unknown", video.length or 0)
+
+    def transcript(self, video_id, language) -> Transcript:
+        api = youtube_transcript_api.resolve()
+        transcript_list = api.YouTubeTranscriptApi().list(video_id)
+        try:
+            transcript = transcript_list.find_transcript([language])
+        except api.NoTranscriptFound:
+            transcript = transcript_list.find_transcript([FALLBACK_LANGUAGE])
+
+        pieces = [
+            {"text": snippet.text, "start": snippet.start, "duration": snippet.duration}
+            for snippet in transcript.fetch().snippets
+        ]
+        return Transcript(video_id, transcript.language_code, pieces)
+
+class LocalTranscriptSource:
+    """
+    Stand-in for YouTube reading `<video_id>.json` files from a directory, for offline
+    runs and benchmarks. Each file holds the "title", the "length" in seconds and the
+    "transcripts" by language code, as lists of {"text", "start", "duration"} pieces.
+    """
+    def __init__(self, transcript_dir):
+        self.transcript_dir = transcript_dir
+
+    def _read(self, video_id):
+        with open(os.path.join(self.transcript_dir, f"{video_id}.json"), 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def video_info(self, video_id) -> VideoInfo:
+        video = self._read(video_id)
+        return VideoInfo(video_id, video.get("title", "Unknown"), video.get("length", 0))
+
+    def transcript(self, video_id, language) -> Transcript:
+        transcripts = self._read(video_id)["transcripts"]
+        if language not in transcripts:
+            language = FALLBACK_LANGUAGE
+        return Transcript(video_id, language, transcripts[language])
+
+def create_transcript_source(mode, transcript_dir=None):
+    """
+    Creates the source named by YOUTUBE_TRANSCRIPT_SOURCE: "youtube" reads the videos
+    online, "local" reads the JSON files of `transcript_dir`.
+    """
+    if mode == "youtube":
+        return YoutubeTranscriptSource()
+    if mode == "local":
+        logger.info(f"Reading the YouTube transcripts from {transcript_dir}")
+        return LocalTranscriptSource(transcript_dir)
+    raise ValueError(f"Unknown transcript source: {mode}")
+
+def transcript_cache_key(video_id, language) -> str:
+    return hashlib.sha256(f"{video_id}\n{language}".encode("utf-8")).hexdigest()
+
+transcript_source = create_transcript_source(
+    os.environ.get("YOUTUBE_TRANSCRIPT_SOURCE", "youtube").lower(),
+    os.environ.get("YOUTUBE_LOCAL_TRANSCRIPT_DIR", os.path.join(tempfile.gettempdir(), "aipptbuilder", "youtube"))
+)
+
+# Transcripts and the metadata of their video, by video id and requested language
+transcript_cache = SummaryCache(
+    cache_dir=os.environ.get("TRANSCRIPT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "aipptbuilder", "transcripts")),
+    max_memory_entries=int(os.environ.get("TRANSCRIPT_CACHE_MEMORY_ENTRIES", "64")),
+    max_disk_bytes=int(os.environ.get("TRANSCRIPT_CACHE_MAX_BYTES", str(128 * 1024 * 1024))),
+    ttl_seconds=int(os.environ.get("TRANSCRIPT_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+    enabled=os.environ.get("TRANSCRIPT_CACHE_ENABLED", "true").lower() == "true"
+)
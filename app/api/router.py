@@ -1,44 +1,157 @@
-from app.api.features.compile_chain_for_ppt import compile_chain
-from app.api.features.generate_ppt import create_pptx_file, return_images
-from app.api.features.document_loaders import generate_summary_from_img, get_summary, summarize_transcript_youtube_url
-from fastapi import APIRouter, Depends
+from app.api.features.full_workflow_for_gradio import run_full_workflow
+from app.api.features.jobs import job_manager
+from app.api.features.batch import batch_manager, batch_parallel, default_stage_limits, parse_batch_rows
+from app.api.features.stream_ppt import stream_ppt_events
+from app.api.features.generate_ppt import PPTX_MEDIA_TYPE
+from app.api.features.errors.job_errors import JobQueueFullError
+from app.api.features.utils.artifact_store import Artifact, artifact_store
+from app.api.features.utils.metrics import METRICS_CONTENT_TYPE, register_stats, render_metrics
+from app.api.features.utils.model_governor import governor_registry
+from app.api.features.utils.profiling import request_profiling
+from app.api.features.utils.executor import run_in_executor
+from app.api.features.utils.response_cache import ppt_response_cache
+from app.api.features.utils.summary_cache import summary_cache
+from app.api.features.utils.youtube_transcripts import transcript_cache
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from app.api.logger import setup_logger
-from app.api.features.schemas.schemas import RequestSchemaWithFiles, SlidePresentationRequestArgs
+from app.api.features.schemas.schemas import BatchStatusSchema, JobRequestSchema, JobStatusSchema, RequestSchemaWithFiles
 from app.api.auth.auth import key_check
 
 logger = setup_logger(__name__)
 router = APIRouter()
 
+register_stats("model_governor", governor_registry.metrics, label="model")
+register_stats("summary_cache", summary_cache.stats)
+register_stats("response_cache", ppt_response_cache.stats)
+register_stats("transcript_cache", transcript_cache.stats)
+
 @router.get("/")
 def read_root():
     return {"Hello": "World"}
 
+@router.get("/stats")
+async def get_stats(_ = Depends(key_check)):
+    return {
+        "model_governors": governor_registry.metrics(),
+        "summary_cache": summary_cache.stats(),
+        "response_cache": ppt_response_cache.stats(),
+        "transcript_cache": transcript_cache.stats()
+    }
+
+@router.get("/metrics")
+async def get_metrics(_ = Depends(key_check)):
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+@router.get("/debug/profiles")
+async def list_profiles(_ = Depends(key_check)):
+    profiles = await run_in_executor(request_profiling.store.list)
+    return {"enabled": request_profiling.enabled, "profiles": [profile._asdict() for profile in profiles]}
+
+@router.get("/debug/profiles/{profile_id}")
+async def get_profile(profile_id: str, _ = Depends(key_check)):
+    profile = await run_in_executor(request_profiling.store.get, profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    # Folded stacks, one "frame;frame;frame count" line per stack, for flamegraph.pl or speedscope
+    return FileResponse(profile.file_path, media_type="text/plain", filename=f"{profile_id}.folded")
+
 @router.post("/generate-ppt")
 async def submit_tool( data: RequestSchemaWithFiles, _ = Depends(key_check)):
 
-    logger.info(f"File type uploaded successfully: {data.file_type}")
+    result = await run_full_workflow(data)
+
+    return result.ppt_content
+
+def deck_response(deck: Artifact, request: Request):
+    # Decks are addressed by their content, so a stored id never changes meaning
+    headers = {"ETag": deck.etag, "Cache-Control": "private, max-age=86400, immutable", "X-Deck-Id": deck.artifact_id}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if deck.etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+
+    # FileResponse answers Range and If-Range requests with partial content
+    return FileResponse(deck.path, media_type=PPTX_MEDIA_TYPE, filename=deck.file_name, headers=headers)
+
+@router.post("/generate-ppt/file")
+async def download_tool(data: RequestSchemaWithFiles, request: Request, _ = Depends(key_check)):
+    result = await run_full_workflow(data)
+
+    return deck_response(result.deck, request)
+
+@router.get("/decks/{deck_id}")
+async def get_deck(deck_id: str, request: Request, _ = Depends(key_check)):
+    deck = await artifact_store.aget(deck_id)
+    if deck is None:
+        raise HTTPException(status_code=404, detail="Deck not found")
+
+    return deck_response(deck, request)
+
+@router.post("/generate-ppt/stream")
+async def stream_tool(data: RequestSchemaWithFiles, _ = Depends(key_check)):
+    return StreamingResponse(
+        stream_ppt_events(data),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-    args = SlidePresentationRequestArgs(slide_schema=data.request_args)
+@router.post("/generate-ppt/jobs", status_code=202, response_model=JobStatusSchema)
+async def submit_job(data: JobRequestSchema, _ = Depends(key_check)):
+    try:
+        job = job_manager.submit(data)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
-    logger.info("Generating the summary from the documents")
+    return job.to_schema()
 
-    if data.file_type == 'img':
-        summary = generate_summary_from_img(data.file_url)
-    elif data.file_type == 'youtube_url':
-        summary = summarize_transcript_youtube_url(data.file_url)
-    else:
-        summary = get_summary(data.file_url, data.file_type)
+@router.get("/jobs/{job_id}", response_model=JobStatusSchema)
+async def get_job(job_id: str, _ = Depends(key_check)):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
 
-    chain = compile_chain()
+    return job.to_schema()
 
-    args.summary = summary
+@router.post("/generate-ppt/batch", status_code=202, response_model=BatchStatusSchema)
+async def submit_batch(
+    request: Request,
+    batch_id: str = Query(None, pattern="^[A-Za-z0-9_-]{1,64}$", description="Id of an earlier batch to resume, skipping its completed rows"),
+    parallel: int = Query(batch_parallel, ge=1, le=64),
+    download_concurrency: int = Query(default_stage_limits["download"], ge=0),
+    summarize_concurrency: int = Query(default_stage_limits["summarize"], ge=0),
+    generate_concurrency: int = Query(default_stage_limits["generate"], ge=0),
+    render_concurrency: int = Query(default_stage_limits["render"], ge=0),
+    _ = Depends(key_check)
+):
+    # The body is the batch file itself: CSV with a text/csv content type, JSONL otherwise
+    file_format = "csv" if request.headers.get("content-type", "").startswith("text/csv") else "jsonl"
+    try:
+        text = (await request.body()).decode("utf-8")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="The batch must be UTF-8 text")
+    rows = parse_batch_rows(text, file_format)
+    if not rows:
+        raise HTTPException(status_code=400, detail="The batch has no rows")
 
-    logger.info(f"Summary generated successfully: {args.summary}")
+    stage_limits = {
+        "download": download_concurrency,
+        "summarize": summarize_concurrency,
+        "generate": generate_concurrency,
+        "render": render_concurrency
+    }
+    try:
+        batch = batch_manager.submit(rows, parallel, stage_limits, batch_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
-    logger.info("Generating the content for the PPT file")
-    ppt_content = chain.invoke(args.validate_and_return())
-    logger.info("PPT content generated successfully")
+    return batch.to_schema()
 
-    create_pptx_file(ppt_content, return_images()) 
+@router.get("/batches/{batch_id}", response_model=BatchStatusSchema)
+async def get_batch(batch_id: str, _ = Depends(key_check)):
+    batch = batch_manager.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
 
-    return ppt_content
\ No newline at end of file
+    return batch.to_schema()
@@ -5,9 +5,25 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.api.router import router
 from app.api.logger import setup_logger
+from app.api.auth.auth import get_api_key_store
 from app.api.error_utilities import ErrorResponse
+from app.api.features.utils.executor import run_in_executor, shutdown_executor
+from app.api.features.utils.http_client import close_http_client
+from app.api.features.jobs import job_manager
+from app.api.features.batch import batch_manager
+from app.api.features.chain_registry import chain_registry
+from app.api.features.compile_chain_for_ppt import PPT_MODEL
+from app.api.features.document_loaders import SUMMARY_MODEL, file_loader_registry
+from app.api.features.generate_ppt import image_boxes
+from app.api.features.utils.image_assets import image_asset_store
+from app.api.features.utils.metrics import observe_http_request
+from app.api.features.utils.profiling import PROFILE_ID_PATTERN, request_profiling
+from app.api.features.utils.pdf_extraction import shutdown_pdf_process_pool
 
 import os
+import threading
+import time
+import uuid
 
 from dotenv import load_dotenv, find_dotenv
 
@@ -15,13 +31,32 @@ load_dotenv(find_dotenv())
 
 logger = setup_logger(__name__)
 
+# Comma separated file types whose loaders are imported right after startup, e.g. "pdf,docx"
+prewarm_file_types = [file_type.strip() for file_type in os.environ.get("PREWARM_FILE_TYPES", "").split(",") if file_type.strip()]
+
+def warm_up():
+    chain_registry.load(model_names=[SUMMARY_MODEL, PPT_MODEL], chat_model_names=[SUMMARY_MODEL])
+    file_loader_registry.prewarm(prewarm_file_types)
+    image_asset_store.load(image_boxes())
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info(f"Initializing Application Startup")
+    # Model clients and loader backends are warmed up in the background so the
+    # instance can accept requests as soon as the app is imported
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    await job_manager.start()
+    get_api_key_store().start_refresh()
     logger.info(f"Successfully Completed Application Startup")
     
     yield
     logger.info("Application shutdown")
+    get_api_key_store().stop_refresh()
+    await job_manager.stop()
+    await batch_manager.stop()
+    await close_http_client()
+    shutdown_executor()
+    shutdown_pdf_process_pool()
 
 app = FastAPI(lifespan = lifespan)
 app.add_middleware(
@@ -32,6 +67,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Labeled by route template so ids in the path do not create new series.
+        # Streamed responses are timed until their headers are sent.
+        route = request.scope.get("route")
+        observe_http_request(request.method, getattr(route, "path", "unmatched"), status, time.perf_counter() - started)
+
+if request_profiling.enabled:
+    # Only registered when profiling is enabled, so requests pay nothing for it otherwise
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        profiler = request_profiling.start() if request_profiling.should_profile(request.headers) else None
+        if profiler is None:
+            return await call_next(request)
+
+        profile_id = request.headers.get("x-request-id", "")
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            profile_id = uuid.uuid4().hex
+        started_at = time.time()
+
+        async def finish(status):
+            await run_in_executor(request_profiling.finish, profiler, profile_id, request.method, request.url.path, status, started_at)
+
+        try:
+            response = await call_next(request)
+        except Exception:
+            await finish(500)
+            raise
+
+        # The profile covers the whole body, streamed decks included
+        body_iterator = response.body_iterator
+
+        async def profiled_body():
+            try:
+                async for chunk in body_iterator:
+                    yield chunk
+            finally:
+                await finish(response.status_code)
+
+        response.body_iterator = profiled_body()
+        response.headers["X-Profile-Id"] = profile_id
+        return response
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     errors = []
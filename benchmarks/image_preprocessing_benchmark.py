@@ -0,0 +1,118 @@
+"""
+Benchmark of the image preprocessing done before the multimodal summary.
+
+Generates camera-sized photos and slide screenshots, then measures the preprocessing
+time and the bytes sent to the model with and without preprocessing. Also checks the
+near-duplicate detection: every image is indexed, then variants of it (resized,
+re-encoded, brightened, slightly cropped) must match it, while the other images, which
+include slides of the same template with other text, must not.
+
+Usage:
+    python benchmarks/image_preprocessing_benchmark.py --photos 5 --slides 10
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from io import BytesIO
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageEnhance
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.chdir(ROOT_DIR)
+
+from app.api.features.utils.image_preprocessing import ImageHashIndex, image_duplicate_max_distance, prepare_image
+
+WORDS = "revenue growth team cost region launch customer quarter margin pipeline".split()
+
+def make_photo(seed, size=(4032, 3024)):
+    # Smooth color fields with sensor-like noise, which compress like real photos
+    rng = np.random.default_rng(seed)
+    base = Image.fromarray(rng.integers(0, 255, (6, 8, 3), dtype=np.uint8)).resize(size, Image.Resampling.BICUBIC)
+    pixels = np.asarray(base).astype(np.int16) + rng.integers(-20, 20, (size[1], size[0], 3))
+    return Image.fromarray(pixels.clip(0, 255).astype(np.uint8))
+
+def make_slide(seed, size=(1920, 1080)):
+    # Same template for every slide, only the bullet text differs
+    rng = random.Random(seed)
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([0, 0, size[0], 140], fill=(30, 60, 120))
+    draw.text((60, 50), "Quarterly review", fill="white")
+    for top in range(220, size[1] - 80, 60):
+        draw.text((90, top), " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 14))), fill="black")
+    return image
+
+def encode(image, image_format="JPEG", **options):
+    output = BytesIO()
+    image.save(output, format=image_format, **options)
+    return output.getvalue()
+
+def variants(image):
+    width, height = image.size
+    return {
+        "half size": encode(image.resize((width // 2, height // 2))),
+        "jpeg q50": encode(image, quality=50),
+        "brighter": encode(ImageEnhance.Brightness(image).enhance(1.08), quality=90),
+        "1% crop": encode(image.crop((width // 200, height // 200, width - width // 200, height - height // 200)), quality=90),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--photos", type=int, default=5)
+    parser.add_argument("--slides", type=int, default=10)
+    args = parser.parse_args()
+
+    images = [("photo", encode(make_photo(seed), quality=95), "image/jpeg") for seed in range(args.photos)]
+    images += [("slide", encode(make_slide(seed), "PNG"), "image/png") for seed in range(args.slides)]
+
+    print(f"{'kind':<6} {'original (KiB)':>15} {'sent (KiB)':>11} {'payload saved':>14} {'prepare (ms)':>13}")
+    prepared = []
+    for kind in ("photo", "slide"):
+        rows = [(data, mime_type) for image_kind, data, mime_type in images if image_kind == kind]
+        timings, sizes = [], []
+        for data, mime_type in rows:
+            started = time.perf_counter()
+            image = prepare_image(data, mime_type)
+            timings.append(time.perf_counter() - started)
+            sizes.append((len(data), len(image.data)))
+            prepared.append((kind, data, image))
+        original = statistics.mean(size[0] for size in sizes)
+        sent = statistics.mean(size[1] for size in sizes)
+        saved = 1 - sent / original
+        print(f"{kind:<6} {original / 1024:>15.0f} {sent / 1024:>11.0f} {saved:>14.0%} {statistics.median(timings) * 1000:>13.0f}")
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        index = ImageHashIndex(index_dir, max_distance=image_duplicate_max_distance)
+        for number, (kind, data, image) in enumerate(prepared):
+            index.add(image, f"{kind}-{number}")
+
+        matched, missed, wrong = 0, [], []
+        for number, (kind, data, image) in enumerate(prepared):
+            source = Image.open(BytesIO(data)).convert("RGB")
+            for variant, variant_data in variants(source).items():
+                found = index.find(prepare_image(variant_data, "image/jpeg"))
+                if found == f"{kind}-{number}":
+                    matched += 1
+                elif found is None:
+                    missed.append(f"{kind}-{number} {variant}")
+                else:
+                    wrong.append(f"{kind}-{number} {variant} -> {found}")
+
+        distinct_slides = [prepare_image(encode(make_slide(seed), "PNG"), "image/png") for seed in range(1000, 1000 + args.slides)]
+        false_matches = sum(1 for image in distinct_slides if index.find(image) is not None)
+
+    total = matched + len(missed) + len(wrong)
+    print(f"\nNear-duplicates reused: {matched}/{total}, missed: {len(missed)}, matched to another image: {len(wrong)}")
+    for line in missed + wrong:
+        print(f"  {line}")
+    print(f"New slides of the same template matched to an indexed one: {false_matches}/{len(distinct_slides)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Load test for the /generate-ppt endpoint.
+
+Serves a text file from a local HTTP server and replaces the Gemini chains with
+fake chains that sleep for a fixed latency, then fires N concurrent requests at
+the ASGI app. With a non-blocking pipeline the wall time of N concurrent
+requests stays close to the latency of a single request instead of growing
+with N.
+
+Usage:
+    python benchmarks/load_test_generate_ppt.py --concurrency 1 4 8 16 --latency 1.0
+"""
+import argparse
+import asyncio
+import functools
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.chdir(ROOT_DIR)
+os.environ.setdefault("ENV_TYPE", "dev")
+os.environ.setdefault("GOOGLE_API_KEY", "load-test")
+
+import httpx
+from langchain_core.runnables import RunnableLambda
+
+from app.main import app
+from app.api.features import document_loaders, full_workflow_for_gradio
+
+FAKE_PPT_CONTENT = {
+    "title": "Load Test",
+    "description": "A deck generated by the load test.",
+    "slides": [
+        {"title": f"Slide {i}", "content": f"Content for slide {i}."} for i in range(1, 6)
+    ],
+}
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+def start_file_server(directory):
+    handler = functools.partial(QuietHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def install_fake_chains(latency):
+    async def fake_summary(_):
+        await asyncio.sleep(latency)
+        return "A short summary of the document."
+
+    async def fake_ppt(_):
+        await asyncio.sleep(latency)
+        return FAKE_PPT_CONTENT
+
+    document_loaders.build_chain = lambda prompt: RunnableLambda(fake_summary)
+    full_workflow_for_gradio.compile_chain = lambda: RunnableLambda(fake_ppt)
+
+def build_payload(file_url):
+    return {
+        "request_args": {
+            "topic": "Load testing",
+            "objective": "Check that concurrent requests overlap",
+            "target_audience": "Engineers",
+            "n_slides": 5,
+            "slide_breakdown": "One slide per idea",
+            "lang": "en",
+        },
+        "file_url": file_url,
+        "file_type": "txt",
+        "use_summary_cache": False,
+        "use_response_cache": False,
+    }
+
+async def run_round(client, payload, concurrency):
+    async def one_request():
+        start = time.perf_counter()
+        response = await client.post("/generate-ppt", json=payload, headers={"api-key": "dev"})
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one_request() for _ in range(concurrency)))
+    return time.perf_counter() - start, max(latencies)
+
+async def main(concurrency_levels, latency):
+    install_fake_chains(latency)
+
+    with tempfile.TemporaryDirectory() as fixtures_dir:
+        with open(os.path.join(fixtures_dir, "sample.txt"), "w") as file:
+            file.write("Python is a programming language. " * 200)
+
+        server = start_file_server(fixtures_dir)
+        file_url = f"http://127.0.0.1:{server.server_address[1]}/sample.txt"
+        payload = build_payload(file_url)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+            print(f"{'concurrency':>12} {'wall (s)':>10} {'slowest (s)':>12} {'serial (s)':>11} {'overlap':>8}")
+            for concurrency in concurrency_levels:
+                wall_time, slowest = await run_round(client, payload, concurrency)
+                serial_time = slowest * concurrency
+                print(f"{concurrency:>12} {wall_time:>10.2f} {slowest:>12.2f} {serial_time:>11.2f} {serial_time / wall_time:>7.1f}x")
+
+        server.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--latency", type=float, default=1.0, help="Seconds each fake model call takes")
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.latency))
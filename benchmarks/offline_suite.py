@@ -0,0 +1,441 @@
+"""
+Offline end-to-end benchmark suite.
+
+Generates sample pdf, csv, docx, pptx, xlsx, xml, txt and md files, serves them from a
+local HTTP server and runs the real pipeline on them: downloads, loaders, prompts,
+output parsers, the model governor and rendering. Only the Gemini clients are replaced,
+by a deterministic fake model that waits a configurable latency and answers from a hash
+of its prompt, so no network access or API key is needed.
+
+For every path (the /generate-ppt endpoint and/or run_full_workflow), file type and
+concurrency level it reports throughput, p50/p95 latency and the peak RSS of the
+process, and writes the results to a JSON file. Passing an earlier results file with
+--compare prints the change of every measure and exits with status 1 when one got
+worse than --threshold.
+
+Usage:
+    python benchmarks/offline_suite.py --concurrency 1 4 16 --requests 32 --latency 0.2
+    python benchmarks/offline_suite.py --file-types pdf csv --compare benchmarks/results/20260101-120000.json
+"""
+import argparse
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("ARTIFACT_STORE_DIR", tempfile.mkdtemp(prefix="benchmark-decks-"))
+
+import httpx
+import psutil
+from langchain_core.runnables import Runnable
+
+from load_test_generate_ppt import app, build_payload, start_file_server
+from app.api.features.chain_registry import chain_registry
+from app.api.features.compile_chain_for_ppt import PPT_MODEL, format_instructions
+from app.api.features.document_loaders import SUMMARY_MODEL
+from app.api.features.full_workflow_for_gradio import run_full_workflow
+from app.api.features.schemas.schemas import RequestSchemaWithFiles
+from app.api.features.utils.model_governor import governor_registry
+
+FILE_TYPES = ["pdf", "csv", "docx", "pptx", "xlsx", "xml", "txt", "md"]
+
+PATHS = ["api", "workflow"]
+
+RESULTS_DIR = os.path.join(ROOT_DIR, "benchmarks", "results")
+
+WORDS = (
+    "python pipeline model summary deck slide latency throughput request document table column value "
+    "report revenue customer growth quarter region product market analysis forecast budget metric"
+).split()
+
+# ---------------------------------------------------------------- fake model
+
+class FakeModel(Runnable):
+    """
+    Deterministic stand-in for a Gemini client.
+
+    Waits `latency` seconds, then answers PPT prompts (recognized by the JSON format
+    instructions they contain) with a deck and every other prompt with a summary. The
+    answer is derived from the hash of the prompt, so distinct requests get distinct
+    decks while a rerun gets exactly the same outputs.
+    """
+    def __init__(self, latency, n_slides=5, summary_words=120):
+        self.latency = latency
+        self.n_slides = n_slides
+        self.summary_words = summary_words
+
+    def _answer(self, prompt):
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        words = random.Random(digest).choices(WORDS, k=self.summary_words)
+        if format_instructions in prompt:
+            return json.dumps({
+                "title": f"Deck {digest[:8]}",
+                "description": " ".join(words[:20]),
+                "slides": [
+                    {"title": f"Slide {index + 1}", "content": " ".join(words[index * 10:index * 10 + 30])}
+                    for index in range(self.n_slides)
+                ]
+            })
+        return f"Summary {digest[:8]}: " + " ".join(words)
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        prompt = input.to_string() if hasattr(input, "to_string") else str(input)
+        await asyncio.sleep(self.latency)
+        return self._answer(prompt)
+
+    def invoke(self, input, config=None, **kwargs):
+        return asyncio.run(self.ainvoke(input, config, **kwargs))
+
+class FakeProvider:
+    """Model provider creating fake models, see app/api/features/model_providers.py."""
+    def __init__(self, latency):
+        self.latency = latency
+
+    def create(self, kind, model_name):
+        return FakeModel(self.latency)
+
+def install_fake_models(latency, provider=None):
+    """Makes the chain registry create fake models, behind governors loose enough not to throttle the benchmark."""
+    for model_name in (SUMMARY_MODEL, PPT_MODEL):
+        governor_registry.model_limits[model_name] = {"requests_per_minute": 10 ** 6, "tokens_per_minute": 10 ** 10, "max_concurrency": 1024}
+        governor_registry.governors.pop(model_name, None)
+    chain_registry.provider = provider or FakeProvider(latency)
+    chain_registry.models.clear()
+    chain_registry.chains.clear()
+
+# ---------------------------------------------------------------- fixtures
+
+def sentences(seed, count):
+    generator = random.Random(seed)
+    return [" ".join(generator.choices(WORDS, k=12)).capitalize() + "." for _ in range(count)]
+
+def write_pdf(path, pages):
+    # A minimal PDF with one Helvetica text stream per page, written by hand to avoid a PDF library
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for lines in pages:
+        stream = "BT /F1 10 Tf 12 TL 50 760 Td " + " ".join(f"({line}) Tj T*" for line in lines) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{page_id} 0 R' for page_id in page_ids)}] /Count {len(page_ids)} >>"
+
+    content = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(content))
+        content += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref_offset = len(content)
+    content += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    content += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    content += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("latin-1")
+    with open(path, 'wb') as file:
+        file.write(content)
+
+def write_docx(path, paragraphs):
+    # The three parts docx2txt needs, without depending on python-docx
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+        '</Types>'
+    )
+    relationships = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>'
+        '</Relationships>'
+    )
+    body = "".join(f"<w:p><w:r><w:t>{paragraph}</w:t></w:r></w:p>" for paragraph in paragraphs)
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{body}</w:body></w:document>'
+    )
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", content_types)
+        archive.writestr("_rels/.rels", relationships)
+        archive.writestr("word/document.xml", document)
+
+def write_pptx(path, slides):
+    from pptx import Presentation
+    from pptx.util import Inches
+
+    presentation = Presentation()
+    for title, lines in slides:
+        slide = presentation.slides.add_slide(presentation.slide_layouts[5])
+        slide.shapes.title.text = title
+        text_frame = slide.shapes.add_textbox(Inches(0.5), Inches(1.5), Inches(9), Inches(5)).text_frame
+        text_frame.text = lines[0]
+        for line in lines[1:]:
+            text_frame.add_paragraph().text = line
+    presentation.save(path)
+
+def table_rows(seed, count):
+    generator = random.Random(seed)
+    regions = ["north", "south", "east", "west"]
+    return [
+        [index, generator.choice(regions), generator.choice(WORDS), round(generator.uniform(10, 10000), 2), generator.randint(1, 500)]
+        for index in range(count)
+    ]
+
+def write_fixtures(directory, scale=1) -> dict:
+    """
+    Writes one sample file per file type, sized by `scale`, and returns their names by file type.
+    """
+    import csv
+    import openpyxl
+
+    header = ["id", "region", "product", "revenue", "units"]
+    rows = table_rows("table", 200 * scale)
+    paragraphs = sentences("text", 150 * scale)
+
+    with open(os.path.join(directory, "sample.txt"), 'w', encoding='utf-8') as file:
+        file.write("\n".join(paragraphs))
+
+    with open(os.path.join(directory, "sample.md"), 'w', encoding='utf-8') as file:
+        for index in range(0, len(paragraphs), 10):
+            file.write(f"## Section {index // 10 + 1}\n\n" + " ".join(paragraphs[index:index + 10]) + "\n\n")
+
+    with open(os.path.join(directory, "sample.csv"), 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(os.path.join(directory, "sample.xlsx"))
+
+    with open(os.path.join(directory, "sample.xml"), 'w', encoding='utf-8') as file:
+        file.write("<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n<sales>\n")
+        for row in rows:
+            file.write("  <sale>" + "".join(f"<{name}>{value}</{name}>" for name, value in zip(header, row)) + "</sale>\n")
+        file.write("</sales>\n")
+
+    write_pdf(os.path.join(directory, "sample.pdf"), [paragraphs[index:index + 40] for index in range(0, len(paragraphs), 40)])
+    write_docx(os.path.join(directory, "sample.docx"), paragraphs)
+    write_pptx(os.path.join(directory, "sample.pptx"), [
+        (f"Slide {index // 6 + 1}", paragraphs[index:index + 6]) for index in range(0, min(len(paragraphs), 120), 6)
+    ])
+
+    return {file_type: f"sample.{file_type}" for file_type in FILE_TYPES}
+
+# ---------------------------------------------------------------- measurement
+
+class PeakRSS:
+    """Samples the resident memory of the process in a thread and keeps the highest value."""
+    def __init__(self, interval_seconds=0.01):
+        self.interval_seconds = interval_seconds
+        self.process = psutil.Process()
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while True:
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            if self._stop.wait(self.interval_seconds):
+                return
+
+    def __enter__(self):
+        self.peak = self.process.memory_info().rss
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+def percentile(values, fraction):
+    # Nearest-rank percentile, exact for the small samples of a benchmark round
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+def request_payload(file_url, file_type, index):
+    payload = build_payload(file_url)
+    payload["file_type"] = file_type
+    # A distinct topic per request gives every request its own prompt, and so its own deck to render
+    payload["request_args"]["topic"] = f"Benchmark {file_type} {index}"
+    return payload
+
+async def run_request(path, client, payload):
+    if path == "api":
+        response = await client.post("/generate-ppt", json=payload, headers={"api-key": "dev"})
+        response.raise_for_status()
+    else:
+        await run_full_workflow(RequestSchemaWithFiles(**payload))
+
+async def run_level(path, client, file_url, file_type, concurrency, requests) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = []
+
+    async def one_request(index):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await run_request(path, client, request_payload(file_url, file_type, index))
+            except Exception as e:
+                # The loaders wrap their errors, the cause says what actually failed
+                errors.append(repr(e.__cause__ or e))
+                return
+            latencies.append(time.perf_counter() - started)
+
+    with PeakRSS() as rss:
+        started = time.perf_counter()
+        await asyncio.gather(*(one_request(index) for index in range(requests)))
+        wall_seconds = time.perf_counter() - started
+
+    return {
+        "path": path,
+        "file_type": file_type,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "throughput_rps": round(len(latencies) / wall_seconds, 3),
+        "p50_seconds": round(percentile(latencies, 0.5), 4) if latencies else None,
+        "p95_seconds": round(percentile(latencies, 0.95), 4) if latencies else None,
+        "peak_rss_mb": round(rss.peak / 2 ** 20, 1)
+    }
+
+async def run_suite(args) -> list:
+    install_fake_models(args.latency)
+    results = []
+
+    with tempfile.TemporaryDirectory() as fixtures_dir:
+        file_names = write_fixtures(fixtures_dir, args.scale)
+        server = start_file_server(fixtures_dir)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            for path in args.paths:
+                for file_type in args.file_types:
+                    file_url = f"{base_url}/{file_names[file_type]}"
+                    # One unmeasured request imports the loader and warms its caches
+                    await run_level(path, client, file_url, file_type, 1, 1)
+                    for concurrency in args.concurrency:
+                        result = await run_level(path, client, file_url, file_type, concurrency, max(args.requests, concurrency))
+                        results.append(result)
+                        print_result(result)
+
+        server.shutdown()
+    return results
+
+# ---------------------------------------------------------------- reporting
+
+def print_header():
+    print(f"{'path':<9} {'type':<5} {'conc':>5} {'reqs':>5} {'err':>4} {'req/s':>8} {'p50 (s)':>8} {'p95 (s)':>8} {'rss (MB)':>9}")
+
+def print_result(result):
+    p50 = f"{result['p50_seconds']:.3f}" if result["p50_seconds"] is not None else "-"
+    p95 = f"{result['p95_seconds']:.3f}" if result["p95_seconds"] is not None else "-"
+    print(
+        f"{result['path']:<9} {result['file_type']:<5} {result['concurrency']:>5} {result['requests']:>5} {result['errors']:>4} "
+        f"{result['throughput_rps']:>8.2f} {p50:>8} {p95:>8} {result['peak_rss_mb']:>9.1f}",
+        flush=True
+    )
+    if result["first_error"]:
+        print(f"          first error: {result['first_error']}")
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def save_results(results, args) -> str:
+    output = args.output or os.path.join(RESULTS_DIR, datetime.datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    report = {
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "latency": args.latency, "scale": args.scale, "requests": args.requests,
+            "concurrency": args.concurrency, "file_types": args.file_types, "paths": args.paths
+        },
+        "results": results
+    }
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    return output
+
+# Measures compared between runs, and whether a higher value is better
+COMPARED_MEASURES = {"throughput_rps": True, "p50_seconds": False, "p95_seconds": False, "peak_rss_mb": False}
+
+def compare_results(results, baseline_path, threshold) -> int:
+    """Prints the relative change of every measure against a baseline run and returns the number of regressions."""
+    with open(baseline_path, 'r', encoding='utf-8') as file:
+        baseline = json.load(file)
+    baseline_results = {(result["path"], result["file_type"], result["concurrency"]): result for result in baseline["results"]}
+
+    print(f"\nCompared with {baseline_path} (commit {baseline.get('git_commit')}), regressions beyond {threshold:.0%} marked with !")
+    print(f"{'path':<9} {'type':<5} {'conc':>5} " + " ".join(f"{measure:>15}" for measure in COMPARED_MEASURES))
+    regressions = 0
+    for result in results:
+        previous = baseline_results.get((result["path"], result["file_type"], result["concurrency"]))
+        if previous is None:
+            continue
+        cells = []
+        for measure, higher_is_better in COMPARED_MEASURES.items():
+            if not previous.get(measure) or result.get(measure) is None:
+                cells.append(f"{'-':>15}")
+                continue
+            change = result[measure] / previous[measure] - 1
+            regressed = -change > threshold if higher_is_better else change > threshold
+            regressions += regressed
+            cells.append(f"{change:>+14.1%}{'!' if regressed else ' '}")
+        print(f"{result['path']:<9} {result['file_type']:<5} {result['concurrency']:>5} " + " ".join(cells))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paths", nargs="+", choices=PATHS, default=PATHS, help="Run through the API endpoint, run_full_workflow, or both")
+    parser.add_argument("--file-types", nargs="+", choices=FILE_TYPES, default=FILE_TYPES)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=16, help="Requests per level, at least the concurrency of the level")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds each fake model call takes")
+    parser.add_argument("--scale", type=int, default=1, help="Multiplies the size of the sample files")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="Results file of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change counted as a regression")
+    parser.add_argument("--verbose", action="store_true", help="Keep the application logs")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        for name in list(logging.Logger.manager.loggerDict):
+            if name.startswith("app"):
+                logging.getLogger(name).setLevel(logging.WARNING)
+
+    print_header()
+    results = asyncio.run(run_suite(args))
+    print(f"\nResults written to {save_results(results, args)}")
+
+    if args.compare and compare_results(results, args.compare, args.threshold):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Rate limit benchmark for the model governor.
+
+Sends a burst of calls to a local fake model that allows `--server-rpm` requests per
+minute and answers the others with a 429 and a Retry-After delay, like Gemini does.
+The burst runs once straight against the fake model and once through a ModelGovernor,
+and the number of failed calls, 429s and the time calls were throttled are reported for both.
+
+Usage:
+    python benchmarks/rate_limit_benchmark.py --calls 200 --server-rpm 600 --client-rpm 540
+"""
+import argparse
+import asyncio
+import collections
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from langchain_core.runnables import Runnable
+
+from app.api.features.utils.model_governor import GovernedModel, ModelGovernor
+
+class FakeRateLimitError(Exception):
+    def __init__(self, retry_after):
+        self.status_code = 429
+        self.retry_after = retry_after
+        super().__init__(f"429 RESOURCE_EXHAUSTED, retry in {retry_after:.2f}s")
+
+class FakeRateLimitedModel(Runnable):
+    """Fake model enforcing a sliding one-minute request limit, answering after `latency` seconds."""
+    def __init__(self, requests_per_minute, latency=0.05, window_seconds=60.0):
+        self.requests_per_minute = requests_per_minute
+        self.latency = latency
+        self.window_seconds = window_seconds
+        self.accepted = collections.deque()
+        self.rejected = 0
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        now = time.monotonic()
+        while self.accepted and now - self.accepted[0] > self.window_seconds:
+            self.accepted.popleft()
+        if len(self.accepted) >= self.requests_per_minute:
+            self.rejected += 1
+            raise FakeRateLimitError(self.window_seconds - (now - self.accepted[0]))
+        self.accepted.append(now)
+        await asyncio.sleep(self.latency)
+        return f"response to {input}"
+
+    def invoke(self, input, config=None, **kwargs):
+        return asyncio.run(self.ainvoke(input, config, **kwargs))
+
+async def run_burst(model, calls):
+    start = time.perf_counter()
+    results = await asyncio.gather(*(model.ainvoke(f"call {index}") for index in range(calls)), return_exceptions=True)
+    failed = sum(isinstance(result, Exception) for result in results)
+    return failed, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200, help="Calls in the burst")
+    parser.add_argument("--server-rpm", type=int, default=600, help="Requests per minute the fake model accepts")
+    parser.add_argument("--client-rpm", type=int, default=540, help="Requests per minute allowed by the governor")
+    parser.add_argument("--window", type=float, default=6.0, help="Length in seconds of the fake model's rate window, shortened to keep the run quick")
+    args = parser.parse_args()
+
+    # The fake model counts requests over a shortened window so the run takes seconds
+    # instead of minutes, and the governor's burst is shortened to match
+    server_limit = int(args.server_rpm * args.window / 60)
+
+    print(f"{'mode':<12} {'failed':>7} {'429s':>6} {'seconds':>8} {'throttled (s)':>13}")
+
+    raw_model = FakeRateLimitedModel(server_limit, window_seconds=args.window)
+    failed, elapsed = asyncio.run(run_burst(raw_model, args.calls))
+    print(f"{'direct':<12} {failed:>7} {raw_model.rejected:>6} {elapsed:>8.2f} {0:>13.2f}")
+
+    governed_backend = FakeRateLimitedModel(server_limit, window_seconds=args.window)
+    governor = ModelGovernor(
+        "fake-model",
+        requests_per_minute=args.client_rpm,
+        tokens_per_minute=10 ** 9,
+        max_concurrency=32,
+        max_retries=5,
+        backoff_base_seconds=0.1,
+        backoff_max_seconds=2.0,
+        burst_seconds=args.window
+    )
+    failed, elapsed = asyncio.run(run_burst(GovernedModel(governed_backend, governor), args.calls))
+    metrics = governor.metrics()
+    print(f"{'governed':<12} {failed:>7} {governed_backend.rejected:>6} {elapsed:>8.2f} {metrics['throttled_seconds']:>13.2f}")
+
+if __name__ == "__main__":
+    main()
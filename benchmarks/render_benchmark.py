@@ -0,0 +1,92 @@
+"""
+Micro-benchmark of PPTX rendering.
+
+Measures decks per second for 10- and 100-slide inputs with the in-memory renderer
+(cached stripped template, rendered into a BytesIO) and with the previous approach
+(template opened from disk and stripped for every deck, result written to disk).
+
+Usage:
+    python benchmarks/render_benchmark.py --decks 20 --slides 10 100
+"""
+import argparse
+import os
+import sys
+import statistics
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.chdir(ROOT_DIR)
+
+from pptx import Presentation
+from pptx.util import Inches
+
+from app.api.features.generate_ppt import get_template_bytes, image_boxes, render_pptx, return_images, template_path
+from app.api.features.utils.image_assets import image_asset_store
+
+def build_deck(n_slides):
+    return {
+        "title": "Benchmark Deck",
+        "description": "A deck used to benchmark rendering.",
+        "slides": [
+            {"title": f"Slide {i}", "content": f"Point one of slide {i}.\nPoint two of slide {i}.\nPoint three of slide {i}."}
+            for i in range(1, n_slides + 1)
+        ],
+    }
+
+def render_from_disk(result, images, output_dir):
+    prs = Presentation(template_path)
+    for i in range(len(prs.slides) - 1, -1, -1):
+        rId = prs.slides._sldIdLst[i].rId
+        prs.part.drop_rel(rId)
+        del prs.slides._sldIdLst[i]
+
+    slide = prs.slides.add_slide(prs.slide_layouts[0])
+    slide.shapes.title.text = result['title']
+    slide.placeholders[1].text = result['description']
+
+    for slide_index, slide_content in enumerate(result['slides']):
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = slide_content['title']
+        slide.placeholders[1].text = slide_content['content']
+        if slide_index < len(images):
+            for image in images[slide_index]:
+                slide.shapes.add_picture(os.path.join(image_asset_store.directory, image['asset']), Inches(image['left']), Inches(image['top']), width=Inches(image['width']), height=Inches(image['height']))
+
+    prs.save(os.path.join(output_dir, "benchmark.pptx"))
+
+def decks_per_second(renders, decks):
+    """Renders `decks` decks with each function, interleaved so that both see the same machine state."""
+    samples = [[] for _ in renders]
+    for render in renders:
+        render()
+    for _ in range(decks):
+        for index, render in enumerate(renders):
+            start = time.perf_counter()
+            render()
+            samples[index].append(time.perf_counter() - start)
+    return [1 / statistics.median(timings) for timings in samples]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--decks", type=int, default=20, help="Decks rendered per measurement")
+    parser.add_argument("--slides", type=int, nargs="+", default=[10, 100])
+    args = parser.parse_args()
+
+    images = return_images()
+    get_template_bytes()
+    image_asset_store.load(image_boxes())
+
+    print(f"{'slides':>7} {'in-memory (decks/s)':>20} {'from disk (decks/s)':>20} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as output_dir:
+        for n_slides in args.slides:
+            deck = build_deck(n_slides)
+            in_memory, from_disk = decks_per_second([
+                lambda: render_pptx(deck, images),
+                lambda: render_from_disk(deck, images, output_dir)
+            ], args.decks)
+            print(f"{n_slides:>7} {in_memory:>20.1f} {from_disk:>20.1f} {in_memory / from_disk:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
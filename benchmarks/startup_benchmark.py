@@ -0,0 +1,75 @@
+"""
+Startup benchmark for the FastAPI application.
+
+Imports `app.main` in fresh interpreters and reports the wall time of the import
+and the resident memory of the process right after it. Pass `--ref` to measure
+another git revision side by side (it is checked out in a temporary worktree),
+e.g. the commit before a change:
+
+    python benchmarks/startup_benchmark.py --runs 5 --ref HEAD~1
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MEASURE_SCRIPT = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+try:
+    import psutil
+    rss = psutil.Process().memory_info().rss
+except ImportError:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+print(json.dumps({"import_seconds": elapsed, "rss_bytes": rss, "modules": len(sys.modules)}))
+"""
+
+def measure(tree_dir, runs):
+    environment = dict(os.environ, PYTHONPATH=tree_dir)
+    environment.setdefault("GOOGLE_API_KEY", "startup-benchmark")
+    environment.setdefault("ENV_TYPE", "dev")
+
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", MEASURE_SCRIPT],
+            cwd=tree_dir, env=environment, capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    return {
+        "import_seconds": statistics.median(sample["import_seconds"] for sample in samples),
+        "rss_mb": statistics.median(sample["rss_bytes"] for sample in samples) / (1024 * 1024),
+        "modules": statistics.median(sample["modules"] for sample in samples)
+    }
+
+def print_row(label, result):
+    print(f"{label:<20} {result['import_seconds']:>12.3f} {result['rss_mb']:>10.1f} {result['modules']:>9.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters per tree")
+    parser.add_argument("--ref", help="Git revision to compare against")
+    args = parser.parse_args()
+
+    print(f"{'tree':<20} {'import (s)':>12} {'RSS (MB)':>10} {'modules':>9}")
+
+    if args.ref:
+        with tempfile.TemporaryDirectory() as worktree_dir:
+            subprocess.run(["git", "worktree", "add", "--detach", worktree_dir, args.ref], cwd=ROOT_DIR, check=True, capture_output=True)
+            try:
+                print_row(args.ref, measure(worktree_dir, args.runs))
+            finally:
+                subprocess.run(["git", "worktree", "remove", "--force", worktree_dir], cwd=ROOT_DIR, check=True, capture_output=True)
+
+    print_row("working tree", measure(ROOT_DIR, args.runs))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Benchmark of web page extraction for the url file type.
+
+Serves a generated corpus of article pages (navigation, header, footer, sidebar,
+scripts and styles around the article) from a local HTTP server, then extracts every
+page with the lightweight HTML extractor and with UnstructuredURLLoader, the previous
+loader. Reports the latency, the throughput at the given concurrency, the length of the
+extracted text, the share of pages leaking boilerplate and the share of article
+sentences recovered.
+
+Both extractors refuse local addresses by default; the benchmark allows them for its
+own server.
+
+Usage:
+    python benchmarks/url_extraction_benchmark.py --pages 50 --concurrency 1 8
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.chdir(ROOT_DIR)
+
+os.environ["UNSTRUCTURED_ALLOW_PRIVATE_URL"] = "true"
+os.environ["URL_ALLOW_PRIVATE_ADDRESSES"] = "true"
+
+from app.api.features.document_loaders import load_url_content
+from app.api.features.utils.executor import run_in_executor, shutdown_executor
+from app.api.features.utils.html_extraction import load_html_text
+from app.api.features.utils.http_client import close_http_client
+
+BOILERPLATE_MARKERS = ("NAVLINK", "SITEBANNER", "COPYRIGHTLINE", "SIDEBARAD", "SCRIPTCODE", "STYLERULE")
+
+WORDS = "market growth revenue team product customer quarter launch model data report region strategy cost".split()
+
+def build_page(index, rng):
+    """Returns the HTML of an article page and the sentences of its article."""
+    sentences = [
+        f"Sentence {index}-{n} " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(12, 30))) + "."
+        for n in range(rng.randint(20, 80))
+    ]
+    paragraphs = [sentences[i:i + 4] for i in range(0, len(sentences), 4)]
+    article = f"<h1>Article {index}</h1>" + "".join(
+        f"<p>{' '.join(paragraph)}</p>" if n % 5 else f"<h2>Part {n}</h2><ul>{''.join(f'<li>{s}</li>' for s in paragraph)}</ul>"
+        for n, paragraph in enumerate(paragraphs)
+    )
+    # Some sites wrap the text in <article>, some in <main>, some in plain divs
+    wrapper = ("<article>{}</article>", "<main>{}</main>", "<div class='content'><div>{}</div></div>")[index % 3]
+    html = (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Page</title>"
+        "<style>.STYLERULE { color: red }</style><script>var SCRIPTCODE = 1;</script></head><body>"
+        "<header><div>SITEBANNER</div></header>"
+        f"<nav><ul>{''.join(f'<li><a href=/{n}>NAVLINK {n}</a></li>' for n in range(30))}</ul></nav>"
+        + wrapper.format(article) +
+        "<aside>SIDEBARAD subscribe now</aside>"
+        "<footer><p>COPYRIGHTLINE all rights reserved</p></footer>"
+        "<script>window.SCRIPTCODE = function () { return 2; };</script></body></html>"
+    )
+    return html.encode("utf-8"), sentences
+
+def serve(pages):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body leave in one write, separate small writes stall on delayed ACKs
+        wbufsize = 1 << 16
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            body = pages.get(self.path)
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, name="corpus-server", daemon=True).start()
+    return server
+
+async def run(extract, urls, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = {}
+    texts = {}
+
+    async def one(url):
+        async with semaphore:
+            started = time.perf_counter()
+            texts[url] = await extract(url) or ""
+            latencies[url] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(url) for url in urls))
+    return time.perf_counter() - started, latencies, texts
+
+async def fast_extract(url):
+    return await load_html_text(url)
+
+async def unstructured_extract(url):
+    return await run_in_executor(load_url_content, url)
+
+def quality(texts, sentences):
+    leaking = sum(1 for text in texts.values() if any(marker in text for marker in BOILERPLATE_MARKERS))
+    recalled = [
+        sum(1 for sentence in sentences[url] if sentence in texts[url]) / len(sentences[url])
+        for url in texts
+    ]
+    return leaking / len(texts), statistics.mean(recalled)
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50, help="Pages in the corpus")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pages = {}
+    sentences = {}
+    server = serve(pages)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    for index in range(args.pages):
+        path = f"/article-{index}.html"
+        pages[path], sentences[f"{base_url}{path}"] = build_page(index, rng)
+    urls = list(sentences)
+    print(f"Corpus: {len(urls)} pages, {sum(len(body) for body in pages.values()) / len(pages) / 1024:.1f} KiB on average")
+
+    extractors = {"fast": fast_extract, "unstructured": unstructured_extract}
+
+    # The first page pays for the imports of each extractor
+    for name, extract in extractors.items():
+        started = time.perf_counter()
+        await extract(urls[0])
+        print(f"{name}: first page in {time.perf_counter() - started:.2f} s (cold)")
+
+    print(f"{'extractor':<13} {'conc':>4} {'pages/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'chars':>7} {'leaks':>6} {'recall':>7}")
+    try:
+        for concurrency in args.concurrency:
+            for name, extract in extractors.items():
+                elapsed, latencies, texts = await run(extract, urls, concurrency)
+                ordered = sorted(latencies.values())
+                failed = sum(1 for text in texts.values() if not text)
+                if failed == len(texts):
+                    print(f"{name:<13} {concurrency:>4} no page extracted, see the errors above")
+                    continue
+                leak_rate, recall = quality(texts, sentences)
+                print(
+                    f"{name:<13} {concurrency:>4} {len(urls) / elapsed:>8.1f} {statistics.median(ordered) * 1000:>9.1f} "
+                    f"{ordered[int(0.95 * (len(ordered) - 1))] * 1000:>9.1f} {statistics.mean(len(t) for t in texts.values()):>7.0f} "
+                    f"{leak_rate:>6.0%} {recall:>7.0%}" + (f"  ({failed} pages failed)" if failed else "")
+                )
+    finally:
+        server.shutdown()
+        await close_http_client()
+        shutdown_executor()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+import os
+import tempfile
+
+# The caches and stores read their settings when imported, so they are pointed at a
+# scratch directory before any test imports the app
+STATE_DIR = tempfile.mkdtemp(prefix="aipptbuilder-tests-")
+
+for name, directory in {
+    "SUMMARY_CACHE_DIR": "summaries",
+    "DOWNLOAD_CACHE_DIR": "downloads",
+    "ARTIFACT_STORE_DIR": "decks",
+    "TRANSCRIPT_CACHE_DIR": "transcripts",
+    "IMAGE_HASH_INDEX_DIR": "image_hashes",
+    "BATCH_MANIFEST_DIR": "batches",
+    "PROFILE_DIR": "profiles"
+}.items():
+    os.environ.setdefault(name, os.path.join(STATE_DIR, directory))
+os.environ.setdefault("RESPONSE_CACHE_PATH", os.path.join(STATE_DIR, "responses.sqlite3"))
+os.environ.setdefault("ENV_TYPE", "test")
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+
+import functools
+import http.server
+import threading
+
+import pytest
+
+from tests.fakes import FakeProvider, install_fake_provider
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def file_server(tmp_path):
+    """Serves `tmp_path` over HTTP, yielding the directory and its base URL."""
+    handler = functools.partial(QuietHandler, directory=str(tmp_path))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield tmp_path, f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+@pytest.fixture
+def fake_models():
+    """Replaces the Gemini clients by fake models; call it with the latency of every call."""
+    restore = []
+
+    def install(latency=0.0):
+        provider = FakeProvider(latency)
+        restore.append(install_fake_provider(provider))
+        return provider
+
+    yield install
+    for undo in reversed(restore):
+        undo()
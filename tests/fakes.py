@@ -0,0 +1,85 @@
+"""Local stand-ins for the services the pipeline calls, shared by the tests."""
+import asyncio
+import hashlib
+import json
+
+from langchain_core.runnables import Runnable
+
+class FakeModel(Runnable):
+    """
+    Deterministic stand-in for a Gemini client. Waits `latency` seconds, then answers PPT
+    prompts (recognized by their JSON format instructions) with a deck of `n_slides`
+    slides and every other prompt with a summary derived from the prompt's hash.
+    """
+    def __init__(self, latency=0.0, n_slides=5):
+        self.latency = latency
+        self.n_slides = n_slides
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def answer(self, prompt):
+        from app.api.features.compile_chain_for_ppt import format_instructions
+
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        if format_instructions in prompt:
+            return json.dumps({
+                "title": f"Deck {digest}",
+                "description": f"Description {digest}",
+                "slides": [{"title": f"Slide {index + 1}", "content": f"Content {index + 1}"} for index in range(self.n_slides)]
+            })
+        return f"Summary {digest}"
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        prompt = input.to_string() if hasattr(input, "to_string") else str(input)
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        return self.answer(prompt)
+
+    def invoke(self, input, config=None, **kwargs):
+        return asyncio.run(self.ainvoke(input, config, **kwargs))
+
+class FakeProvider:
+    """Model provider handing out one shared FakeModel, see app/api/features/model_providers.py."""
+    def __init__(self, latency=0.0):
+        self.model = FakeModel(latency)
+
+    def create(self, kind, model_name):
+        return self.model
+
+def install_fake_provider(provider):
+    """
+    Makes the chain registry create models from `provider`, behind governors loose enough
+    not to throttle the tests. Returns a function undoing it.
+    """
+    from app.api.features.chain_registry import chain_registry
+    from app.api.features.compile_chain_for_ppt import PPT_MODEL
+    from app.api.features.document_loaders import SUMMARY_MODEL
+    from app.api.features.utils.model_governor import governor_registry
+
+    previous_provider = chain_registry.provider
+    previous_limits = {model_name: governor_registry.model_limits.get(model_name) for model_name in (SUMMARY_MODEL, PPT_MODEL)}
+    for model_name in previous_limits:
+        governor_registry.model_limits[model_name] = {"requests_per_minute": 10 ** 6, "tokens_per_minute": 10 ** 10, "max_concurrency": 1024}
+        governor_registry.governors.pop(model_name, None)
+    chain_registry.provider = provider
+    chain_registry.models.clear()
+    chain_registry.chains.clear()
+
+    def undo():
+        for model_name, limits in previous_limits.items():
+            if limits is None:
+                governor_registry.model_limits.pop(model_name, None)
+            else:
+                governor_registry.model_limits[model_name] = limits
+            governor_registry.governors.pop(model_name, None)
+        chain_registry.provider = previous_provider
+        chain_registry.models.clear()
+        chain_registry.chains.clear()
+
+    return undo
@@ -0,0 +1,48 @@
+import os
+import time
+
+from app.api.features.utils.artifact_store import ArtifactStore
+
+def store_deck(store, index):
+    artifact_id = ArtifactStore.make_id("deck", index)
+    return store.put(artifact_id, f"deck {index}".encode("utf-8") * 100, f"deck-{index}.pptx")
+
+def test_decks_expire_from_their_creation_time(tmp_path, monkeypatch):
+    store = ArtifactStore(str(tmp_path), ttl_seconds=100)
+    deck = store_deck(store, 1)
+    created_at = deck.created_at
+
+    # Reading a deck touches its file, which must not extend its life
+    monkeypatch.setattr(time, "time", lambda: created_at + 90)
+    assert store.get(deck.artifact_id) is not None
+    monkeypatch.setattr(time, "time", lambda: created_at + 101)
+    assert store.get(deck.artifact_id) is None
+
+def test_eviction_applies_the_same_ttl_as_get(tmp_path, monkeypatch):
+    store = ArtifactStore(str(tmp_path), ttl_seconds=100)
+    expired = store_deck(store, 1)
+    # An old file modification time alone does not expire a fresh deck
+    fresh = store_deck(store, 2)
+    os.utime(fresh.path, (fresh.created_at - 1000, fresh.created_at - 1000))
+
+    monkeypatch.setattr(time, "time", lambda: expired.created_at + 50)
+    store_deck(store, 3)
+    assert os.path.exists(fresh.path)
+
+    monkeypatch.setattr(time, "time", lambda: expired.created_at + 150)
+    store_deck(store, 4)
+    assert not os.path.exists(expired.path)
+    assert not os.path.exists(fresh.path)
+
+def test_least_recently_used_decks_are_evicted_over_max_bytes(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_bytes=1500)
+    first = store_deck(store, 1)
+    second = store_deck(store, 2)
+    os.utime(first.path, (time.time() - 100, time.time() - 100))
+    os.utime(second.path, (time.time() - 50, time.time() - 50))
+    store.get(first.artifact_id)
+
+    store_deck(store, 3)
+
+    assert store.get(first.artifact_id) is not None
+    assert store.get(second.artifact_id) is None
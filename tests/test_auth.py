@@ -0,0 +1,140 @@
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.auth import auth
+from app.api.auth.auth import ApiKeyStore, create_api_key_store
+
+class FakeSecretManager:
+    """Local stand-in for the Secret Manager client, counting its calls."""
+    def __init__(self, payload="key-1\nkey-2\n"):
+        self.payload = payload
+        self.failing = False
+        self.calls = 0
+        self.delay = 0.0
+
+    def access_secret_version(self, name):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.failing:
+            raise ConnectionError("Secret Manager is unreachable")
+        data = self.payload.encode("utf-8")
+        return type("Response", (), {"payload": type("Payload", (), {"data": data})()})()
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(auth.time, "monotonic", clock)
+    return clock
+
+def key_store(client, **settings):
+    settings = dict({"ttl_seconds": 300, "max_stale_seconds": 3600, "retry_seconds": 10}, **settings)
+    return ApiKeyStore(["backend-access"], client=client, **settings)
+
+def test_keys_are_cached_until_the_ttl(clock):
+    client = FakeSecretManager()
+    store = key_store(client)
+
+    assert store.is_valid("key-1") and store.is_valid("key-2")
+    assert not store.is_valid("key-3")
+    assert client.calls == 1
+
+    clock.now += 301
+    client.payload = "key-3"
+    assert store.is_valid("key-3")
+    assert not store.is_valid("key-1")
+    assert client.calls == 2
+
+def test_stale_keys_are_served_while_secret_manager_is_down(clock):
+    client = FakeSecretManager()
+    store = key_store(client)
+    store.is_valid("key-1")
+
+    client.failing = True
+    clock.now += 301
+    assert store.is_valid("key-1")
+    assert client.calls == 2
+
+    # The failed refresh is not retried on every request
+    for _ in range(20):
+        assert store.is_valid("key-1")
+    assert client.calls == 2
+
+    clock.now += 11
+    assert store.is_valid("key-1")
+    assert client.calls == 3
+
+def test_stale_keys_are_refused_after_max_stale(clock):
+    client = FakeSecretManager()
+    store = key_store(client)
+    store.is_valid("key-1")
+
+    client.failing = True
+    clock.now += 3601
+    with pytest.raises(ConnectionError):
+        store.is_valid("key-1")
+    # Without usable keys, requests fail fast until the next attempt is due
+    with pytest.raises(RuntimeError):
+        store.is_valid("key-1")
+    assert client.calls == 2
+
+    client.failing = False
+    clock.now += 11
+    assert store.is_valid("key-1")
+
+def test_only_one_caller_refreshes_expired_keys(clock):
+    client = FakeSecretManager()
+    store = key_store(client)
+    store.is_valid("key-1")
+
+    client.delay = 0.2
+    clock.now += 301
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.is_valid("key-1"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [True] * 8
+    assert client.calls == 2
+
+def test_production_reads_secret_manager(monkeypatch):
+    monkeypatch.setenv("ENV_TYPE", "production")
+    client = FakeSecretManager()
+    store = create_api_key_store(client=client)
+
+    assert store.static_keys is None
+    assert not store.is_valid("dev")
+    assert client.calls == 1
+
+@pytest.mark.parametrize("env_type", ["dev", "sandbox", "test"])
+def test_other_environments_accept_the_static_key(monkeypatch, env_type):
+    monkeypatch.setenv("ENV_TYPE", env_type)
+    assert create_api_key_store().is_valid("dev")
+
+def test_key_check_answers_503_without_an_environment(monkeypatch):
+    monkeypatch.delenv("ENV_TYPE")
+    monkeypatch.setattr(auth, "_api_key_store", None)
+
+    with pytest.raises(HTTPException) as error:
+        auth.key_check("dev")
+    assert error.value.status_code == 503
+
+def test_key_check_answers_503_when_keys_are_unavailable(monkeypatch):
+    client = FakeSecretManager()
+    client.failing = True
+    monkeypatch.setattr(auth, "_api_key_store", key_store(client))
+
+    with pytest.raises(HTTPException) as error:
+        auth.key_check("key-1")
+    assert error.value.status_code == 503
@@ -0,0 +1,25 @@
+import gc
+
+from langchain_core.output_parsers import StrOutputParser
+
+from app.api.features.chain_registry import ChainRegistry
+from tests.fakes import FakeProvider
+
+PROMPT = "prompts/generate-slide-prompt.txt"
+
+def test_chains_with_other_partial_variables_are_not_shared():
+    registry = ChainRegistry(provider=FakeProvider())
+    english = registry.get_chain(PROMPT, "model", partial_variables={"format_instructions": "English"})
+    french = registry.get_chain(PROMPT, "model", partial_variables={"format_instructions": "French"})
+
+    assert english is not french
+    assert french.first.partial_variables == {"format_instructions": "French"}
+    assert registry.get_chain(PROMPT, "model", partial_variables={"format_instructions": "English"}) is english
+
+def test_chains_are_not_shared_by_a_parser_at_a_reused_address():
+    registry = ChainRegistry(provider=FakeProvider())
+    registry.get_chain(PROMPT, "model", parser=StrOutputParser())
+    gc.collect()
+
+    parser = StrOutputParser()
+    assert registry.get_chain(PROMPT, "model", parser=parser).last is parser
@@ -0,0 +1,30 @@
+import asyncio
+
+from app.api.features import document_loaders
+from app.api.features.utils.download_cache import pinned_paths, remove_downloaded_file
+from app.api.features.utils.http_client import close_http_client
+from tests.test_generate_ppt import serve_sample
+
+def test_downloads_are_released_once(file_server, fake_models, monkeypatch):
+    fake_models()
+    url = serve_sample(file_server)
+    released = []
+
+    def release(downloaded_file):
+        released.append(downloaded_file.pin_id)
+        remove_downloaded_file(downloaded_file)
+
+    monkeypatch.setattr(document_loaders, "remove_downloaded_file", release)
+
+    async def run():
+        try:
+            # The first call parses the file, the second one is a summary cache hit
+            return [await document_loaders.get_summary(url, "txt") for _ in range(2)]
+        finally:
+            await close_http_client()
+
+    first, second = asyncio.run(run())
+
+    assert first == second
+    assert len(released) == 2 and len(set(released)) == 2
+    assert not pinned_paths()
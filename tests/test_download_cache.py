@@ -0,0 +1,59 @@
+import asyncio
+import hashlib
+import os
+
+from app.api.features.utils.download_cache import DownloadCache, remove_downloaded_file
+from app.api.features.utils.http_client import close_http_client
+
+def fetch_all(cache, urls):
+    async def run():
+        try:
+            return [await cache.fetch(url, "txt") for url in urls]
+        finally:
+            await close_http_client()
+
+    return asyncio.run(run())
+
+def serve_files(file_server, sizes):
+    directory, base_url = file_server
+    urls = []
+    for index, size in enumerate(sizes):
+        (directory / f"file-{index}.txt").write_bytes(bytes([65 + index]) * size)
+        urls.append(f"{base_url}/file-{index}.txt")
+    return directory, urls
+
+def test_download_is_stored_and_revalidated(file_server, tmp_path):
+    directory, [url] = serve_files(file_server, [3 * 1024 * 1024 + 17])
+    cache = DownloadCache(str(tmp_path / "cache"))
+
+    first, second = fetch_all(cache, [url, url])
+
+    content = (directory / "file-0.txt").read_bytes()
+    assert first.sha256 == hashlib.sha256(content).hexdigest()
+    with open(first.path, 'rb') as file:
+        assert file.read() == content
+    # The server answered the second request with a 304
+    assert second.path == first.path and not second.temporary
+    for downloaded_file in (first, second):
+        remove_downloaded_file(downloaded_file)
+
+def test_files_in_use_are_not_evicted(file_server, tmp_path):
+    _, urls = serve_files(file_server, [1000, 1000, 1000])
+    cache = DownloadCache(str(tmp_path / "cache"), max_cache_bytes=1500)
+
+    in_use = fetch_all(cache, urls[:1])[0]
+    released = fetch_all(cache, urls[1:2])[0]
+    remove_downloaded_file(released)
+    latest = fetch_all(cache, urls[2:])[0]
+
+    assert os.path.exists(in_use.path)
+    assert not os.path.exists(released.path)
+    assert os.path.exists(latest.path)
+    # The metadata of the evicted blob went with it
+    metas = os.listdir(cache.meta_dir)
+    assert len(metas) == 2
+    assert cache._read_meta(urls[1]) is None
+
+    remove_downloaded_file(in_use)
+    remove_downloaded_file(in_use)
+    remove_downloaded_file(latest)
@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+import httpx
+
+from app.main import app
+
+def build_payload(file_url, n_slides=5):
+    return {
+        "request_args": {
+            "topic": "Load testing",
+            "objective": "Check that concurrent requests overlap",
+            "target_audience": "Engineers",
+            "n_slides": n_slides,
+            "slide_breakdown": "One slide per idea",
+            "lang": "en"
+        },
+        "file_url": file_url,
+        "file_type": "txt",
+        "use_summary_cache": False,
+        "use_response_cache": False
+    }
+
+async def post_concurrently(payload, count):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+        return await asyncio.gather(*(
+            client.post("/generate-ppt", json=payload, headers={"api-key": "dev"}) for _ in range(count)
+        ))
+
+def serve_sample(file_server):
+    directory, base_url = file_server
+    (directory / "sample.txt").write_text("Python is a programming language. " * 200)
+    return f"{base_url}/sample.txt"
+
+def test_generate_ppt_returns_the_deck(file_server, fake_models):
+    fake_models()
+    [response] = asyncio.run(post_concurrently(build_payload(serve_sample(file_server)), 1))
+
+    assert response.status_code == 200
+    deck = response.json()
+    assert deck["title"].startswith("Deck ")
+    assert len(deck["slides"]) == 5
+
+def test_generate_ppt_rejects_a_wrong_api_key(file_server, fake_models):
+    fake_models()
+
+    async def post():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/generate-ppt", json=build_payload(serve_sample(file_server)), headers={"api-key": "wrong"})
+
+    assert asyncio.run(post()).status_code == 401
+
+def test_concurrent_requests_overlap(file_server, fake_models):
+    latency = 0.2
+    provider = fake_models(latency)
+    payload = build_payload(serve_sample(file_server))
+    concurrency = 8
+
+    started = time.perf_counter()
+    responses = asyncio.run(post_concurrently(payload, concurrency))
+    elapsed = time.perf_counter() - started
+
+    assert all(response.status_code == 200 for response in responses)
+    # Every request waits on at least a summary and a deck call; run one after the other
+    # they would take `concurrency` times as long
+    serial_seconds = concurrency * 2 * latency
+    assert elapsed < serial_seconds / 2
+    assert provider.model.max_in_flight > 1
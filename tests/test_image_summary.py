@@ -0,0 +1,40 @@
+import asyncio
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from app.api.features import document_loaders
+from app.api.features.errors.document_loader_errors import ImageHandlerError
+from app.api.features.utils import image_preprocessing
+from app.api.features.utils.http_client import close_http_client
+
+def summarize(url):
+    async def run():
+        try:
+            return await document_loaders.generate_summary_from_img(url, use_cache=False)
+        finally:
+            await close_http_client()
+
+    return asyncio.run(run())
+
+def serve_image(file_server, size):
+    directory, base_url = file_server
+    output = BytesIO()
+    Image.effect_noise(size, 64).save(output, format="PNG")
+    (directory / "image.png").write_bytes(output.getvalue())
+    return f"{base_url}/image.png", len(output.getvalue())
+
+def test_images_over_the_byte_limit_are_not_downloaded(file_server, monkeypatch):
+    url, image_bytes = serve_image(file_server, (400, 300))
+    monkeypatch.setattr(document_loaders, "image_max_bytes", image_bytes - 1)
+
+    with pytest.raises(ImageHandlerError, match="bytes limit"):
+        summarize(url)
+
+def test_images_over_the_pixel_limit_are_not_decoded(file_server, monkeypatch):
+    url, _ = serve_image(file_server, (400, 300))
+    monkeypatch.setattr(image_preprocessing, "image_max_pixels", 400 * 300 - 1)
+
+    with pytest.raises(ImageHandlerError, match="pixels limit"):
+        summarize(url)
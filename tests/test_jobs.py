@@ -0,0 +1,26 @@
+import asyncio
+
+from app.api.features.jobs import JobManager
+from app.api.features.schemas.schemas import JobRequestSchema, JobStage
+from tests.test_generate_ppt import build_payload, serve_sample
+
+def test_finished_job_exposes_the_deck_url_only(file_server, fake_models):
+    fake_models()
+    request = JobRequestSchema(**build_payload(serve_sample(file_server)))
+
+    async def run():
+        manager = JobManager(num_workers=1)
+        await manager.start()
+        try:
+            job = manager.submit(request)
+            while not job.is_finished:
+                await asyncio.sleep(0.01)
+            return job.to_schema()
+        finally:
+            await manager.stop()
+
+    status = asyncio.run(run()).model_dump()
+
+    assert status["stage"] == JobStage.COMPLETED
+    assert status["deck_url"] == f"/decks/{status['deck_id']}"
+    assert "file_path" not in status
@@ -0,0 +1,179 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.api.features.utils.model_governor import ModelGovernor, TokenBucket
+
+class FakeClock:
+    """Clock and sleep function advancing together, so pacing is tested without waiting."""
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+class FakeRateLimitError(Exception):
+    def __init__(self, retry_after=None, headers=None):
+        self.status_code = 429
+        self.retry_after = retry_after
+        self.response = type("Response", (), {"headers": headers or {}})()
+        super().__init__("429 RESOURCE_EXHAUSTED")
+
+class FakeBadRequestError(Exception):
+    status_code = 400
+
+def fake_governor(clock, **limits):
+    limits = dict({"requests_per_minute": 60, "tokens_per_minute": 10 ** 9, "max_concurrency": 4}, **limits)
+    return ModelGovernor("fake-model", clock=clock, sleep=clock.sleep, backoff_base_seconds=1.0, **limits)
+
+def failing_then_answering(errors):
+    """Returns a call raising `errors` one at a time, then answering "ok"."""
+    errors = list(errors)
+
+    async def call():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    return call
+
+def test_token_bucket_makes_callers_wait_in_turn():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock, capacity=2)
+
+    assert [bucket.reserve(1) for _ in range(4)] == [0.0, 0.0, 1.0, 2.0]
+    clock.now += 2.0
+    assert bucket.reserve(1) == 1.0
+
+def test_governor_paces_calls_to_the_request_rate():
+    clock = FakeClock()
+    governor = fake_governor(clock, burst_seconds=1.0)
+
+    async def run():
+        return [await governor.call(failing_then_answering([])) for _ in range(3)]
+
+    assert asyncio.run(run()) == ["ok"] * 3
+    assert clock.sleeps == [1.0, 1.0]
+    assert governor.metrics()["throttled_seconds"] == 2.0
+
+@pytest.mark.parametrize("error", [
+    FakeRateLimitError(retry_after=3),
+    FakeRateLimitError(headers={"retry-after": "3"})
+])
+def test_governor_waits_for_retry_after(error):
+    clock = FakeClock()
+    governor = fake_governor(clock)
+
+    assert asyncio.run(governor.call(failing_then_answering([error]))) == "ok"
+    assert len(clock.sleeps) == 1
+    # The server delay plus at most 10% of jitter
+    assert 3.0 <= clock.sleeps[0] <= 3.3
+    assert governor.paused_until == 3.0
+    assert governor.metrics()["rate_limited"] == 1
+    assert governor.metrics()["retries"] == 1
+
+def test_retry_after_pauses_the_other_calls():
+    clock = FakeClock()
+    governor = fake_governor(clock)
+
+    asyncio.run(governor.call(failing_then_answering([FakeRateLimitError(retry_after=5)])))
+    clock.now = 1.0
+    clock.sleeps.clear()
+    asyncio.run(governor.call(failing_then_answering([])))
+
+    assert clock.sleeps == [4.0]
+
+def test_governor_does_not_retry_client_errors():
+    clock = FakeClock()
+    governor = fake_governor(clock)
+
+    with pytest.raises(FakeBadRequestError):
+        asyncio.run(governor.call(failing_then_answering([FakeBadRequestError()])))
+    assert governor.metrics()["retries"] == 0
+    assert governor.metrics()["failures"] == 1
+
+def test_governor_gives_up_after_max_retries():
+    clock = FakeClock()
+    governor = fake_governor(clock)
+    governor.max_retries = 2
+
+    with pytest.raises(FakeRateLimitError):
+        asyncio.run(governor.call(failing_then_answering([FakeRateLimitError(retry_after=1) for _ in range(3)])))
+    assert governor.metrics()["retries"] == 2
+
+def test_concurrency_cap_holds_across_event_loops():
+    governor = ModelGovernor("fake-model", requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9, max_concurrency=2)
+    lock = threading.Lock()
+    in_flight = [0]
+    peak = [0]
+
+    async def call():
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        await asyncio.sleep(0.02)
+        with lock:
+            in_flight[0] -= 1
+        return "ok"
+
+    async def burst():
+        return await asyncio.gather(*(governor.call(call) for _ in range(5)))
+
+    # Each thread runs its own event loop, like synchronous callers and Gradio do
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(asyncio.run(burst()))) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [["ok"] * 5] * 2
+    assert peak[0] == 2
+    assert governor.metrics()["in_flight"] == 0
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    governor = ModelGovernor("fake-model", requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9, max_concurrency=1)
+
+    async def run():
+        release = asyncio.Event()
+
+        async def held():
+            await release.wait()
+            return "held"
+
+        holder = asyncio.create_task(governor.call(held))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(governor.call(held))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        release.set()
+        await holder
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        # The slot is free again for the next call
+        return await asyncio.wait_for(governor.call(held), 1)
+
+    assert asyncio.run(run()) == "held"
+
+def test_throttled_seconds_counts_wall_clock_time():
+    governor = ModelGovernor("fake-model", requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9, max_concurrency=1)
+
+    async def call():
+        await asyncio.sleep(0.02)
+
+    async def burst():
+        await asyncio.gather(*(governor.call(call) for _ in range(10)))
+
+    started = time.monotonic()
+    asyncio.run(burst())
+    elapsed = time.monotonic() - started
+
+    # Nine calls waited at the same time, which counts once
+    assert 0 < governor.metrics()["throttled_seconds"] <= elapsed
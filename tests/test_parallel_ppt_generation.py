@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+import pytest
+from langchain_core.runnables import Runnable
+
+from app.api.features.errors.generation_errors import SlideGenerationError
+from app.api.features.parallel_ppt_generation import generate_ppt_content_from_outline, summary_excerpt
+
+class OutlineModel(Runnable):
+    """Fake model answering outline prompts with `outline_sizes` slides in turn, and slide prompts."""
+    def __init__(self, outline_sizes):
+        self.outline_sizes = list(outline_sizes)
+        self.slide_prompts = []
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        prompt = input.to_string() if hasattr(input, "to_string") else str(input)
+        if "plan the outline" in prompt:
+            size = self.outline_sizes.pop(0)
+            return json.dumps({
+                "title": "Deck",
+                "description": "About databases",
+                "slides": [{"title": f"Topic {index}", "key_points": [f"topic{index} details"]} for index in range(size)]
+            })
+        self.slide_prompts.append(prompt)
+        return json.dumps({"title": "Slide", "content": "Content"})
+
+    def invoke(self, input, config=None, **kwargs):
+        return asyncio.run(self.ainvoke(input, config, **kwargs))
+
+class OutlineProvider:
+    def __init__(self, model):
+        self.model = model
+
+    def create(self, kind, model_name):
+        return self.model
+
+SUMMARY = " ".join(f"Sentence about topic{index} details number {index}." for index in range(200))
+
+def request_values(n_slides, summary=SUMMARY):
+    return {
+        "topic": "Databases", "objective": "Explain", "target_audience": "Engineers", "n_slides": n_slides,
+        "slide_breakdown": "One idea per slide", "lang": "en", "summary": summary
+    }
+
+@pytest.fixture
+def outline_model():
+    from tests.fakes import install_fake_provider
+
+    undo = []
+
+    def install(outline_sizes):
+        model = OutlineModel(outline_sizes)
+        undo.append(install_fake_provider(OutlineProvider(model)))
+        return model
+
+    yield install
+    for restore in undo:
+        restore()
+
+def test_extra_outline_slides_are_trimmed(outline_model):
+    outline_model([7])
+    deck = asyncio.run(generate_ppt_content_from_outline(request_values(5)))
+    assert len(deck["slides"]) == 5
+
+def test_short_outline_is_generated_again(outline_model):
+    model = outline_model([3, 5])
+    deck = asyncio.run(generate_ppt_content_from_outline(request_values(5)))
+    assert len(deck["slides"]) == 5
+    assert model.outline_sizes == []
+
+def test_short_outline_fails_after_its_retries(outline_model):
+    outline_model([3, 3])
+    with pytest.raises(SlideGenerationError):
+        asyncio.run(generate_ppt_content_from_outline(request_values(5)))
+
+def test_slides_get_the_relevant_part_of_the_summary(outline_model):
+    model = outline_model([4])
+    asyncio.run(generate_ppt_content_from_outline(request_values(4)))
+
+    assert len(model.slide_prompts) == 4
+    for prompt in model.slide_prompts:
+        assert SUMMARY not in prompt
+        assert len(prompt) < len(SUMMARY)
+    slide_two = next(prompt for prompt in model.slide_prompts if 'titled "Topic 2"' in prompt)
+    assert "Sentence about topic2 details number 2." in slide_two
+
+def test_summary_excerpt_keeps_the_order_and_the_budget():
+    summary = "Cats purr loudly. Databases store rows. Dogs bark often. Indexes speed databases up."
+    excerpt = summary_excerpt(summary, {"title": "Databases", "key_points": ["indexes"]}, max_chars=60)
+    assert excerpt == "Databases store rows. Indexes speed databases up."
+    assert summary_excerpt(summary, {"title": "Cats"}, max_chars=len(summary)) == summary
@@ -0,0 +1,99 @@
+import asyncio
+import json
+
+from app.api.features import stream_ppt
+from app.api.features.schemas.schemas import RequestSchemaWithFiles
+from app.api.features.stream_ppt import IncrementalDeckParser
+from app.api.features.utils.http_client import close_http_client
+from app.api.features.utils.stage_limits import create_stage_limits, use_stage_limits
+from tests.test_generate_ppt import build_payload, serve_sample
+
+class CountingParser(IncrementalDeckParser):
+    def __init__(self):
+        super().__init__()
+        self.parses = 0
+
+    def _parse(self):
+        self.parses += 1
+        return super()._parse()
+
+DECK = {
+    "title": "Braces {and} [brackets]",
+    "description": "A \"quoted\" description",
+    "slides": [
+        {"title": f"Slide {index}", "content": f"Point {{{index}}} with \"quotes\" and ] brackets"} for index in range(20)
+    ]
+}
+
+def stream(text, size):
+    parser = CountingParser()
+    events = []
+    for start in range(0, len(text), size):
+        events += parser.feed(text[start:start + size])
+    deck, remaining = parser.finish()
+    return parser, deck, events, events + remaining
+
+def test_slides_are_emitted_as_soon_as_they_are_closed():
+    text = "```json\n" + json.dumps(DECK, indent=2) + "\n```"
+    parser, deck, streamed, events = stream(text, 7)
+
+    assert deck == DECK
+    assert streamed[0] == ("deck", {"title": DECK["title"], "description": DECK["description"]})
+    # Every slide is emitted while streaming, before the end of the text
+    assert [event for event, _ in streamed] == ["deck"] + ["slide"] * 20
+    assert [payload["index"] for _, payload in streamed[1:]] == list(range(20))
+    assert streamed[5][1]["content"] == DECK["slides"][4]["content"]
+    assert events == streamed
+
+def test_text_is_parsed_once_per_slide_not_once_per_chunk():
+    text = json.dumps(DECK)
+    parser, _, _, _ = stream(text, 3)
+
+    chunks = -(-len(text) // 3)
+    assert parser.parses == len(DECK["slides"]) + 1
+    assert parser.parses < chunks / 10
+
+def test_truncated_stream_flushes_nothing_incomplete():
+    text = json.dumps(DECK)
+    cut = text.index("Slide 3")
+    parser = IncrementalDeckParser()
+    events = parser.feed(text[:cut])
+
+    assert [event for event, _ in events] == ["deck", "slide", "slide", "slide"]
+
+class CountingStreamingChain:
+    """Streams DECK in a few chunks, recording how many streams run at once."""
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def astream(self, chain_input):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            text = json.dumps(DECK)
+            for start in range(0, len(text), 500):
+                await asyncio.sleep(0.01)
+                yield text[start:start + 500]
+        finally:
+            self.in_flight -= 1
+
+def test_streamed_generation_takes_a_generate_slot(file_server, fake_models, monkeypatch):
+    fake_models()
+    chain = CountingStreamingChain()
+    monkeypatch.setattr(stream_ppt, "compile_streaming_chain", lambda: chain)
+    data = RequestSchemaWithFiles(**build_payload(serve_sample(file_server)))
+
+    async def consume():
+        return [event async for event in stream_ppt.stream_ppt_events(data)]
+
+    async def run():
+        use_stage_limits(create_stage_limits(generate=1))
+        try:
+            return await asyncio.gather(*(consume() for _ in range(3)))
+        finally:
+            await close_http_client()
+
+    for events in asyncio.run(run()):
+        assert events[-1].startswith("event: done")
+    assert chain.max_in_flight == 1
@@ -0,0 +1,20 @@
+import json
+import os
+import time
+
+from app.api.features.utils.summary_cache import SummaryCache
+
+def test_entries_expire_on_disk_from_their_creation_time(tmp_path):
+    cache = SummaryCache(str(tmp_path), ttl_seconds=60)
+    cache.set("a" * 64, "Old summary")
+
+    # An entry generated long ago but read a moment ago
+    entry_path = cache._entry_path("a" * 64)
+    with open(entry_path, 'w') as file:
+        json.dump({"created_at": time.time() - 120, "summary": "Old summary"}, file)
+    os.utime(entry_path)
+
+    cache.set("b" * 64, "New summary")
+
+    assert not os.path.exists(entry_path)
+    assert os.path.exists(cache._entry_path("b" * 64))
@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+import pytest
+
+from app.api.features import document_loaders
+from app.api.features.errors.document_loader_errors import VideoTranscriptError
+from app.api.features.utils.summary_cache import SummaryCache
+from app.api.features.utils.youtube_transcripts import LocalTranscriptSource
+
+VIDEO_URL = "https://www.youtube.com/watch?v={}"
+
+def pieces(text, count, step=30):
+    return [{"text": f"{text} {index}", "start": index * step, "duration": step} for index in range(count)]
+
+class RecordingSource(LocalTranscriptSource):
+    """LocalTranscriptSource recording the order of its calls."""
+    def __init__(self, transcript_dir):
+        super().__init__(transcript_dir)
+        self.calls = []
+
+    def video_info(self, video_id):
+        self.calls.append(("video_info", video_id))
+        return super().video_info(video_id)
+
+    def transcript(self, video_id, language):
+        self.calls.append(("transcript", video_id, language))
+        return super().transcript(video_id, language)
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    videos = {
+        "shortvideo1": {"title": "Short", "length": 120, "transcripts": {"en": pieces("hello", 4), "fr": pieces("bonjour", 4)}},
+        "longvideo01": {"title": "Long", "length": 3600, "transcripts": {"en": pieces("long", 120)}},
+        "englishonly": {"title": "English", "length": 60, "transcripts": {"en": pieces("only", 2)}}
+    }
+    for video_id, video in videos.items():
+        (tmp_path / f"{video_id}.json").write_text(json.dumps(video))
+
+    source = RecordingSource(str(tmp_path))
+    monkeypatch.setattr(document_loaders, "transcript_source", source)
+    monkeypatch.setattr(document_loaders, "transcript_cache", SummaryCache(str(tmp_path / "cache")))
+    return source
+
+def load(video_id, language="en", max_video_length=600):
+    return asyncio.run(document_loaders.load_youtube_transcript(VIDEO_URL.format(video_id), language, max_video_length))
+
+def test_long_videos_are_rejected_before_the_transcript_is_fetched(source):
+    with pytest.raises(VideoTranscriptError):
+        load("longvideo01")
+    assert source.calls == [("video_info", "longvideo01")]
+
+def test_transcripts_are_cached_by_language(source):
+    video_info, english = load("shortvideo1", "en")
+    _, french = load("shortvideo1", "fr")
+    assert video_info.title == "Short"
+    assert english.text().startswith("hello 0")
+    assert french.text().startswith("bonjour 0")
+    assert len(source.calls) == 4
+
+    assert load("shortvideo1", "en")[1] == english
+    assert load("shortvideo1", "fr")[1] == french
+    assert len(source.calls) == 4
+
+def test_cached_transcripts_still_check_the_video_length(source):
+    load("shortvideo1")
+    with pytest.raises(VideoTranscriptError):
+        load("shortvideo1", max_video_length=60)
+    assert len(source.calls) == 2
+
+def test_missing_languages_fall_back_to_english(source):
+    _, transcript = load("englishonly", "de")
+    assert transcript.language == "en"
+    assert transcript.text() == "only 0 only 1"
+
+def test_chunks_start_with_their_timestamp(source):
+    _, transcript = load("shortvideo1")
+    assert transcript.chunks(60) == ["[00:00:00] hello 0 hello 1", "[00:01:00] hello 2 hello 3"]
+
+def test_invalid_urls_are_rejected(source):
+    with pytest.raises(VideoTranscriptError):
+        asyncio.run(document_loaders.load_youtube_transcript("https://example.com/video", "en", 600))
+    assert source.calls == []